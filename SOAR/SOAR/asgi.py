@@ -2,6 +2,9 @@
 ASGI config for SOAR project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (``uvicorn SOAR.asgi:application``) so the
+Server-Sent Events streams in ``realtime`` are held open as coroutines
+instead of one worker thread each.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,75 @@
+"""Per-request SQL instrumentation.
+
+QueryInstrumentationMiddleware records every query a request runs and the
+time spent in the database:
+
+* N+1 detection. A query shape (SQL with parameters and IN-lists
+  collapsed) that runs QUERY_N_PLUS_ONE_THRESHOLD or more times in one
+  request is logged with the view name.
+* Budgets. QUERY_BUDGETS maps URL names to a maximum query count, session
+  and auth lookups included. Going over is handled like
+  ``SOAR.querybudget.query_budget``: it raises under QUERY_BUDGET_ENFORCE
+  (on in tests), else it logs. Tests can pin an endpoint with
+  ``@override_settings(QUERY_BUDGETS={'orgpage': 6})``.
+* With DEBUG on, a ``Server-Timing: db;dur=...`` header shows the count
+  and time in the browser's network panel.
+
+Queries run while a streaming response is consumed are not counted. Async
+views pass through uninstrumented, because their ORM calls run on worker
+threads with their own connections.
+"""
+import logging
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .querybudget import QueryRecorder, budget_exceeded
+
+logger = logging.getLogger(__name__)
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else request.path
+        self.report(view, recorder)
+        if settings.DEBUG:
+            response.headers['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.1f};desc="{len(recorder)} queries"'
+            )
+        return response
+
+    def report(self, view, recorder):
+        threshold = getattr(settings, 'QUERY_N_PLUS_ONE_THRESHOLD', 5)
+        for shape, count in recorder.repeated_shapes(threshold):
+            logger.warning("Possible N+1 in %s: ran %d times: %s", view, count, shape)
+        logger.debug("%s: %d queries, %.1f ms in the database", view, len(recorder), recorder.duration * 1000)
+
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view)
+        if budget is not None and len(recorder) > budget:
+            budget_exceeded("{} ran {} queries (budget {}):\n  {}".format(
+                view, len(recorder), budget, "\n  ".join(recorder.queries),
+            ))
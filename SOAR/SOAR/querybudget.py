@@ -0,0 +1,100 @@
+"""Per-view SQL query budgets.
+
+    @query_budget(2)
+    def index(request): ...
+
+    with query_budget(3, name='promote'):
+        ...
+
+Counts every query run on the default connection inside the block, template
+rendering included. Over budget raises QueryBudgetExceeded when
+settings.QUERY_BUDGET_ENFORCE is true (default: only under `manage.py
+test`); otherwise it logs a warning. A budget that holds for 1 organization and for 1,000 organizations
+means the view has no per-row queries.
+
+QueryRecorder is the shared bookkeeping: SOAR.middleware uses it to time
+every request and to spot N+1 patterns (the same query shape run over and
+over).
+"""
+import functools
+import logging
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# "IN (%s, %s, %s)" and "IN (%s)" are the same shape.
+_PLACEHOLDER_LIST = re.compile(r"%s(?:\s*,\s*%s)+")
+_NUMBER = re.compile(r"\b\d+\b")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_shape(sql):
+    """Normalize ``sql`` so queries that differ only in parameters compare equal."""
+    return _NUMBER.sub("N", _PLACEHOLDER_LIST.sub("%s", sql))
+
+
+def budget_exceeded(message):
+    if getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` hook that keeps each query's SQL and the total time spent."""
+
+    def __init__(self):
+        self.queries = []
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.queries.append(sql)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated_shapes(self, threshold):
+        """[(shape, count)] for every shape run at least ``threshold`` times, most frequent first."""
+        counts = Counter(query_shape(sql) for sql in self.queries)
+        return [(shape, count) for shape, count in counts.most_common() if count >= threshold]
+
+
+class query_budget:
+    def __init__(self, max_queries, name=None):
+        self.max_queries = max_queries
+        self.name = name
+        self.queries = []
+
+    def __enter__(self):
+        self.recorder = QueryRecorder()
+        self.queries = self.recorder.queries
+        self._wrapper = connection.execute_wrapper(self.recorder)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._wrapper.__exit__(exc_type, exc, tb)
+        if exc_type is None and len(self.queries) > self.max_queries:
+            budget_exceeded("{} ran {} queries (budget {}):\n  {}".format(
+                self.name or "block", len(self.queries), self.max_queries, "\n  ".join(self.queries),
+            ))
+        return False
+
+    def __call__(self, view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            with query_budget(self.max_queries, self.name or view.__qualname__):
+                return view(*args, **kwargs)
+        return wrapped
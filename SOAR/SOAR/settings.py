@@ -12,6 +12,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import sys
 from pathlib import Path
 import dj_database_url
 from dotenv import load_dotenv
@@ -32,6 +33,9 @@ SECRET_KEY = 'django-insecure-j^nqw*ah5!xhr_thchmpv+093lq6*0j)2m-%m2rs6#0+k_2jn_
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# `manage.py test`
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 ALLOWED_HOSTS = []
 
 
@@ -45,12 +49,21 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+]
+
+LOCAL_APPS = [
     'organization',
     'accounts',
+    'taskqueue',
+    'event',
+    'announcement',
+    'realtime',
 ]
+INSTALLED_APPS += LOCAL_APPS
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'SOAR.middleware.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -88,14 +101,42 @@ ASGI_APPLICATION = 'SOAR.asgi.application'
 # Prefer DATABASE_URL (Supabase Postgres) with SSL; fallback to local SQLite if not set
 DATABASE_URL = os.getenv('DATABASE_URL')
 
+# Connection management (Postgres only):
+#   DB_POOL=1                 psycopg3 connection pool per worker process (needs psycopg-pool)
+#   DB_CONN_MAX_AGE=600       otherwise, keep each worker's connection open this many seconds
+#   DB_TRANSACTION_POOLER=1   DATABASE_URL is a transaction-mode pooler (Supabase port 6543):
+#                             no server-side cursors and no prepared statements
+#   DB_PREPARED_STATEMENTS=1  server-side binding; queries run DB_PREPARE_THRESHOLD times get prepared
+DB_POOL = os.getenv('DB_POOL', '0') == '1'
+DB_TRANSACTION_POOLER = os.getenv('DB_TRANSACTION_POOLER', '0') == '1'
+DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', '0') == '1' and not DB_TRANSACTION_POOLER
+
 if DATABASE_URL:
     DATABASES = {
         'default': dj_database_url.parse(
             DATABASE_URL,
-            conn_max_age=0,  # keep-alive for performance
+            # A pool and persistent connections are mutually exclusive in Django.
+            conn_max_age=0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 600)),
+            conn_health_checks=True,  # ping reused connections before handing them out
             ssl_require=True   # Supabase requires SSL
         )
     }
+    db_options = DATABASES['default'].setdefault('OPTIONS', {})
+    if DB_POOL:
+        db_options['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+            # No 'check' here: Django passes ConnectionPool.check_connection itself
+            # when CONN_HEALTH_CHECKS is on (conn_health_checks above).
+        }
+    if DB_TRANSACTION_POOLER:
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+        db_options['prepare_threshold'] = None
+    elif DB_PREPARED_STATEMENTS:
+        db_options['server_side_binding'] = True
+        db_options['prepare_threshold'] = int(os.getenv('DB_PREPARE_THRESHOLD', 5))
 else:
     DATABASES = {
         'default': {
@@ -103,6 +144,38 @@ else:
             'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
         }
     }
+    if TESTING:
+        # The migration history only applies on Postgres (organization 0002 adds an
+        # ArrayField), so SQLite test databases are built straight from the models.
+        MIGRATION_MODULES = {app: None for app in LOCAL_APPS}
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    # Trigram lookups for member search (organization.search); the app imports psycopg.
+    INSTALLED_APPS.append('django.contrib.postgres')
+
+
+# Cache
+# Use a shared Redis cache in production (REDIS_URL) so cached roles and versions are
+# coherent across gunicorn workers; fall back to per-process memory locally.
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Without a shared cache, process-local copies of reference data (organization.reference)
+# are reloaded after this many seconds, since other workers' changes can't reach them.
+REFERENCE_LOCAL_TTL = int(os.getenv('REFERENCE_LOCAL_TTL', '30'))
 
 
 # Password validation
@@ -151,6 +224,68 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = "accounts.User"
 
+# Background tasks (taskqueue app). Run `python manage.py runworker` alongside the web
+# process; set TASK_QUEUE_EAGER=1 to run jobs in-process after commit instead.
+TASK_QUEUE_EAGER = os.getenv('TASK_QUEUE_EAGER', '0') == '1'
+
+# Query budgets (SOAR.querybudget.query_budget, QUERY_BUDGETS) raise under `manage.py test`
+# so a regression fails the suite; everywhere else going over only logs a warning.
+QUERY_BUDGET_ENFORCE = os.getenv('QUERY_BUDGET_ENFORCE', '1' if TESTING else '0') == '1'
+
+# SOAR.middleware.QueryInstrumentationMiddleware: query count and DB time per view, a
+# warning when one query shape repeats QUERY_N_PLUS_ONE_THRESHOLD times in a request,
+# and per-URL-name budgets (whole request, session and auth queries included).
+QUERY_INSTRUMENTATION = os.getenv('QUERY_INSTRUMENTATION', '1' if DEBUG or TESTING else '0') == '1'
+QUERY_N_PLUS_ONE_THRESHOLD = int(os.getenv('QUERY_N_PLUS_ONE_THRESHOLD', 5))
+# Measured, and pinned by organization.tests.QueryBudgetTests.
+QUERY_BUDGETS = {
+    'organization_editprofile': 5,
+    'membermanagement': 5,
+}
+
+# Member listing APIs use keyset pagination (organization.pagination)
+MEMBER_PAGE_SIZE = int(os.getenv('MEMBER_PAGE_SIZE', 25))
+MEMBER_MAX_PAGE_SIZE = int(os.getenv('MEMBER_MAX_PAGE_SIZE', 200))
+
+# Join-request review queue (organization.review): reviewers lease batches of pending
+# requests; an unfinished lease returns its requests to the queue after this long.
+REVIEW_LEASE_SECONDS = int(os.getenv('REVIEW_LEASE_SECONDS', 600))
+REVIEW_MAX_BATCH = int(os.getenv('REVIEW_MAX_BATCH', 50))
+
+# Uploads: files over FILE_UPLOAD_MAX_MEMORY_SIZE stream to a temporary file in chunks,
+# and an image field's upload over IMAGE_MAX_UPLOAD_SIZE is dropped before it reaches
+# disk (organization.uploads). Image dimensions are read from headers, never decoded.
+FILE_UPLOAD_HANDLERS = [
+    'organization.uploads.SizeLimitedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', 256 * 1024))
+IMAGE_MAX_UPLOAD_SIZE = int(os.getenv('IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024))
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 40_000_000))
+# Form fields the IMAGE_MAX_UPLOAD_SIZE cut-off applies to, and limits for other file fields.
+IMAGE_UPLOAD_FIELDS = ('profile_picture',)
+ROSTER_MAX_UPLOAD_SIZE = int(os.getenv('ROSTER_MAX_UPLOAD_SIZE', 50 * 1024 * 1024))
+UPLOAD_SIZE_LIMITS = {'roster': ROSTER_MAX_UPLOAD_SIZE}
+
+# Events (event app). Range queries rely on the duration cap to bound their index scans.
+EVENT_MAX_DURATION_DAYS = int(os.getenv('EVENT_MAX_DURATION_DAYS', 31))
+EVENT_RANGE_MAX_DAYS = int(os.getenv('EVENT_RANGE_MAX_DAYS', 92))
+EVENT_RANGE_MAX_RESULTS = int(os.getenv('EVENT_RANGE_MAX_RESULTS', 2000))
+EVENT_FEED_PAST_DAYS = int(os.getenv('EVENT_FEED_PAST_DAYS', 90))
+
+# Announcements (announcement app). Organizations with at least ANNOUNCEMENT_FANOUT_LIMIT
+# approved members are merged into inboxes at read time instead of fanned out.
+ANNOUNCEMENT_FANOUT_LIMIT = int(os.getenv('ANNOUNCEMENT_FANOUT_LIMIT', 2000))
+ANNOUNCEMENT_PAGE_SIZE = int(os.getenv('ANNOUNCEMENT_PAGE_SIZE', 20))
+
+# Server-Sent Events (realtime app). Serve SOAR.asgi with an ASGI server for long-lived
+# streams; set REALTIME_BROKER to realtime.broker.RedisBroker when running several workers.
+REALTIME_BROKER = os.getenv('REALTIME_BROKER', 'realtime.broker.InProcessBroker')
+REALTIME_QUEUE_SIZE = int(os.getenv('REALTIME_QUEUE_SIZE', 100))
+REALTIME_HEARTBEAT_SECONDS = int(os.getenv('REALTIME_HEARTBEAT_SECONDS', 15))
+REALTIME_MAX_STREAM_SECONDS = int(os.getenv('REALTIME_MAX_STREAM_SECONDS', 300))
+
 LOGIN_REDIRECT_URL = '/accounts/'
 
 LOGOUT_REDIRECT_URL = '/accounts/login/'
@@ -0,0 +1,32 @@
+"""Streaming responses that stream under both WSGI and ASGI.
+
+Under ASGI, Django buffers a StreamingHttpResponse built from a sync
+iterator with ``sync_to_async(list)`` before sending a byte, so a large
+export or feed is held in memory and the client waits for all of it.
+Under WSGI the opposite holds: an async iterator is buffered. So
+``streaming_response()`` picks the iterator type for the handler serving
+the request. Under ASGI it pulls ``batch`` chunks at a time from the sync
+iterator in a worker thread. That is the request's thread-sensitive thread,
+so a server-side cursor stays on the connection that opened it.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+async def iterate_in_thread(chunks, batch=64):
+    """Async iterator over the sync iterable ``chunks``, ``batch`` chunks per thread hop."""
+    iterator = iter(chunks)
+    take = sync_to_async(lambda: list(islice(iterator, batch)))
+    while pulled := await take():
+        for chunk in pulled:
+            yield chunk
+
+
+def streaming_response(request, chunks, **kwargs):
+    """A StreamingHttpResponse over ``chunks`` (a sync iterable) that isn't buffered under ASGI."""
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = iterate_in_thread(chunks)
+    return StreamingHttpResponse(chunks, **kwargs)
@@ -24,6 +24,9 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path("accounts/", include("accounts.urls")),
     path("organization/", include("organization.urls")),
+    path("event/", include("event.urls")),
+    path("announcement/", include("announcement.urls")),
+    path("realtime/", include("realtime.urls")),
     path("", landing_page, name='home'),
 ]
 
@@ -1,8 +1,39 @@
-from django.contrib import admin
+import io
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.shortcuts import redirect, render
+from django.template.defaultfilters import filesizeformat
+from django.urls import path
+
+from organization.models import Organization
 from .models import User
+from .roster import RosterError, import_roster
+
+# Per-row errors listed on the page after an import; the rest are only counted.
+ADMIN_SHOWN_ERRORS = 200
+
+
+class RosterImportForm(forms.Form):
+    roster = forms.FileField(help_text="CSV with student_id and email columns; optional first_name, last_name, course, year_level, role.")
+    organization = forms.ModelChoiceField(
+        queryset=Organization.objects.order_by('name'), required=False,
+        help_text="Also add every student to this organization.",
+    )
+    pending = forms.BooleanField(required=False, help_text="New memberships wait for approval.")
+    dry_run = forms.BooleanField(required=False, help_text="Only validate the file.")
+
+    def clean_roster(self):
+        roster = self.cleaned_data['roster']
+        if roster.size > settings.ROSTER_MAX_UPLOAD_SIZE:
+            raise forms.ValidationError(f"Roster must be under {filesizeformat(settings.ROSTER_MAX_UPLOAD_SIZE)}.")
+        return roster
+
 
 class UserAdmin(BaseUserAdmin):
+    change_list_template = 'admin/accounts/user/change_list.html'
     list_display = ('username', 'email', 'student_id', 'course', 'year_level', 'is_staff', 'is_active')
     list_filter = ('is_staff', 'is_superuser', 'is_active', 'course', 'year_level')
     fieldsets = (
@@ -19,4 +50,46 @@ class UserAdmin(BaseUserAdmin):
     search_fields = ('username', 'email', 'student_id')
     ordering = ('username',)
 
+    def get_urls(self):
+        return [
+            path('import-roster/', self.admin_site.admin_view(self.import_roster_view), name='accounts_user_import_roster'),
+        ] + super().get_urls()
+
+    def import_roster_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:accounts_user_changelist')
+        report = None
+        form = RosterImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['roster']
+            try:
+                # Read straight from the upload (a temporary file past FILE_UPLOAD_MAX_MEMORY_SIZE).
+                with io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='') as file:
+                    report = import_roster(
+                        file,
+                        organization=form.cleaned_data['organization'],
+                        approve=not form.cleaned_data['pending'],
+                        dry_run=form.cleaned_data['dry_run'],
+                    )
+            except (RosterError, UnicodeDecodeError) as e:
+                form.add_error('roster', str(e))
+            else:
+                verb = "Validated" if form.cleaned_data['dry_run'] else "Imported"
+                level = messages.WARNING if report.error_count else messages.SUCCESS
+                self.message_user(
+                    request,
+                    f"{verb} {report.imported} of {report.rows} row(s); {report.error_count} error(s); "
+                    f"{report.memberships} membership(s) added or updated.",
+                    level,
+                )
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import roster',
+            'form': form,
+            'report': report,
+            'shown_errors': report.errors[:ADMIN_SHOWN_ERRORS] if report else [],
+        }
+        return render(request, 'admin/accounts/user/import_roster.html', context)
+
 admin.site.register(User, UserAdmin)
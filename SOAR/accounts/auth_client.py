@@ -0,0 +1,266 @@
+"""Supabase (GoTrue) auth client with bounded latency.
+
+Talks to ``<SUPABASE_URL>/auth/v1`` over one pooled ``httpx.Client``:
+
+- every call has connect/read timeouts,
+- at most ``max_concurrency`` calls are in flight per process; callers that
+  cannot get a slot within ``acquire_timeout`` fail fast instead of queueing,
+- a circuit breaker opens after consecutive upstream failures (timeouts,
+  connection errors, 5xx) and rejects calls until ``reset_timeout`` passes,
+- latency and error counters are kept per operation (see ``metrics``).
+
+Point SUPABASE_URL at any local HTTP server implementing ``/auth/v1/signup``
+and ``/auth/v1/token`` to exercise it without Supabase, or pass an
+``httpx.MockTransport`` as ``transport``.
+
+The shared client is built on first use by ``get_auth_client()``, so
+importing the views (manage.py commands, migrations, worker boot) does not
+read credentials or import the HTTP stack.
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+
+UNAVAILABLE_MESSAGE = "The authentication service is temporarily unavailable. Please try again in a moment."
+
+
+class AuthError(Exception):
+    """The auth service rejected the request (bad credentials, duplicate e-mail, ...)."""
+
+
+class AuthUnavailable(AuthError):
+    """The auth service could not be reached in time; the call was not (or may not have been) made."""
+
+
+@dataclass
+class AuthUser:
+    id: str
+    email: str = ""
+    email_confirmed_at: str = None
+
+
+@dataclass
+class AuthResponse:
+    user: AuthUser = None
+
+
+class CircuitBreaker:
+    """Closed → open after ``failure_threshold`` consecutive failures → half-open after ``reset_timeout``."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                # Let exactly one probe through.
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def cancel_trial(self):
+        """The allowed call never reached upstream: let the next caller probe instead."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class AuthMetrics:
+    """Thread-safe per-operation counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def record(self, op, outcome, seconds=None):
+        with self._lock:
+            stats = self._ops.setdefault(op, {
+                "calls": 0, "ok": 0, "rejected": 0, "unavailable": 0,
+                "short_circuited": 0, "latency_ms_total": 0.0, "latency_ms_max": 0.0,
+            })
+            stats["calls"] += 1
+            stats[outcome] += 1
+            if seconds is not None:
+                ms = seconds * 1000
+                stats["latency_ms_total"] += ms
+                stats["latency_ms_max"] = max(stats["latency_ms_max"], ms)
+
+    def snapshot(self):
+        with self._lock:
+            snapshot = {}
+            for op, stats in self._ops.items():
+                timed = stats["ok"] + stats["rejected"] + stats["unavailable"]
+                snapshot[op] = dict(stats, latency_ms_avg=(stats["latency_ms_total"] / timed) if timed else 0.0)
+            return snapshot
+
+
+class SupabaseAuthClient:
+    def __init__(self, url, key, timeout=5.0, connect_timeout=2.0, max_concurrency=10,
+                 acquire_timeout=1.0, failure_threshold=5, reset_timeout=30.0, transport=None):
+        # Imported here so processes that never authenticate don't pay for httpx.
+        import httpx
+
+        self._httpx = httpx
+        self.acquire_timeout = acquire_timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = AuthMetrics()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._http = httpx.Client(
+            base_url=f"{url.rstrip('/')}/auth/v1",
+            headers={"apikey": key, "Authorization": f"Bearer {key}"},
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            transport=transport,
+        )
+
+    def close(self):
+        self._http.close()
+
+    def sign_up(self, email, password):
+        return self._call("sign_up", "/signup", {"email": email, "password": password})
+
+    def sign_in_with_password(self, email, password):
+        return self._call(
+            "sign_in", "/token", {"email": email, "password": password},
+            params={"grant_type": "password"},
+        )
+
+    def _call(self, op, path, payload, params=None):
+        # Take a slot before asking the breaker: a half-open probe handed out to a
+        # caller that then found no slot would never be reported back.
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            # Too many logins already waiting on upstream; don't pin another worker.
+            self.metrics.record(op, "short_circuited")
+            raise AuthUnavailable(UNAVAILABLE_MESSAGE)
+        try:
+            if not self.breaker.allow():
+                self.metrics.record(op, "short_circuited")
+                raise AuthUnavailable(UNAVAILABLE_MESSAGE)
+            return self._send(op, path, payload, params)
+        finally:
+            self._slots.release()
+
+    def _send(self, op, path, payload, params):
+        started = time.perf_counter()
+        try:
+            response = self._http.post(path, json=payload, params=params)
+        except self._httpx.HTTPError:
+            self.breaker.record_failure()
+            self.metrics.record(op, "unavailable", time.perf_counter() - started)
+            raise AuthUnavailable(UNAVAILABLE_MESSAGE)
+        except BaseException:
+            # Not an upstream failure (a bug here, KeyboardInterrupt): don't count it, but free the probe.
+            self.breaker.cancel_trial()
+            raise
+        elapsed = time.perf_counter() - started
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            self.metrics.record(op, "unavailable", elapsed)
+            raise AuthUnavailable(UNAVAILABLE_MESSAGE)
+
+        # Any answer below 500 means upstream is healthy, even if it said no.
+        self.breaker.record_success()
+        data = _json(response)
+        if response.status_code >= 400:
+            self.metrics.record(op, "rejected", elapsed)
+            raise AuthError(_error_message(data, response))
+        self.metrics.record(op, "ok", elapsed)
+        return AuthResponse(user=_parse_user(data))
+
+
+def _json(response):
+    try:
+        return response.json()
+    except ValueError:
+        return {}
+
+
+def _error_message(data, response):
+    for key in ("msg", "error_description", "message", "error"):
+        if isinstance(data, dict) and data.get(key):
+            return str(data[key])
+    return f"Authentication request failed ({response.status_code})."
+
+
+def _parse_user(data):
+    # /token returns {"access_token": ..., "user": {...}}; /signup returns the user itself
+    # when e-mail confirmation is required.
+    if not isinstance(data, dict):
+        return None
+    user = data.get("user") if isinstance(data.get("user"), dict) else data
+    if not user.get("id"):
+        return None
+    return AuthUser(
+        id=user["id"],
+        email=user.get("email", ""),
+        email_confirmed_at=user.get("email_confirmed_at") or user.get("confirmed_at"),
+    )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_auth_client():
+    """Return the process-wide client, creating it on first call."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                url = config("SUPABASE_URL", default=None)
+                key = config("SUPABASE_KEY", default=None)
+                if not url or not key:
+                    raise ImproperlyConfigured(
+                        "Supabase credentials are not configured. "
+                        "Set SUPABASE_URL and SUPABASE_KEY in your environment/.env."
+                    )
+                _client = SupabaseAuthClient(
+                    url,
+                    key,
+                    timeout=config("SUPABASE_AUTH_TIMEOUT", default=5.0, cast=float),
+                    max_concurrency=config("SUPABASE_AUTH_MAX_CONCURRENCY", default=10, cast=int),
+                    failure_threshold=config("SUPABASE_AUTH_BREAKER_THRESHOLD", default=5, cast=int),
+                    reset_timeout=config("SUPABASE_AUTH_BREAKER_RESET", default=30.0, cast=float),
+                )
+    return _client
+
+
+def existing_auth_client():
+    """Return the client if this process has created one, without creating it."""
+    return _client
@@ -2,12 +2,44 @@ import re
 from django import forms
 from django.core.exceptions import ValidationError
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
+from organization.reference import programs
+from organization.uploads import ImageUploadField
 from .models import User
 
 COMMON_PASSWORDS = [
     'password', '12345678', 'qwerty', '11111111', 'abcdefgh'
 ]
 
+STUDENT_ID_RE = re.compile(r'^\d{2}-\d{4}-\d{3}$')
+
+# Shared by StudentRegistrationForm and the roster importer (accounts/roster.py).
+def validate_cit_email(email):
+    if not email or not email.endswith('@cit.edu'):
+        raise ValidationError('Email must end with @cit.edu')
+
+def validate_student_id(student_id):
+    if not student_id or not STUDENT_ID_RE.match(student_id):
+        raise ValidationError('Student ID must be in the format XX-XXXX-XXX (e.g., 12-3456-789)')
+
+# Offered until programs are set up in the Program table.
+DEFAULT_COURSES = [
+    'BS in Computer Science',
+    'BS in Information Technology',
+    'BS in Computer Engineering',
+    'BS in Information Systems',
+    'BS in Electronics Engineering',
+    'BS in Civil Engineering',
+    'BS in Mechanical Engineering',
+    'BS in Electrical Engineering',
+]
+
+def course_names():
+    """Program names from the reference cache (organization.reference), else DEFAULT_COURSES."""
+    return list(dict.fromkeys(program.name for program in programs())) or DEFAULT_COURSES
+
+def course_choices():
+    return [('', 'Select a course')] + [(name, name) for name in course_names()]
+
 class StudentRegistrationForm(UserCreationForm):
     def clean_email(self):
         email = self.cleaned_data.get('email')
@@ -43,21 +75,9 @@ class StudentRegistrationForm(UserCreationForm):
             'title': 'Format: 12-3456-789'
         })
     )
-    COURSE_CHOICES = [
-        ('', 'Select a course'),
-        ('BS in Computer Science', 'BS in Computer Science'),
-        ('BS in Information Technology', 'BS in Information Technology'),
-        ('BS in Computer Engineering', 'BS in Computer Engineering'),
-        ('BS in Information Systems', 'BS in Information Systems'),
-        ('BS in Electronics Engineering', 'BS in Electronics Engineering'),
-        ('BS in Civil Engineering', 'BS in Civil Engineering'),
-        ('BS in Mechanical Engineering', 'BS in Mechanical Engineering'),
-        ('BS in Electrical Engineering', 'BS in Electrical Engineering'),
-    ]
-    
     course = forms.ChoiceField(
         required=True,
-        choices=COURSE_CHOICES,
+        choices=course_choices,
         label='',
         widget=forms.Select(attrs={
             'class': 'form-select',
@@ -102,16 +122,42 @@ class StudentRegistrationForm(UserCreationForm):
 
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if not email.endswith('@cit.edu'):
-            raise ValidationError('Email must end with @cit.edu')
+        validate_cit_email(email)
         return email
 
     def clean_student_id(self):
         student_id = self.cleaned_data.get('student_id')
-        if not re.match(r'^\d{2}-\d{4}-\d{3}$', student_id):
-            raise ValidationError('Student ID must be in the format XX-XXXX-XXX (e.g., 12-3456-789)')
+        validate_student_id(student_id)
         return student_id
 
+    def imported_account(self):
+        """The unclaimed roster import with this student ID and e-mail, if any (accounts.roster)."""
+        from .roster import unclaimed_import
+
+        if not hasattr(self, '_imported_account'):
+            email = (self.data.get('email') or '').strip()
+            student_id = (self.data.get('student_id') or '').strip()
+            self._imported_account = unclaimed_import(email, student_id) if student_id else None
+        return self._imported_account
+
+    def clean_username(self):
+        account = self.imported_account()
+        if account is not None and account.username == self.cleaned_data.get('username'):
+            return account.username
+        return super().clean_username()
+
+    def validate_unique(self):
+        account = self.imported_account()
+        if account is None:
+            return super().validate_unique()
+        exclude = self._get_validation_exclusions() | {'student_id'}
+        if self.cleaned_data.get('username') == account.username:
+            exclude.add('username')
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as e:
+            self._update_errors(e)
+
     def clean_password1(self):
         password = self.cleaned_data.get('password1')
         username = self.cleaned_data.get('username')
@@ -164,6 +210,9 @@ class UserProfileForm(forms.ModelForm):
         widgets = {
             'profile_picture': forms.FileInput(),
         }
+        field_classes = {
+            'profile_picture': ImageUploadField,
+        }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
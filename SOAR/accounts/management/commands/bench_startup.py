@@ -0,0 +1,132 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+REPO_DIR = Path(settings.BASE_DIR).parent
+DEFAULT_BASELINE = REPO_DIR / '.benchmarks' / 'startup.json'
+
+TARGETS = {
+    'check': [str(REPO_DIR / 'manage.py'), 'check'],
+    # Resolving a URL imports the URLconf and, through it, every app's urls and views,
+    # which is what a worker does on its first request.
+    'wsgi': ['-c', "import SOAR.wsgi; from django.urls import resolve; resolve('/')"],
+}
+
+# Committed ceilings, checked when there is no local baseline (.benchmarks/ isn't in git), e.g. in CI.
+# About twice what was measured (0.5-0.8 s and 65 MB for each target), so only real
+# regressions trip them on slower machines.
+BUDGETS = {
+    'check': {'seconds': 1.5, 'rss_mb': 130},
+    'wsgi': {'seconds': 1.5, 'rss_mb': 130},
+}
+
+
+def run_once(args, env, importtime=False):
+    """Run ``python args`` in a fresh interpreter; return (seconds, max_rss_kb, stderr)."""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + args
+    with tempfile.TemporaryFile() as stderr:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=stderr)
+        # wait4 gives this child's own rusage (RUSAGE_CHILDREN would be cumulative).
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - started
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stderr.seek(0)
+        output = stderr.read().decode(errors='replace')
+    if process.returncode != 0:
+        raise CommandError(f"{' '.join(args)} exited with {process.returncode}:\n{output[-2000:]}")
+    rss_kb = usage.ru_maxrss if sys.platform != 'darwin' else usage.ru_maxrss // 1024
+    return elapsed, rss_kb, output
+
+
+def slowest_imports(importtime_output, limit):
+    """Parse ``-X importtime`` lines into (cumulative_us, self_us, module), slowest first."""
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header row
+        rows.append((cumulative_us, self_us, parts[2].strip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+class Command(BaseCommand):
+    help = ("Measure cold-start wall time and peak RSS of `manage.py check` and the WSGI app "
+            "(including its URLconf and views) in fresh interpreters, report the slowest imports, "
+            "and compare with a local baseline or, without one, the committed BUDGETS.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Timed runs per target (median is reported).")
+        parser.add_argument('--target', action='append', choices=sorted(TARGETS), dest='targets')
+        parser.add_argument('--top', type=int, default=15, help="Slowest imports to list per target.")
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline.")
+        parser.add_argument('--tolerance', type=float, default=20.0,
+                            help="Allowed regression over the baseline, in percent.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'SOAR.settings'))
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+
+        results = {}
+        for name in options['targets'] or sorted(TARGETS):
+            args = TARGETS[name]
+            timings, peaks = [], []
+            for _ in range(max(1, options['runs'])):
+                seconds, rss_kb, _ = run_once(args, env)
+                timings.append(seconds)
+                peaks.append(rss_kb)
+            _, _, importtime = run_once(args, env, importtime=True)
+            results[name] = {
+                'seconds': round(statistics.median(timings), 4),
+                'rss_mb': round(max(peaks) / 1024, 1),
+            }
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{name}: {results[name]['seconds']:.3f}s median over {len(timings)} runs, "
+                f"peak RSS {results[name]['rss_mb']} MB"
+            ))
+            for cumulative_us, self_us, module in slowest_imports(importtime, options['top']):
+                self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {module}")
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True))
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {baseline_path}"))
+            return
+
+        if baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text())
+            limit = 1 + options['tolerance'] / 100
+            source = f"baseline (+{options['tolerance']:.0f}%)"
+        else:
+            self.stdout.write(f"No baseline at {baseline_path}; checking the committed budgets instead "
+                              f"(--save-baseline creates one).")
+            baseline, limit, source = BUDGETS, 1, "committed budget"
+        regressions = []
+        for name, current in results.items():
+            previous = baseline.get(name)
+            if not previous:
+                continue
+            for metric in ('seconds', 'rss_mb'):
+                if current[metric] > previous[metric] * limit:
+                    regressions.append(f"{name} {metric}: {previous[metric]} -> {current[metric]}")
+        if regressions:
+            raise CommandError("Startup over the {}:\n  {}".format(source, "\n  ".join(regressions)))
+        self.stdout.write(self.style.SUCCESS(f"Startup within the {source}."))
@@ -0,0 +1,54 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.roster import DEFAULT_BATCH_SIZE, RosterError, import_roster
+from organization.models import Organization
+
+
+def find_organization(value):
+    """Look an organization up by id or by (case-insensitive) name."""
+    try:
+        return Organization.objects.get(pk=value)
+    except (Organization.DoesNotExist, ValidationError):
+        pass
+    try:
+        return Organization.objects.get(name__iexact=value)
+    except Organization.DoesNotExist:
+        raise CommandError(f"No organization with id or name '{value}'.")
+
+
+class Command(BaseCommand):
+    help = "Import students (and optionally their memberships) from a CSV roster, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with at least student_id and email columns.")
+        parser.add_argument('--organization', help="Also add every student to this organization (id or name).")
+        parser.add_argument('--pending', action='store_true',
+                            help="New memberships wait for approval instead of being approved.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Validate the file without writing anything.")
+
+    def handle(self, *args, **options):
+        organization = find_organization(options['organization']) if options['organization'] else None
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as file:
+                report = import_roster(
+                    file,
+                    organization=organization,
+                    approve=not options['pending'],
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, UnicodeDecodeError, RosterError) as e:
+            raise CommandError(str(e))
+
+        for line, student_id, message in report.errors:
+            self.stderr.write(f"line {line} ({student_id or 'no student id'}): {message}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f"... and {report.error_count - len(report.errors)} more error(s).")
+
+        verb = "Validated" if options['dry_run'] else "Imported"
+        summary = f"{verb} {report.imported} of {report.rows} row(s); {report.error_count} error(s)."
+        if organization is not None and not options['dry_run']:
+            summary += f" {report.memberships} membership(s) added or updated in {organization.name}."
+        self.stdout.write(self.style.SUCCESS(summary) if not report.error_count else self.style.WARNING(summary))
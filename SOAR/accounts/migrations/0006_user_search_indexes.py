@@ -0,0 +1,73 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    "CREATE INDEX IF NOT EXISTS accounts_user_username_trgm ON accounts_user USING gin (username gin_trgm_ops);",
+    "CREATE INDEX IF NOT EXISTS accounts_user_first_name_trgm ON accounts_user USING gin (first_name gin_trgm_ops);",
+    "CREATE INDEX IF NOT EXISTS accounts_user_last_name_trgm ON accounts_user USING gin (last_name gin_trgm_ops);",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS accounts_user_username_trgm;",
+    "DROP INDEX IF EXISTS accounts_user_first_name_trgm;",
+    "DROP INDEX IF EXISTS accounts_user_last_name_trgm;",
+]
+
+# FTS5 external-content table over accounts_user, kept in sync by triggers.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS accounts_user_fts USING fts5("
+    "username, first_name, last_name, content='accounts_user', content_rowid='rowid', tokenize='trigram');",
+    "CREATE TRIGGER IF NOT EXISTS accounts_user_fts_ai AFTER INSERT ON accounts_user BEGIN "
+    "INSERT INTO accounts_user_fts(rowid, username, first_name, last_name) "
+    "VALUES (new.rowid, new.username, new.first_name, new.last_name); END;",
+    "CREATE TRIGGER IF NOT EXISTS accounts_user_fts_ad AFTER DELETE ON accounts_user BEGIN "
+    "INSERT INTO accounts_user_fts(accounts_user_fts, rowid, username, first_name, last_name) "
+    "VALUES ('delete', old.rowid, old.username, old.first_name, old.last_name); END;",
+    "CREATE TRIGGER IF NOT EXISTS accounts_user_fts_au AFTER UPDATE OF username, first_name, last_name ON accounts_user BEGIN "
+    "INSERT INTO accounts_user_fts(accounts_user_fts, rowid, username, first_name, last_name) "
+    "VALUES ('delete', old.rowid, old.username, old.first_name, old.last_name); "
+    "INSERT INTO accounts_user_fts(rowid, username, first_name, last_name) "
+    "VALUES (new.rowid, new.username, new.first_name, new.last_name); END;",
+    "INSERT INTO accounts_user_fts(accounts_user_fts) VALUES ('rebuild');",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS accounts_user_fts_ai;",
+    "DROP TRIGGER IF EXISTS accounts_user_fts_ad;",
+    "DROP TRIGGER IF EXISTS accounts_user_fts_au;",
+    "DROP TABLE IF EXISTS accounts_user_fts;",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        try:
+            _run(schema_editor, SQLITE_FORWARD)
+        except Exception:
+            # SQLite built without FTS5 / trigram tokenizer (< 3.34): search falls back to LIKE.
+            _run(schema_editor, SQLITE_REVERSE)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_user_profile_picture"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,33 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_programs(apps, schema_editor):
+    # Frozen copy of accounts.models.link_course_programs().
+    User = apps.get_model('accounts', 'User')
+    Program = apps.get_model('organization', 'Program')
+    programs = {}
+    for pk, name in Program.objects.order_by('-pk').values_list('pk', 'name'):
+        programs[name.strip().lower()] = pk
+    users = []
+    for user in User.objects.exclude(course='').only('pk', 'course').iterator(chunk_size=2000):
+        user.program_id = programs.get(user.course.strip().lower())
+        if user.program_id is not None:
+            users.append(user)
+    User.objects.bulk_update(users, ['program'], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_image_upload_validation'),
+        ('organization', '0012_eligibility'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='program',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='students', to='organization.program'),
+        ),
+        migrations.RunPython(link_programs, migrations.RunPython.noop),
+    ]
@@ -2,17 +2,81 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 import uuid
 
+from organization.images import schedule_derivatives
+from organization.validators import validate_image_upload
+
 class User(AbstractUser):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     student_id = models.CharField(max_length=20, unique=True, null=True, blank=True)
     course = models.CharField(max_length=100, blank=True)
+    # The Program ``course`` names, resolved when the course changes (see save()).
+    program = models.ForeignKey(
+        'organization.Program',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='students',
+    )
     year_level = models.PositiveSmallIntegerField(null=True, blank=True)
     profile_picture = models.ImageField(
         upload_to='profile_pictures/',
         null=True,
-        blank=True
+        blank=True,
+        validators=[validate_image_upload]
     )
+    profile_picture_hash = models.CharField(max_length=64, blank=True, editable=False)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Created by a roster import (accounts.roster) and not yet claimed by a confirmed sign-in.
+    roster_imported = models.BooleanField(default=False, editable=False)
+    # The auth-service user id, for claimed roster imports (their own id predates it).
+    auth_user_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+    # Member lists show student fields, so their ETags fold this in (organization.conditional).
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_course = instance.__dict__.get('course')
+        return instance
+
+    def save(self, *args, **kwargs):
+        from organization.models import Program
+
+        update_fields = kwargs.get('update_fields')
+        # Only re-resolve on a course change, so a renamed Program keeps its students.
+        if (update_fields is None or 'course' in update_fields) and self.course != getattr(self, '_loaded_course', None):
+            self.program = Program.for_course(self.course)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'program'}
+        super().save(*args, **kwargs)
+        self._loaded_course = self.course
+        if update_fields is None or 'profile_picture' in update_fields:
+            schedule_derivatives(self)
 
     def __str__(self):
         return self.username
+
+
+def account_for_auth_user(auth_user_id):
+    """The local account of an auth-service user: same id, or a roster import it claimed."""
+    return User.objects.filter(models.Q(pk=auth_user_id) | models.Q(auth_user_id=auth_user_id)).first()
+
+
+def link_course_programs(users):
+    """Point each of ``users`` (a queryset) at the Program its course names, or at none. Returns how many changed."""
+    from organization.models import Program
+
+    # Lowest pk wins when two programs share a name, as in Program.for_course().
+    programs = {}
+    for pk, name in Program.objects.order_by('-pk').values_list('pk', 'name'):
+        programs[name.strip().lower()] = pk
+    changed = []
+    for user in users.only('pk', 'course', 'program').iterator(chunk_size=2000):
+        program_id = programs.get(user.course.strip().lower())
+        if user.program_id != program_id:
+            user.program_id = program_id
+            changed.append(user)
+    User.objects.bulk_update(changed, ['program'], batch_size=1000)
+    return len(changed)
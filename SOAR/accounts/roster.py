@@ -0,0 +1,264 @@
+"""Streaming CSV roster import: students, and optionally their memberships in one organization.
+
+    student_id,email,first_name,last_name,course,year_level,role
+    12-3456-789,juan.delacruz@cit.edu,Juan,Dela Cruz,BS in Computer Science,2,member
+
+Only ``student_id`` and ``email`` are required. Rows are checked with the
+same validators as StudentRegistrationForm and upserted ``batch_size`` at a
+time: one bulk_create(update_conflicts=...) on student_id for the users, and
+one for the memberships. Counters, role caches and the live member list are
+updated once per batch. Only the current batch and the first
+MAX_REPORTED_ERRORS errors are kept in memory.
+
+Imported students have no login yet and are flagged ``roster_imported``. The
+first confirmed sign-in with the same e-mail claims the account (see
+claim_imported_account); until then nothing a registration form submits is
+written to it.
+"""
+import csv
+import secrets
+from dataclasses import dataclass, field
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from organization.counters import apply_counter_deltas, combine_counter_deltas
+from organization.models import OrganizationMember, ROLE_MEMBER, ROLE_ORDER
+from organization.roles import invalidate_membership
+from realtime.publish import publish_organization_event
+from .forms import course_names, validate_cit_email, validate_student_id
+from .models import User, link_course_programs
+
+REQUIRED_COLUMNS = ('student_id', 'email')
+USER_FIELDS = ('email', 'first_name', 'last_name', 'course', 'year_level')
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+class RosterError(Exception):
+    """The file itself can't be imported (missing columns, not a CSV)."""
+
+
+@dataclass
+class RosterReport:
+    rows: int = 0
+    imported: int = 0
+    memberships: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)  # [(line, student_id, message)], capped
+
+    def add_error(self, line, student_id, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, student_id, message))
+
+
+def unclaimed_import(email, student_id=None):
+    """The roster-imported account for this e-mail (and student ID) that nobody has claimed yet.
+
+    Only accounts the importer created, that have never logged in and have no
+    usable password qualify, so a registration or sign-in can't take over an
+    account somebody already uses.
+    """
+    if not email:
+        return None
+    accounts = User.objects.filter(
+        email__iexact=email,
+        roster_imported=True,
+        last_login__isnull=True,
+        password__startswith=UNUSABLE_PASSWORD_PREFIX,
+    )
+    if student_id:
+        accounts = accounts.filter(student_id=student_id)
+    return accounts.order_by('date_joined').first()
+
+
+def claim_imported_account(user, auth_user_id):
+    """Link an unclaimed import to the auth-service user; call on its first confirmed sign-in."""
+    user.roster_imported = False
+    user.auth_user_id = auth_user_id
+    user.is_active = True
+    user.save(update_fields=['roster_imported', 'auth_user_id', 'is_active'])
+
+
+def clean_row(row, courses):
+    """Return the cleaned row dict, or raise ValidationError with every problem in the row.
+
+    ``courses`` is the set of accepted course names (see accounts.forms.course_names).
+    """
+    cleaned = {key: (row.get(key) or '').strip() for key in ('student_id', 'email', 'first_name', 'last_name', 'course')}
+    cleaned['email'] = cleaned['email'].lower()
+    problems = []
+    for validator, value in (
+        (validate_student_id, cleaned['student_id']),
+        (validate_email, cleaned['email']),
+        (validate_cit_email, cleaned['email']),
+    ):
+        try:
+            validator(value)
+        except ValidationError as e:
+            problems.extend(e.messages)
+    if cleaned['course'] and cleaned['course'] not in courses:
+        problems.append(f"Unknown course '{cleaned['course']}'.")
+
+    year_level = (row.get('year_level') or '').strip()
+    cleaned['year_level'] = None
+    if year_level:
+        if year_level.isdigit() and int(year_level) >= 1:
+            cleaned['year_level'] = int(year_level)
+        else:
+            problems.append('Year level must be a positive whole number.')
+
+    role = (row.get('role') or '').strip().lower()
+    if role and role not in ROLE_ORDER:
+        problems.append(f"Role must be one of: {', '.join(ROLE_ORDER)}.")
+    cleaned['role'] = role or None
+
+    if problems:
+        raise ValidationError(problems)
+    cleaned['username'] = cleaned['email'].split('@')[0]
+    return cleaned
+
+
+def import_roster(file, organization=None, approve=True, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Import a CSV roster from the text stream ``file``. Returns a RosterReport.
+
+    With ``organization``, every imported student also becomes a member:
+    new members join as ``role`` (default Member), approved unless
+    ``approve`` is False. Existing members keep their role unless the row
+    names one, and are approved when ``approve`` is set. ``dry_run`` only
+    validates.
+    """
+    reader = csv.DictReader(file)
+    columns = {name.strip().lower() for name in reader.fieldnames or ()}
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise RosterError(f"Missing column(s): {', '.join(missing)}.")
+
+    update_fields = [name for name in USER_FIELDS if name in columns]
+    courses = set(course_names())
+    report = RosterReport()
+    batch = {}
+    for row in reader:
+        row = {(key or '').strip().lower(): value for key, value in row.items()}
+        report.rows += 1
+        line = reader.line_num
+        try:
+            cleaned = clean_row(row, courses)
+        except ValidationError as e:
+            report.add_error(line, row.get('student_id'), ' '.join(e.messages))
+            continue
+        # A student listed twice in one batch: the later row wins.
+        batch[cleaned['student_id']] = (line, cleaned)
+        if len(batch) >= batch_size:
+            _import_batch(batch, organization, approve, report, update_fields, dry_run)
+            batch = {}
+    if batch:
+        _import_batch(batch, organization, approve, report, update_fields, dry_run)
+    return report
+
+
+def _reject_taken_usernames(batch, report):
+    """Drop rows whose username (the e-mail's local part) belongs to a different student."""
+    owners = {}
+    for student_id, (line, cleaned) in list(batch.items()):
+        username = cleaned['username']
+        if username in owners:
+            report.add_error(line, student_id, f"Username '{username}' is used by another row in this file.")
+            del batch[student_id]
+        else:
+            owners[username] = student_id
+    for username, owner in User.objects.filter(username__in=list(owners)).values_list('username', 'student_id'):
+        student_id = owners[username]
+        if owner != student_id:
+            line = batch.pop(student_id)[0]
+            report.add_error(line, student_id, f"Username '{username}' already belongs to another account.")
+
+
+def _adopt_unnumbered_accounts(batch):
+    """Give the student ID to an account that signed in before the ID was known (same e-mail)."""
+    known = set(User.objects.filter(student_id__in=list(batch)).values_list('student_id', flat=True))
+    by_email = {cleaned['email']: student_id for student_id, (_, cleaned) in batch.items() if student_id not in known}
+    adopted = {}
+    for user in User.objects.select_for_update().filter(student_id__isnull=True, email__in=list(by_email)).order_by('date_joined'):
+        student_id = by_email[user.email]
+        if student_id not in adopted:
+            user.student_id = student_id
+            adopted[student_id] = user
+    User.objects.bulk_update(list(adopted.values()), ['student_id'])
+
+
+def _import_batch(batch, organization, approve, report, update_fields, dry_run):
+    with transaction.atomic():
+        _adopt_unnumbered_accounts(batch)
+        _reject_taken_usernames(batch, report)
+        if dry_run or not batch:
+            transaction.set_rollback(True)
+            report.imported += len(batch)
+            return
+
+        users = [
+            User(
+                username=cleaned['username'],
+                # make_password(None) without its per-call secrets.choice() loop.
+                password=UNUSABLE_PASSWORD_PREFIX + secrets.token_urlsafe(30),
+                student_id=student_id,
+                # Only set on insert: it isn't in update_fields, so existing accounts keep theirs.
+                roster_imported=True,
+                **{name: cleaned[name] for name in USER_FIELDS},
+            )
+            for student_id, (_, cleaned) in batch.items()
+        ]
+        # Columns left out of the file don't overwrite what existing students already have.
+        # updated_at isn't stamped on conflict updates unless listed (member-list ETags use it).
+        User.objects.bulk_create(users, update_conflicts=True, unique_fields=['student_id'],
+                                 update_fields=[*update_fields, 'updated_at'])
+        if 'course' in update_fields:
+            link_course_programs(User.objects.filter(student_id__in=list(batch)))
+        report.imported += len(batch)
+        if organization is not None:
+            report.memberships += _upsert_memberships(batch, organization, approve)
+
+
+def _upsert_memberships(batch, organization, approve):
+    user_ids = dict(User.objects.filter(student_id__in=list(batch)).values_list('student_id', 'pk'))
+    before = {
+        student: (org_id, is_approved, role)
+        for org_id, student, is_approved, role in OrganizationMember.objects.select_for_update()
+        .filter(organization=organization, student_id__in=user_ids.values())
+        .values_list('organization_id', 'student_id', 'is_approved', 'role')
+    }
+    members, changes = [], []
+    for student_id, (_, cleaned) in batch.items():
+        user_id = user_ids[student_id]
+        previous = before.get(user_id)
+        if previous is None:
+            after = (organization.pk, approve, cleaned['role'] or ROLE_MEMBER)
+        else:
+            after = (organization.pk, previous[1] or approve, cleaned['role'] or previous[2])
+        if after == previous:
+            continue
+        members.append(OrganizationMember(
+            organization_id=organization.pk, student_id=user_id, is_approved=after[1], role=after[2],
+        ))
+        changes.append((previous, after))
+    if not members:
+        return 0
+
+    OrganizationMember.objects.bulk_create(
+        members,
+        update_conflicts=True,
+        unique_fields=['organization', 'student'],
+        update_fields=['is_approved', 'role', 'updated_at'],
+    )
+    apply_counter_deltas(combine_counter_deltas(changes))
+    touched = [member.student_id for member in members]
+    transaction.on_commit(lambda: [invalidate_membership(organization.pk, user_id) for user_id in touched])
+    publish_organization_event(organization.pk, 'membership', {
+        'change': 'bulk',
+        'operation': 'import',
+        'count': len(members),
+    })
+    return len(members)
@@ -1,3 +1,331 @@
-from django.test import TestCase
+import io
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from SOAR.querybudget import QueryRecorder
+from organization.models import Organization, OrganizationMember, Program, ROLE_LEADER, ROLE_MEMBER
+from .auth_client import AuthError, AuthUnavailable, SupabaseAuthClient
+from .models import User
+from .roster import import_roster
+
+USER = {"id": "5f0c6a4e-0000-4000-8000-000000000001", "email": "juan.delacruz@cit.edu",
+        "email_confirmed_at": "2025-01-01T00:00:00Z"}
+
+
+class StandIn:
+    """A local GoTrue stand-in: answers with ``respond(request)`` and counts requests."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = 0
+
+    def __call__(self, request):
+        self.requests += 1
+        return self.respond(request)
+
+
+def ok(request):
+    return httpx.Response(200, json={"access_token": "token", "user": USER})
+
+
+class SupabaseAuthClientTests(SimpleTestCase):
+    def client_for(self, respond, **options):
+        stand_in = StandIn(respond)
+        options = {"failure_threshold": 2, "reset_timeout": 60.0, "acquire_timeout": 0.05, **options}
+        client = SupabaseAuthClient("http://auth.test", "key", transport=httpx.MockTransport(stand_in), **options)
+        self.addCleanup(client.close)
+        return client, stand_in
+
+    def sign_in(self, client):
+        return client.sign_in_with_password("juan.delacruz@cit.edu", "secret")
+
+    def test_sign_in_returns_the_user(self):
+        client, _ = self.client_for(ok)
+        self.assertEqual(self.sign_in(client).user.id, USER["id"])
+        self.assertEqual(client.metrics.snapshot()["sign_in"]["ok"], 1)
+
+    def test_rejection_is_an_auth_error_and_keeps_the_breaker_closed(self):
+        client, _ = self.client_for(lambda request: httpx.Response(400, json={"msg": "Invalid login credentials"}))
+        for _ in range(3):
+            with self.assertRaisesMessage(AuthError, "Invalid login credentials"):
+                self.sign_in(client)
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_timeout_is_unavailable(self):
+        def timeout(request):
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        client, _ = self.client_for(timeout)
+        with self.assertRaises(AuthUnavailable):
+            self.sign_in(client)
+        self.assertEqual(client.metrics.snapshot()["sign_in"]["unavailable"], 1)
+
+    def test_breaker_opens_and_short_circuits(self):
+        client, stand_in = self.client_for(lambda request: httpx.Response(503))
+        for _ in range(2):
+            with self.assertRaises(AuthUnavailable):
+                self.sign_in(client)
+        self.assertEqual(client.breaker.state, "open")
+        with self.assertRaises(AuthUnavailable):
+            self.sign_in(client)
+        self.assertEqual(stand_in.requests, 2)
+        self.assertEqual(client.metrics.snapshot()["sign_in"]["short_circuited"], 1)
+
+    def trip(self, client):
+        for _ in range(client.breaker.failure_threshold):
+            client.breaker.record_failure()
+        client.breaker._opened_at -= client.breaker.reset_timeout
+        self.assertEqual(client.breaker.state, "half-open")
+
+    def test_half_open_lets_one_probe_through(self):
+        release, entered = threading.Event(), threading.Event()
+
+        def slow_ok(request):
+            entered.set()
+            release.wait(5)
+            return ok(request)
+
+        client, stand_in = self.client_for(slow_ok)
+        self.trip(client)
+        probe = threading.Thread(target=self.sign_in, args=(client,))
+        probe.start()
+        self.assertTrue(entered.wait(5))
+        # While the probe is in flight everyone else is turned away.
+        with self.assertRaises(AuthUnavailable):
+            self.sign_in(client)
+        release.set()
+        probe.join(5)
+        self.assertEqual(stand_in.requests, 1)
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_failed_probe_reopens_the_breaker(self):
+        client, _ = self.client_for(lambda request: httpx.Response(502))
+        self.trip(client)
+        with self.assertRaises(AuthUnavailable):
+            self.sign_in(client)
+        self.assertEqual(client.breaker.state, "open")
+
+    def test_concurrency_limit_fails_fast(self):
+        release, entered = threading.Event(), threading.Event()
+
+        def slow_ok(request):
+            entered.set()
+            release.wait(5)
+            return ok(request)
+
+        client, stand_in = self.client_for(slow_ok, max_concurrency=1)
+        holder = threading.Thread(target=self.sign_in, args=(client,))
+        holder.start()
+        self.assertTrue(entered.wait(5))
+        started = time.monotonic()
+        with self.assertRaises(AuthUnavailable):
+            self.sign_in(client)
+        self.assertLess(time.monotonic() - started, 1)
+        release.set()
+        holder.join(5)
+        self.assertEqual(stand_in.requests, 1)
+        # The slot is free again.
+        self.assertEqual(self.sign_in(client).user.id, USER["id"])
+
+    def test_no_free_slot_does_not_use_up_the_half_open_probe(self):
+        client, stand_in = self.client_for(ok, max_concurrency=1)
+        self.trip(client)
+        client._slots.acquire()
+        with self.assertRaises(AuthUnavailable):
+            self.sign_in(client)
+        client._slots.release()
+        # The probe is still available, succeeds and closes the breaker.
+        self.assertEqual(self.sign_in(client).user.id, USER["id"])
+        self.assertEqual(client.breaker.state, "closed")
+        self.assertEqual(stand_in.requests, 1)
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True)
+class DashboardQueryTests(TestCase):
+    """The dashboard's query count is the same for 1 organization and for many."""
+
+    def setUp(self):
+        cache.clear()
+        self.program = Program.objects.create(abbreviation='BSCS', name='BS in Computer Science')
+        self.student = User.objects.create(username='student', email='student@cit.edu',
+                                           student_id='00-0000-001', course=self.program.name)
+        self.client.force_login(self.student)
+        self.add_organizations(1)
+
+    def add_organizations(self, count):
+        start = Organization.objects.count()
+        for i in range(start, start + count):
+            org = Organization.objects.create(name=f'Org {i:03d}', description='An organization.', is_public=i % 3 != 0)
+            if not org.is_public:
+                org.allowed_programs.add(self.program)
+            if i % 2 == 0:
+                OrganizationMember.objects.create(organization=org, student=self.student, role=ROLE_MEMBER,
+                                                  is_approved=i % 4 == 0)
+            leader = User.objects.create(username=f'leader{i}', email=f'leader{i}@cit.edu',
+                                         student_id=f'00-0001-{i:03d}')
+            OrganizationMember.objects.create(organization=org, student=leader, role=ROLE_LEADER, is_approved=True)
+
+    def dashboard_queries(self):
+        # Not assertNumQueries: the test client's request_started resets connection.queries.
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.client.get('/accounts/index/')
+        self.assertEqual(response.status_code, 200)
+        return len(recorder)
+
+    def test_query_count_is_independent_of_organization_count(self):
+        baseline = self.dashboard_queries()
+        # Session, user, and the single annotated organizations query (index's @query_budget(1)).
+        self.assertEqual(baseline, 3)
+        self.add_organizations(25)
+        self.assertEqual(self.dashboard_queries(), baseline)
+
+
+ROSTER = """student_id,email,first_name,last_name,course,year_level,role
+12-0000-001,ana.santos@cit.edu,Ana,Santos,BS in Computer Science,1,
+12-0000-002,ben.reyes@cit.edu,Ben,Reyes,BS in Computer Science,2,officer
+12-0000-003,carla.cruz@cit.edu,Carla,Cruz,,3,
+12-0000-004,dan.lim@cit.edu,Dan,Lim,,4,
+12-0000-005,eve.tan@cit.edu,Eve,Tan,,,
+"""
+
+
+class RosterImportTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='Chess Club', description='Chess.')
+
+    def run_import(self, text, **options):
+        return import_roster(io.StringIO(text), **options)
+
+    def test_imports_in_batches(self):
+        report = self.run_import(ROSTER, batch_size=2)
+        self.assertEqual((report.rows, report.imported, report.error_count), (5, 5, 0))
+        ana = User.objects.get(student_id='12-0000-001')
+        self.assertEqual((ana.username, ana.first_name, ana.year_level), ('ana.santos', 'Ana', 1))
+        self.assertTrue(ana.roster_imported)
+        self.assertFalse(ana.has_usable_password())
+
+    def test_row_errors_are_reported_with_line_numbers(self):
+        report = self.run_import(ROSTER + "bad-id,not-an-email,X,Y,,zero,\n")
+        self.assertEqual(report.imported, 5)
+        [(line, student_id, message)] = report.errors
+        self.assertEqual((line, student_id), (7, 'bad-id'))
+        self.assertIn('Student ID', message)
+
+    def test_username_conflicts_are_rejected(self):
+        User.objects.create(username='ana.santos', email='someone.else@cit.edu', student_id='99-0000-001')
+        twice = "12-0000-009,eve.tan@cit.edu,Eve,Again,,,\n"
+        report = self.run_import(ROSTER + twice)
+        self.assertEqual(report.imported, 4)
+        self.assertEqual(sorted(message for _, _, message in report.errors), [
+            "Username 'ana.santos' already belongs to another account.",
+            "Username 'eve.tan' is used by another row in this file.",
+        ])
+
+    def test_memberships_and_counters(self):
+        report = self.run_import(ROSTER, organization=self.org, batch_size=2)
+        self.assertEqual(report.memberships, 5)
+        self.org.refresh_from_db()
+        self.assertEqual((self.org.approved_count, self.org.role_member_count, self.org.role_officer_count), (5, 4, 1))
+
+        # Re-importing keeps roles the file doesn't name, and doesn't count anyone twice.
+        report = self.run_import(ROSTER.replace(',officer', ','), organization=self.org)
+        self.assertEqual(report.memberships, 0)
+        self.org.refresh_from_db()
+        self.assertEqual((self.org.approved_count, self.org.role_officer_count), (5, 1))
+
+    def test_pending_memberships_are_approved_by_a_later_import(self):
+        self.run_import(ROSTER, organization=self.org, approve=False)
+        self.org.refresh_from_db()
+        self.assertEqual((self.org.approved_count, self.org.pending_count), (0, 5))
+        self.run_import(ROSTER, organization=self.org)
+        self.org.refresh_from_db()
+        self.assertEqual((self.org.approved_count, self.org.pending_count), (5, 0))
+
+    def test_dry_run_writes_nothing(self):
+        report = self.run_import(ROSTER, organization=self.org, dry_run=True)
+        self.assertEqual(report.imported, 5)
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(OrganizationMember.objects.exists())
+
+
+class RosterClaimTests(TestCase):
+    """Registering or signing in with a roster import's e-mail only claims it after a confirmed sign-in."""
+
+    AUTH_ID = '5f0c6a4e-0000-4000-8000-0000000000aa'
+
+    def setUp(self):
+        import_roster(io.StringIO(ROSTER))
+        self.ana = User.objects.get(student_id='12-0000-001')
+        self.auth = {'confirmed': True}
+
+    def respond(self, request):
+        user = {'id': self.AUTH_ID, 'email': 'ana.santos@cit.edu',
+                'email_confirmed_at': '2025-01-01T00:00:00Z' if self.auth['confirmed'] else None}
+        return httpx.Response(200, json={'access_token': 'token', 'user': user})
+
+    def auth_client(self):
+        client = SupabaseAuthClient('http://auth.test', 'key', transport=httpx.MockTransport(self.respond))
+        self.addCleanup(client.close)
+        return mock.patch('accounts.views.get_auth_client', return_value=client)
+
+    def register(self, **overrides):
+        data = {'username': 'attacker', 'first_name': 'Mallory', 'last_name': 'X', 'email': 'ana.santos@cit.edu',
+                'student_id': '12-0000-001', 'course': 'BS in Computer Science', 'year_level': 4,
+                'password1': 'Zebra!Lamp93', 'password2': 'Zebra!Lamp93', **overrides}
+        with self.auth_client():
+            return self.client.post('/accounts/register/', data)
+
+    def sign_in(self):
+        with self.auth_client():
+            return self.client.post('/accounts/login/', {'username': 'ana.santos', 'password': 'secret'})
+
+    def test_registering_does_not_touch_the_import(self):
+        self.auth['confirmed'] = False
+        self.assertRedirects(self.register(), '/accounts/login/', fetch_redirect_response=False)
+        self.ana.refresh_from_db()
+        self.assertEqual((self.ana.username, self.ana.first_name, self.ana.year_level), ('ana.santos', 'Ana', 1))
+        self.assertTrue(self.ana.is_active)
+        self.assertTrue(self.ana.roster_imported)
+
+    def test_confirmed_sign_in_claims_the_import(self):
+        self.assertRedirects(self.sign_in(), '/accounts/index/', fetch_redirect_response=False)
+        self.ana.refresh_from_db()
+        self.assertFalse(self.ana.roster_imported)
+        self.assertEqual(str(self.ana.auth_user_id), self.AUTH_ID)
+        self.assertEqual(str(self.client.session['_auth_user_id']), str(self.ana.pk))
+        # Later sign-ins find the account through the linked id.
+        self.client.logout()
+        self.sign_in()
+        self.assertEqual(str(self.client.session['_auth_user_id']), str(self.ana.pk))
+        self.assertEqual(User.objects.filter(email='ana.santos@cit.edu').count(), 1)
+
+    def test_unconfirmed_sign_in_claims_nothing(self):
+        self.auth['confirmed'] = False
+        self.sign_in()
+        self.ana.refresh_from_db()
+        self.assertTrue(self.ana.roster_imported)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_accounts_in_use_are_not_claimable(self):
+        User.objects.filter(pk=self.ana.pk).update(roster_imported=False)
+        response = self.register()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('student_id', response.context['form'].errors)
+
+        self.sign_in()
+        self.assertNotIn('_auth_user_id', self.client.session)
+        self.ana.refresh_from_db()
+        self.assertIsNone(self.ana.auth_user_id)
+
+    def test_an_account_that_has_logged_in_is_not_claimable(self):
+        self.ana.set_password('Hunter!2pass')
+        self.ana.save()
+        self.sign_in()
+        self.assertNotIn('_auth_user_id', self.client.session)
@@ -16,4 +16,7 @@ urlpatterns = [
 
     # Join organization
     path('join_org/<uuid:org_id>/', views.join_org, name='join_org'),
+
+    # Operations
+    path('ops/metrics/', views.service_metrics, name='service_metrics'),
 ]
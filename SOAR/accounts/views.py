@@ -3,27 +3,35 @@ from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from .forms import StudentRegistrationForm, CustomLoginForm, UserProfileForm
-from .models import User
-from supabase import create_client
-from decouple import config
-from django.core.exceptions import ImproperlyConfigured
-from organization.models import Organization, OrganizationMember, ROLE_MEMBER, Program
+from .models import User, account_for_auth_user
+from .roster import claim_imported_account, unclaimed_import
+from .auth_client import AuthUnavailable, existing_auth_client, get_auth_client
+from organization.models import Organization, OrganizationMember, ROLE_MEMBER
+from organization.eligibility import can_join, can_join_expression
+from organization.reference import programs
+from organization.roles import get_membership, is_officer_or_leader
 from django.views.decorators.http import require_http_methods, require_POST
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.db import connections
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
+from SOAR.querybudget import query_budget
 
 @login_required
+@query_budget(1)
 def index(request):
-    user_orgs = Organization.objects.filter(members__student=request.user, members__is_approved=True)
-    org_data = []
-    for org in user_orgs:
-        org_data.append({
-            "org": org,
-            "member_count": org.members.filter(is_approved=True).count()
-        })
-
-    all_orgs = Organization.objects.all()
+    # One query: every org with the user's membership state; counts come from the counters.
+    membership = OrganizationMember.objects.filter(organization=OuterRef('pk'), student=request.user)
+    all_orgs = list(
+        Organization.objects.annotate(
+            is_member=Exists(membership.filter(is_approved=True)),
+            is_pending=Exists(membership.filter(is_approved=False)),
+            can_join=can_join_expression(request.user),
+        ).order_by('name')
+    )
+    user_orgs = [org for org in all_orgs if org.is_member]
     return render(request, "accounts/index.html", {
-        "org_data": org_data,
         "all_orgs": all_orgs,
         "user_orgs": user_orgs,
     })
@@ -51,16 +59,6 @@ def profile(request):
 def members_management(request):
     return render(request, "accounts/members_management.html")
 
-SUPABASE_URL = config("SUPABASE_URL", default=None)
-SUPABASE_KEY = config("SUPABASE_KEY", default=None)
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ImproperlyConfigured(
-        "Supabase credentials are not configured. Set SUPABASE_URL and SUPABASE_KEY in your environment/.env."
-    )
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 def register(request):
     if request.method == "POST":
         form = StudentRegistrationForm(request.POST)
@@ -70,10 +68,10 @@ def register(request):
             username = email.split("@")[0]
 
             try:
-                response = supabase.auth.sign_up({
-                    "email": email,
-                    "password": password
-                })
+                response = get_auth_client().sign_up(email=email, password=password)
+            except AuthUnavailable as e:
+                messages.error(request, str(e))
+                return render(request, "accounts/register.html", {"form": form})
             except Exception as e:
                 messages.error(request, f"Supabase registration failed: {e}")
                 return render(request, "accounts/register.html", {"form": form})
@@ -81,23 +79,28 @@ def register(request):
             if getattr(response, "user", None):
                 supa_user_id = response.user.id
                 cd = form.cleaned_data
-                try:
-                    user_obj = User.objects.get(pk=supa_user_id)
-                    user_obj.username = cd.get("username") or user_obj.username
-                    user_obj.email = email
-                    user_obj.first_name = cd.get("first_name") or user_obj.first_name
-                    user_obj.last_name = cd.get("last_name") or user_obj.last_name
-                    user_obj.student_id = cd.get("student_id") or user_obj.student_id
-                    user_obj.course = cd.get("course") or user_obj.course
-                    user_obj.year_level = cd.get("year_level") or user_obj.year_level
-                except User.DoesNotExist:
-                    user_obj = form.save(commit=False)
-                    user_obj.id = supa_user_id
-                    user_obj.email = email
-
-                user_obj.is_active = False
-                user_obj.set_unusable_password()
-                user_obj.save()
+                user_obj = account_for_auth_user(supa_user_id)
+                if user_obj is None and form.imported_account() is not None:
+                    # A roster import: left untouched until the student confirms the e-mail
+                    # and signs in, so registering can't rewrite or lock someone else's account.
+                    pass
+                else:
+                    if user_obj is not None:
+                        user_obj.username = cd.get("username") or user_obj.username
+                        user_obj.email = email
+                        user_obj.first_name = cd.get("first_name") or user_obj.first_name
+                        user_obj.last_name = cd.get("last_name") or user_obj.last_name
+                        user_obj.student_id = cd.get("student_id") or user_obj.student_id
+                        user_obj.course = cd.get("course") or user_obj.course
+                        user_obj.year_level = cd.get("year_level") or user_obj.year_level
+                    else:
+                        user_obj = form.save(commit=False)
+                        user_obj.id = supa_user_id
+                        user_obj.email = email
+
+                    user_obj.is_active = False
+                    user_obj.set_unusable_password()
+                    user_obj.save()
 
                 messages.success(
                     request,
@@ -130,18 +133,24 @@ def login_view(request):
             email = username if username and '@' in username else f"{username}@cit.edu"
 
             try:
-                response = supabase.auth.sign_in_with_password({
-                    "email": email,
-                    "password": password
-                })
+                response = get_auth_client().sign_in_with_password(email=email, password=password)
 
                 if getattr(response, "user", None):
                     if not response.user.email_confirmed_at:
                         messages.warning(request, "Please verify your email before logging in.")
                     else:
-                        try:
-                            user_obj = User.objects.get(pk=response.user.id)
-                        except User.DoesNotExist:
+                        user_obj = account_for_auth_user(response.user.id)
+                        imported = None if user_obj else unclaimed_import(email)
+                        if imported is not None:
+                            # Confirmed e-mail, first sign-in: claim the roster import (it keeps its own id).
+                            user_obj = imported
+                            claim_imported_account(user_obj, response.user.id)
+                        elif user_obj is None and User.objects.filter(username=email.split("@")[0]).exists():
+                            # Somebody's existing account: never linked on an e-mail match alone.
+                            messages.error(request, "An account with this username already exists. "
+                                                    "Please contact an administrator.")
+                            return render(request, "accounts/login.html", {"form": form})
+                        elif user_obj is None:
                             user_obj = User(
                                 id=response.user.id,
                                 username=email.split("@")[0],
@@ -161,6 +170,8 @@ def login_view(request):
                 else:
                     messages.error(request, "Invalid login credentials.")
 
+            except AuthUnavailable as e:
+                messages.error(request, str(e))
             except Exception as e:
                 messages.error(request, f"Login failed: {e}")
     else:
@@ -182,8 +193,10 @@ def organization_view(request):
 @require_POST
 def join_org(request, org_id):
     organization = get_object_or_404(Organization, id=org_id)
-    already_member = OrganizationMember.objects.filter(organization=organization, student=request.user).exists()
-    if not already_member:
+    already_member = get_membership(request.user, organization, request) is not None
+    if not already_member and not can_join(request.user, organization):
+        messages.error(request, f"You are not eligible to join {organization.name}.")
+    elif not already_member:
         OrganizationMember.objects.create(
             organization=organization,
             student=request.user,
@@ -200,19 +213,41 @@ def org_overview(request, org_id):
     organization = get_object_or_404(Organization, id=org_id)
     allowed_programs = organization.allowed_programs.all()
     user_program = getattr(request.user, 'course', None)
-    can_join = organization.is_public or allowed_programs.filter(name=user_program).exists()
     # Check if user is org officer or leader
-    is_org_officer_or_leader = False
-    try:
-        member = OrganizationMember.objects.get(organization=organization, student=request.user)
-        is_org_officer_or_leader = member.role in ["officer", "leader"]
-    except OrganizationMember.DoesNotExist:
-        is_org_officer_or_leader = False
+    is_org_officer_or_leader = is_officer_or_leader(request.user, organization, request)
     return render(request, 'organization/organization_profile.html', {
         'organization': organization,
-        'programs': Program.objects.all(),
-        'can_join': can_join,
+        'programs': programs(),
+        'can_join': can_join(request.user, organization),
         'user_program': user_program,
         'allowed_programs': allowed_programs,
         'is_org_officer_or_leader': is_org_officer_or_leader,
-    })
\ No newline at end of file
+    })
+
+
+def _database_metrics():
+    stats = {}
+    for conn in connections.all(initialized_only=True):
+        info = {
+            "vendor": conn.vendor,
+            "conn_max_age": conn.settings_dict.get("CONN_MAX_AGE"),
+            "health_checks": conn.settings_dict.get("CONN_HEALTH_CHECKS"),
+        }
+        pool = getattr(conn, "pool", None)
+        if pool is not None:
+            info["pool"] = pool.get_stats()
+        stats[conn.alias] = info
+    return stats
+
+
+@staff_member_required
+def service_metrics(request):
+    """Per-process counters for external services (JSON, staff only)."""
+    auth_client = existing_auth_client()
+    return JsonResponse({
+        "auth": {
+            "circuit": auth_client.breaker.state,
+            "operations": auth_client.metrics.snapshot(),
+        } if auth_client else None,
+        "database": _database_metrics(),
+    })
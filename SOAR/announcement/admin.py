@@ -1,3 +1,16 @@
 from django.contrib import admin
+from .models import Announcement
 
-# Register your models here.
+
+@admin.register(Announcement)
+class AnnouncementAdmin(admin.ModelAdmin):
+    list_display = ('title', 'organization', 'author', 'fanned_out', 'created_at')
+    list_filter = ('fanned_out', 'organization')
+    search_fields = ('title',)
+    raw_id_fields = ('author',)
+    ordering = ('-id',)
+
+    def delete_queryset(self, request, queryset):
+        # One by one so Announcement.delete() can adjust the inbox counters.
+        for announcement in queryset:
+            announcement.delete()
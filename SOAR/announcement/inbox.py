@@ -0,0 +1,218 @@
+"""Announcement delivery: fan-out on write, with a read-time merge for large orgs.
+
+Posting to an organization with fewer than ANNOUNCEMENT_FANOUT_LIMIT approved
+members queues ``fan_out_announcement``. The task writes one InboxEntry per
+member and bumps each member's InboxState.unread_count. Larger organizations
+skip the fan-out. Their announcements get the next ``seq`` in the
+organization's feed, and ``inbox_page`` merges them into each member's
+inbox at read time.
+
+Unread totals never COUNT rows:
+
+    InboxState.unread_count + sum(feed.seq - marker.seen_seq for each large org)
+
+Read state for merged announcements is a "read up to" marker per user and
+feed. A user's marker is created the first time the feed is seen, at the last
+announcement posted before they joined the organization, so joining a large
+organization does not dump its history into the unread count and nothing
+posted since they joined is skipped.
+"""
+import heapq
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Greatest
+
+from organization.roles import approved_org_ids
+from realtime.publish import publish_organization_event
+from .models import Announcement, FeedReadMarker, InboxEntry, InboxState, OrganizationFeed
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def post_announcement(organization, author, title, body):
+    """Create an announcement and deliver it (fan-out queued on commit, or feed sequence)."""
+    from .tasks import fan_out_announcement
+
+    with transaction.atomic():
+        if organization.approved_count < settings.ANNOUNCEMENT_FANOUT_LIMIT:
+            announcement = Announcement.objects.create(
+                organization=organization, author=author, title=title, body=body, fanned_out=True,
+            )
+            fan_out_announcement.enqueue(announcement.pk)
+        else:
+            OrganizationFeed.objects.get_or_create(organization=organization)
+            feed = OrganizationFeed.objects.select_for_update().get(organization=organization)
+            feed.seq += 1
+            feed.save(update_fields=['seq'])
+            announcement = Announcement.objects.create(
+                organization=organization, author=author, title=title, body=body,
+                fanned_out=False, seq=feed.seq,
+            )
+        publish_organization_event(organization.pk, 'announcement', {
+            'id': announcement.pk,
+            'title': announcement.title,
+            'author': getattr(author, 'username', None),
+        })
+    return announcement
+
+
+def fan_out_announcement_to_members(announcement_id):
+    """Write inbox entries for every approved member, in batches. Safe to retry."""
+    from organization.models import OrganizationMember
+
+    announcement = Announcement.objects.filter(pk=announcement_id).only('pk', 'organization_id').first()
+    if announcement is None:
+        return
+    members = (
+        OrganizationMember.objects.filter(organization_id=announcement.organization_id, is_approved=True)
+        .order_by('student_id')
+        .values_list('student_id', flat=True)
+    )
+    last = None
+    while True:
+        batch_query = members if last is None else members.filter(student_id__gt=last)
+        batch = list(batch_query[:FANOUT_BATCH_SIZE])
+        if not batch:
+            break
+        last = batch[-1]
+        with transaction.atomic():
+            delivered = set(
+                InboxEntry.objects.filter(announcement_id=announcement.pk, user_id__in=batch)
+                .values_list('user_id', flat=True)
+            )
+            fresh = [user_id for user_id in batch if user_id not in delivered]
+            if not fresh:
+                continue
+            InboxEntry.objects.bulk_create(
+                [InboxEntry(user_id=user_id, announcement_id=announcement.pk) for user_id in fresh],
+                ignore_conflicts=True,
+            )
+            InboxState.objects.bulk_create([InboxState(user_id=user_id) for user_id in fresh], ignore_conflicts=True)
+            InboxState.objects.filter(user_id__in=fresh).update(unread_count=F('unread_count') + 1)
+
+
+def forget_announcement(announcement):
+    """Take an announcement's unread inbox entries out of the counters before it is deleted."""
+    unread = list(
+        InboxEntry.objects.filter(announcement=announcement, is_read=False).values_list('user_id', flat=True)
+    )
+    if unread:
+        InboxState.objects.filter(user_id__in=unread).update(
+            unread_count=Greatest(F('unread_count') - 1, Value(0))
+        )
+
+
+def _feed_positions(user, org_ids):
+    """{org_id: (feed_seq, seen_seq)} for the user's large orgs; creates missing markers at the join point."""
+    feeds = dict(OrganizationFeed.objects.filter(organization_id__in=org_ids).values_list('organization_id', 'seq'))
+    if not feeds:
+        return {}
+    seen = dict(
+        FeedReadMarker.objects.filter(user=user, feed_id__in=feeds).values_list('feed_id', 'seen_seq')
+    )
+    missing = [org_id for org_id in feeds if org_id not in seen]
+    if missing:
+        from organization.models import OrganizationMember
+
+        joined = OrganizationMember.objects.filter(
+            student=user, organization_id=OuterRef('organization_id'),
+        ).values('date_joined')[:1]
+        before_joining = dict(
+            Announcement.objects.filter(
+                fanned_out=False, organization_id__in=missing, created_at__lt=Subquery(joined),
+            ).values('organization_id').annotate(last_seq=Max('seq')).values_list('organization_id', 'last_seq')
+        )
+        starts = {org_id: before_joining.get(org_id) or 0 for org_id in missing}
+        FeedReadMarker.objects.bulk_create(
+            [FeedReadMarker(user=user, feed_id=org_id, seen_seq=seq) for org_id, seq in starts.items()],
+            ignore_conflicts=True,
+        )
+        seen.update(starts)
+    return {str(org_id): (seq, seen[org_id]) for org_id, seq in feeds.items()}
+
+
+def unread_count(user, request=None):
+    state = InboxState.objects.filter(user=user).values_list('unread_count', flat=True).first() or 0
+    positions = _feed_positions(user, approved_org_ids(user, request))
+    return state + sum(max(seq - seen_seq, 0) for seq, seen_seq in positions.values())
+
+
+def inbox_page(user, before=None, limit=20, request=None):
+    """Newest-first page of the user's inbox: [(announcement, is_read)], next ``before`` cursor or None."""
+    entries = InboxEntry.objects.filter(user=user).select_related('announcement__organization', 'announcement__author')
+    if before is not None:
+        entries = entries.filter(announcement_id__lt=before)
+    delivered = [
+        (entry.announcement, entry.is_read)
+        for entry in entries.order_by('-announcement_id')[:limit + 1]
+    ]
+
+    org_ids = approved_org_ids(user, request)
+    merged = []
+    if org_ids:
+        large = Announcement.objects.filter(fanned_out=False, organization_id__in=org_ids).select_related(
+            'organization', 'author'
+        )
+        if before is not None:
+            large = large.filter(id__lt=before)
+        large = list(large.order_by('-id')[:limit + 1])
+        if large:
+            positions = _feed_positions(user, {a.organization_id for a in large})
+            merged = [(a, a.seq <= positions[str(a.organization_id)][1]) for a in large]
+
+    page = list(heapq.merge(delivered, merged, key=lambda item: item[0].pk, reverse=True))[:limit + 1]
+    next_before = page[limit - 1][0].pk if len(page) > limit else None
+    return page[:limit], next_before
+
+
+def mark_read(user, announcement_ids=None):
+    """Mark announcements (or everything, when ``announcement_ids`` is None) as read."""
+    with transaction.atomic():
+        entries = InboxEntry.objects.filter(user=user, is_read=False)
+        if announcement_ids is not None:
+            entries = entries.filter(announcement_id__in=announcement_ids)
+        changed = entries.update(is_read=True)
+        if changed:
+            InboxState.objects.filter(user=user).update(
+                unread_count=Greatest(F('unread_count') - changed, Value(0))
+            )
+
+        # Large orgs: advance the "read up to" markers.
+        org_ids = approved_org_ids(user)
+        if announcement_ids is None:
+            targets = dict(
+                OrganizationFeed.objects.filter(organization_id__in=org_ids).values_list('organization_id', 'seq')
+            )
+        else:
+            targets = dict(
+                Announcement.objects.filter(fanned_out=False, organization_id__in=org_ids, pk__in=announcement_ids)
+                .values('organization_id').annotate(last_seq=Max('seq')).values_list('organization_id', 'last_seq')
+            )
+        if targets:
+            _feed_positions(user, list(targets))
+        for org_id, seq in targets.items():
+            FeedReadMarker.objects.filter(user=user, feed_id=org_id, seen_seq__lt=seq).update(seen_seq=seq)
+    return changed
+
+
+def reconcile_inbox_counters(batch_size=1000):
+    """Recompute InboxState.unread_count from the entries. Returns how many rows were corrected."""
+    fixed = 0
+    user_ids = list(InboxState.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        actual = dict(
+            InboxEntry.objects.filter(user_id__in=batch, is_read=False)
+            .values('user_id').annotate(n=Count('pk')).values_list('user_id', 'n')
+        )
+        stale = [
+            state for state in InboxState.objects.filter(pk__in=batch)
+            if state.unread_count != actual.get(state.pk, 0)
+        ]
+        for state in stale:
+            state.unread_count = actual.get(state.pk, 0)
+        InboxState.objects.bulk_update(stale, ['unread_count'])
+        fixed += len(stale)
+    return fixed
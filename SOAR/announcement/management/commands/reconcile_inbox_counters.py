@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from announcement.inbox import reconcile_inbox_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the maintained unread counters of announcement inboxes in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = reconcile_inbox_counters(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled inbox counters; {fixed} user(s) corrected."))
@@ -1,3 +1,80 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+from organization.models import Organization
+
+
+class Announcement(models.Model):
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="announcements")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="announcements"
+    )
+    title = models.CharField(max_length=255)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    # True: copied into every member's inbox. False (large orgs): merged in at read time,
+    # with ``seq`` numbering it within the organization's feed for read markers.
+    fanned_out = models.BooleanField(default=True)
+    seq = models.PositiveBigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['organization', '-id'], name='announcement_org_idx'),
+            models.Index(
+                fields=['organization', '-id'], name='announcement_merged_idx', condition=Q(fanned_out=False),
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def delete(self, *args, **kwargs):
+        from .inbox import forget_announcement
+
+        forget_announcement(self)
+        return super().delete(*args, **kwargs)
+
+
+class InboxEntry(models.Model):
+    """A fanned-out announcement in one user's inbox."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="inbox_entries")
+    announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name="inbox_entries")
+    is_read = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            # Also the (user, announcement DESC) index the inbox is paginated on.
+            models.UniqueConstraint(fields=['user', 'announcement'], name='inbox_user_announcement_uniq'),
+        ]
+
+
+class InboxState(models.Model):
+    """Maintained unread counter for a user's fanned-out entries."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="inbox_state"
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+
+
+class OrganizationFeed(models.Model):
+    """Sequence of a large organization's read-time-merged announcements."""
+    organization = models.OneToOneField(
+        Organization, on_delete=models.CASCADE, primary_key=True, related_name="announcement_feed"
+    )
+    seq = models.PositiveBigIntegerField(default=0)
+
+
+class FeedReadMarker(models.Model):
+    """How far a user has read a large organization's feed; unread = feed.seq - seen_seq."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="feed_markers")
+    feed = models.ForeignKey(OrganizationFeed, on_delete=models.CASCADE, related_name="markers")
+    seen_seq = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'feed'], name='feed_marker_user_feed_uniq'),
+        ]
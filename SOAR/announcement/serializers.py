@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+from .models import Announcement
+
+
+class AnnouncementSerializer(serializers.ModelSerializer):
+    organization_name = serializers.CharField(source='organization.name', read_only=True)
+    author_username = serializers.CharField(source='author.username', read_only=True, default=None)
+
+    class Meta:
+        model = Announcement
+        fields = ['id', 'organization', 'organization_name', 'author', 'author_username', 'title', 'body', 'created_at']
+        read_only_fields = ['author', 'created_at']
+
+
+class InboxItemSerializer(AnnouncementSerializer):
+    is_read = serializers.SerializerMethodField()
+
+    class Meta(AnnouncementSerializer.Meta):
+        fields = AnnouncementSerializer.Meta.fields + ['is_read']
+
+    def get_is_read(self, obj):
+        return obj.is_read
@@ -0,0 +1,8 @@
+from taskqueue.queue import task
+
+from .inbox import fan_out_announcement_to_members
+
+
+@task
+def fan_out_announcement(announcement_id):
+    fan_out_announcement_to_members(announcement_id)
@@ -1,3 +1,133 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from organization.models import Organization, OrganizationMember, ROLE_MEMBER, ROLE_OFFICER
+from .inbox import (
+    fan_out_announcement_to_members, inbox_page, mark_read, post_announcement, reconcile_inbox_counters,
+    unread_count,
+)
+from .models import InboxEntry
+
+User = get_user_model()
+
+
+class AnnouncementListTests(TestCase):
+    def setUp(self):
+        self.officer = User.objects.create(username='officer', email='officer@cit.edu', student_id='00-0000-001')
+        self.org = Organization.objects.create(name='Chess Club', description='Chess.')
+        OrganizationMember.objects.create(organization=self.org, student=self.officer, role=ROLE_OFFICER,
+                                          is_approved=True)
+        post_announcement(self.org, self.officer, 'Tournament', 'Saturday at 9.')
+        self.client.force_login(self.officer)
+
+    def test_organization_filter(self):
+        response = self.client.get('/announcement/announcements/', {'organization': str(self.org.pk)})
+        self.assertEqual([row['title'] for row in response.json()['results']], ['Tournament'])
+
+    def test_malformed_organization_is_a_bad_request(self):
+        response = self.client.get('/announcement/announcements/', {'organization': 'chess-club'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('organization', response.json())
+
+
+@override_settings(TASK_QUEUE_EAGER=True, ANNOUNCEMENT_FANOUT_LIMIT=3)
+class InboxTests(TestCase):
+    """Chess Club (2 members) is fanned out to; Debate Society (3 members) is merged at read time."""
+
+    def setUp(self):
+        self.officer = User.objects.create(username='officer', email='officer@cit.edu', student_id='00-0000-001')
+        self.member = User.objects.create(username='member', email='member@cit.edu', student_id='00-0000-002')
+        self.debater = User.objects.create(username='debater', email='debater@cit.edu', student_id='00-0000-003')
+        self.chess = Organization.objects.create(name='Chess Club', description='Chess.')
+        self.debate = Organization.objects.create(name='Debate Society', description='Debate.')
+        for org, students in [(self.chess, [self.officer, self.member]),
+                              (self.debate, [self.officer, self.member, self.debater])]:
+            for student in students:
+                OrganizationMember.objects.create(
+                    organization=org, student=student, is_approved=True,
+                    role=ROLE_OFFICER if student == self.officer else ROLE_MEMBER,
+                )
+        for org in (self.chess, self.debate):
+            org.refresh_from_db()
+
+    def post(self, org, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return post_announcement(org, self.officer, title, 'Details.')
+
+    def test_small_org_fans_out_on_write(self):
+        announcement = self.post(self.chess, 'Tournament')
+        self.assertTrue(announcement.fanned_out)
+        self.assertEqual(
+            set(InboxEntry.objects.filter(announcement=announcement).values_list('user_id', flat=True)),
+            {self.officer.pk, self.member.pk},
+        )
+        self.assertEqual(unread_count(self.member), 1)
+        self.assertEqual(unread_count(self.debater), 0)
+
+        # A retried job delivers nothing twice.
+        fan_out_announcement_to_members(announcement.pk)
+        self.assertEqual(InboxEntry.objects.filter(announcement=announcement).count(), 2)
+        self.assertEqual(unread_count(self.member), 1)
+
+    def test_large_org_is_merged_at_read_time(self):
+        first = self.post(self.debate, 'Motion')
+        small = self.post(self.chess, 'Tournament')
+        last = self.post(self.debate, 'Finals')
+        self.assertEqual((first.fanned_out, first.seq, last.seq), (False, 1, 2))
+        self.assertFalse(InboxEntry.objects.filter(announcement__in=[first, last]).exists())
+
+        items, next_before = inbox_page(self.member)
+        self.assertEqual([(a.pk, is_read) for a, is_read in items],
+                         [(last.pk, False), (small.pk, False), (first.pk, False)])
+        self.assertIsNone(next_before)
+        self.assertEqual(unread_count(self.member), 3)
+
+        mark_read(self.member, [first.pk])
+        items, _ = inbox_page(self.member)
+        self.assertEqual([is_read for _, is_read in items], [False, False, True])
+        self.assertEqual(unread_count(self.member), 2)
+
+    def test_joining_a_large_org_does_not_count_its_history(self):
+        self.post(self.debate, 'Motion')
+        newcomer = User.objects.create(username='newcomer', email='newcomer@cit.edu', student_id='00-0000-004')
+        OrganizationMember.objects.create(organization=self.debate, student=newcomer, is_approved=True)
+        self.assertEqual(unread_count(newcomer), 0)
+        self.post(self.debate, 'Finals')
+        self.assertEqual(unread_count(newcomer), 1)
+
+    def test_inbox_cursor_pagination(self):
+        posted = [self.post(org, f'Notice {number}')
+                  for number, org in enumerate([self.chess, self.debate] * 3)]
+        self.client.force_login(self.member)
+        seen = []
+        url, params = '/announcement/announcements/inbox/', {'page_size': 4}
+        while url:
+            body = self.client.get(url, params).json()
+            self.assertLessEqual(len(body['results']), 4)
+            seen += [row['id'] for row in body['results']]
+            url, params = body['next'], None
+        self.assertEqual(seen, [a.pk for a in reversed(posted)])
+
+        response = self.client.get('/announcement/announcements/inbox/', {'before': 'latest'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unread_counter_stays_correct(self):
+        tournament = self.post(self.chess, 'Tournament')
+        schedule = self.post(self.chess, 'Schedule')
+        self.post(self.debate, 'Motion')
+        self.assertEqual(unread_count(self.member), 3)
+
+        mark_read(self.member, [tournament.pk])
+        mark_read(self.member, [tournament.pk])  # marking twice changes nothing
+        self.assertEqual(unread_count(self.member), 2)
+
+        schedule.delete()
+        self.assertEqual(unread_count(self.member), 1)
+        self.assertEqual(unread_count(self.officer), 2)
+        self.assertEqual(reconcile_inbox_counters(), 0)
+
+        self.client.force_login(self.member)
+        response = self.client.post('/announcement/announcements/mark-read/', {'all': True},
+                                    content_type='application/json')
+        self.assertEqual(response.json(), {'unread': 0})
+        self.assertEqual(unread_count(self.officer), 2)
@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'announcements', views.AnnouncementViewSet, basename='announcement')
+
+urlpatterns = router.urls
@@ -1,3 +1,98 @@
-from django.shortcuts import render
+import uuid
 
-# Create your views here.
+from django.conf import settings
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from organization.roles import approved_org_ids, is_admin, is_officer_or_leader
+from .inbox import inbox_page, mark_read, post_announcement, unread_count
+from .models import Announcement
+from .serializers import AnnouncementSerializer, InboxItemSerializer
+
+
+class AnnouncementCursorPagination(CursorPagination):
+    ordering = '-id'
+    page_size = settings.ANNOUNCEMENT_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+# ==============================
+# ANNOUNCEMENT VIEWSET
+# ==============================
+class AnnouncementViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                          mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Announcements of the user's organizations (``?organization=<id>`` to narrow), newest first."""
+    serializer_class = AnnouncementSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = AnnouncementCursorPagination
+
+    def get_queryset(self):
+        queryset = Announcement.objects.select_related('organization', 'author')
+        if not is_admin(self.request.user):
+            queryset = queryset.filter(organization_id__in=approved_org_ids(self.request.user, self.request))
+        organization = self.request.query_params.get('organization')
+        if organization:
+            try:
+                organization = uuid.UUID(organization)
+            except ValueError:
+                raise ValidationError({'organization': "Must be an organization id."})
+            queryset = queryset.filter(organization_id=organization)
+        return queryset
+
+    def _check_can_post(self, organization):
+        if not (is_admin(self.request.user) or is_officer_or_leader(self.request.user, organization, self.request)):
+            raise PermissionDenied("Only officers and leaders can post announcements.")
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        organization = serializer.validated_data['organization']
+        self._check_can_post(organization)
+        announcement = post_announcement(
+            organization, request.user, serializer.validated_data['title'], serializer.validated_data['body'],
+        )
+        return Response(self.get_serializer(announcement).data, status=status.HTTP_201_CREATED)
+
+    def perform_destroy(self, instance):
+        self._check_can_post(instance.organization)
+        instance.delete()
+
+    # ✅ Inbox: fanned-out entries merged with large-organization feeds
+    @action(detail=False, methods=['get'])
+    def inbox(self, request):
+        before = request.query_params.get('before')
+        if before is not None and not before.isdigit():
+            raise ValidationError({'before': "Must be an announcement id."})
+        limit = AnnouncementCursorPagination().get_page_size(request)
+        items, next_before = inbox_page(request.user, int(before) if before else None, limit, request)
+        for announcement, is_read in items:
+            announcement.is_read = is_read
+        next_url = None
+        if next_before is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), 'before', next_before)
+        return Response({
+            'next': next_url,
+            'unread': unread_count(request.user, request),
+            'results': InboxItemSerializer([a for a, _ in items], many=True).data,
+        })
+
+    @action(detail=False, methods=['get'])
+    def unread(self, request):
+        return Response({'unread': unread_count(request.user, request)})
+
+    @action(detail=False, methods=['post'], url_path='mark-read')
+    def mark_read(self, request):
+        """``{"ids": [...]}`` marks those announcements read; ``{"all": true}`` marks everything."""
+        ids = request.data.get('ids')
+        if request.data.get('all'):
+            ids = None
+        elif not isinstance(ids, list) or not all(str(pk).isdigit() for pk in ids):
+            raise ValidationError({'ids': "Provide a list of announcement ids, or \"all\": true."})
+        mark_read(request.user, [int(pk) for pk in ids] if ids is not None else None)
+        return Response({'unread': unread_count(request.user, request)})
@@ -1,3 +1,11 @@
 from django.contrib import admin
+from .models import Event
 
-# Register your models here.
+
+@admin.register(Event)
+class EventAdmin(admin.ModelAdmin):
+    list_display = ('title', 'organization', 'start', 'end')
+    list_filter = ('organization',)
+    search_fields = ('title',)
+    date_hierarchy = 'start'
+    raw_id_fields = ('created_by',)
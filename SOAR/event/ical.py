@@ -0,0 +1,68 @@
+"""Minimal RFC 5545 writer that yields the calendar one event at a time."""
+from datetime import timezone
+
+PRODID = "-//SOAR//Organization Events//EN"
+
+
+def escape_text(value):
+    return (
+        str(value or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    """Split a content line into 75-octet chunks joined by CRLF + space."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1  # don't split a UTF-8 sequence
+        parts.append(encoded[start:end].decode("utf-8"))
+        start, limit = end, 74  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_datetime(value):
+    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_event(event, organization_name, stamp):
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event['id']}@soar",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART:{format_datetime(event['start'])}",
+        f"DTEND:{format_datetime(event['end'])}",
+        f"LAST-MODIFIED:{format_datetime(event['updated_at'])}",
+        f"SUMMARY:{escape_text(event['title'])}",
+        f"CATEGORIES:{escape_text(organization_name)}",
+    ]
+    if event['description']:
+        lines.append(f"DESCRIPTION:{escape_text(event['description'])}")
+    if event['location']:
+        lines.append(f"LOCATION:{escape_text(event['location'])}")
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
+
+
+def stream_calendar(events, name, stamp):
+    """Yield a VCALENDAR for ``events`` (dicts from ``.values()``, with ``organization__name``)."""
+    yield "".join(fold(line) for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+    ))
+    for event in events:
+        yield render_event(event, event['organization__name'], stamp)
+    yield "END:VCALENDAR\r\n"
@@ -1,3 +1,73 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F, Q
+
+from organization.models import Organization
+
+
+def max_event_duration():
+    return timedelta(days=settings.EVENT_MAX_DURATION_DAYS)
+
+
+class EventQuerySet(models.QuerySet):
+    def overlapping(self, start, end):
+        """Events that intersect [start, end).
+
+        ``start__gte`` bounds the scan from below: no event lasts longer than
+        EVENT_MAX_DURATION_DAYS, so the (organization, start) index only walks
+        the requested window plus that margin, however old the table is.
+        """
+        return self.filter(
+            start__lt=end,
+            start__gte=start - max_event_duration(),
+            end__gt=start,
+        )
+
+
+class Event(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="events")
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    location = models.CharField(max_length=255, blank=True)
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="created_events"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['start', 'id']
+        indexes = [
+            models.Index(fields=['organization', 'start'], name='event_org_start_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=Q(end__gte=F('start')), name='event_end_after_start'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.start:%Y-%m-%d %H:%M})"
+
+    def clean(self):
+        if self.start and self.end:
+            if self.end < self.start:
+                raise ValidationError("An event cannot end before it starts.")
+            if self.end - self.start > max_event_duration():
+                raise ValidationError(f"Events can last at most {settings.EVENT_MAX_DURATION_DAYS} days.")
 
-# Create your models here.
+    def save(self, *args, **kwargs):
+        # overlapping() relies on the duration cap, so enforce it on every write path.
+        self.clean()
+        super().save(*args, **kwargs)
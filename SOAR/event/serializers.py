@@ -0,0 +1,25 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+
+from .models import Event
+
+
+class EventSerializer(serializers.ModelSerializer):
+    organization_name = serializers.CharField(source='organization.name', read_only=True)
+
+    class Meta:
+        model = Event
+        fields = [
+            'id', 'organization', 'organization_name', 'title', 'description', 'location',
+            'start', 'end', 'created_by', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['created_by', 'created_at', 'updated_at']
+
+    def validate(self, attrs):
+        start = attrs.get('start', getattr(self.instance, 'start', None))
+        end = attrs.get('end', getattr(self.instance, 'end', None))
+        try:
+            Event(start=start, end=end).clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({'end': e.messages})
+        return attrs
@@ -1,3 +1,57 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+
+from organization.models import Organization, OrganizationMember
+from .models import Event
+from .views import calendar_token
+
+User = get_user_model()
+
+
+class EventTestCase(TestCase):
+    def setUp(self):
+        self.student = User.objects.create(username='student', email='student@cit.edu', student_id='00-0000-001')
+        self.org = Organization.objects.create(name='Chess Club', description='Chess.')
+        OrganizationMember.objects.create(organization=self.org, student=self.student, is_approved=True)
+        start = timezone.now() + timedelta(days=1)
+        for i in range(3):
+            Event.objects.create(organization=self.org, title=f'Match {i}', start=start + timedelta(days=i),
+                                 end=start + timedelta(days=i, hours=2))
+
+
+class CalendarFeedTests(EventTestCase):
+    def feed_url(self):
+        return f'/event/calendar/{calendar_token(self.student)}.ics'
+
+    def test_feed_streams_under_wsgi(self):
+        response = self.client.get(self.feed_url())
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.is_async)
+        self.assertEqual(b''.join(response.streaming_content).count(b'BEGIN:VEVENT'), 3)
+
+    async def test_feed_streams_under_asgi(self):
+        # A sync iterator would be buffered with sync_to_async(list) before the first byte.
+        response = await self.async_client.get(self.feed_url())
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(body.count(b'BEGIN:VEVENT'), 3)
+
+
+class EventListTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.student)
+
+    def test_organization_filter(self):
+        end = (timezone.now() + timedelta(days=10)).isoformat()
+        response = self.client.get('/event/events/', {'organization': str(self.org.pk), 'end': end,
+                                                      'start': timezone.now().isoformat()})
+        self.assertEqual(len(response.json()['results']), 3)
 
-# Create your tests here.
+    def test_malformed_organization_is_a_bad_request(self):
+        response = self.client.get('/event/events/', {'organization': 'chess-club'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('organization', response.json())
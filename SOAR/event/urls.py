@@ -0,0 +1,11 @@
+from django.urls import path
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'events', views.EventViewSet, basename='event')
+
+urlpatterns = [
+    path('calendar/', views.calendar_feed_url, name='event_calendar_url'),
+    path('calendar/<str:token>.ics', views.calendar_feed, name='event_calendar_feed'),
+] + router.urls
@@ -1,3 +1,161 @@
-from django.shortcuts import render
+import uuid
+from datetime import datetime, time, timedelta
 
-# Create your views here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import login_required
+from django.core import signing
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import viewsets
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from SOAR.streaming import streaming_response
+from organization.roles import approved_org_ids, is_admin, is_officer_or_leader
+from .ical import stream_calendar
+from .models import Event
+from .serializers import EventSerializer
+
+CALENDAR_SALT = 'event.calendar'
+
+
+def can_manage_events(user, organization, request=None):
+    return (
+        is_admin(user)
+        or organization.adviser_id == user.pk
+        or is_officer_or_leader(user, organization, request)
+    )
+
+
+def _parse_bound(value, name):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({name: "Use an ISO 8601 date or datetime."})
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def requested_range(query_params):
+    """(start, end) from ?start=&end=, defaulting to the current week (Monday to Monday)."""
+    if 'start' in query_params:
+        start = _parse_bound(query_params['start'], 'start')
+    else:
+        today = timezone.localdate()
+        start = timezone.make_aware(datetime.combine(today - timedelta(days=today.weekday()), time.min))
+    end = _parse_bound(query_params['end'], 'end') if 'end' in query_params else start + timedelta(days=7)
+    if end <= start:
+        raise ValidationError({'end': "end must be after start."})
+    if end - start > timedelta(days=settings.EVENT_RANGE_MAX_DAYS):
+        raise ValidationError({'end': f"The range can span at most {settings.EVENT_RANGE_MAX_DAYS} days."})
+    return start, end
+
+
+def requested_organization(query_params):
+    """The ?organization= id as a UUID, or None when absent."""
+    value = query_params.get('organization')
+    if not value:
+        return None
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise ValidationError({'organization': "Must be an organization id."})
+
+
+# ==============================
+# EVENT VIEWSET
+# ==============================
+class EventViewSet(viewsets.ModelViewSet):
+    """Events of the organizations the user belongs to.
+
+    ``GET /event/events/?start=2025-01-06&end=2025-01-13[&organization=<id>]``
+    returns events overlapping the range (this week by default).
+    """
+    serializer_class = EventSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Event.objects.select_related('organization')
+        if not is_admin(self.request.user):
+            queryset = queryset.filter(organization_id__in=approved_org_ids(self.request.user, self.request))
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        start, end = requested_range(request.query_params)
+        queryset = self.get_queryset().overlapping(start, end)
+        organization = requested_organization(request.query_params)
+        if organization:
+            queryset = queryset.filter(organization_id=organization)
+        limit = settings.EVENT_RANGE_MAX_RESULTS
+        events = list(queryset[:limit + 1])
+        return Response({
+            'start': start,
+            'end': end,
+            'truncated': len(events) > limit,
+            'results': self.get_serializer(events[:limit], many=True).data,
+        })
+
+    def _check_can_manage(self, organization):
+        if not can_manage_events(self.request.user, organization, self.request):
+            raise PermissionDenied("Only officers, leaders, advisers or admins can manage this organization's events.")
+
+    def perform_create(self, serializer):
+        self._check_can_manage(serializer.validated_data['organization'])
+        serializer.save(created_by=self.request.user)
+
+    def perform_update(self, serializer):
+        self._check_can_manage(serializer.instance.organization)
+        if 'organization' in serializer.validated_data:
+            self._check_can_manage(serializer.validated_data['organization'])
+        serializer.save()
+
+    def perform_destroy(self, instance):
+        self._check_can_manage(instance.organization)
+        instance.delete()
+
+
+# ==============================
+# ICAL FEED
+# ==============================
+def calendar_token(user):
+    return signing.Signer(salt=CALENDAR_SALT).sign(str(user.pk))
+
+
+@login_required
+def calendar_feed_url(request):
+    """The user's private subscription URL (calendar apps can't send session cookies)."""
+    url = request.build_absolute_uri(reverse('event_calendar_feed', args=[calendar_token(request.user)]))
+    return JsonResponse({'url': url})
+
+
+def calendar_feed(request, token):
+    try:
+        user_id = signing.Signer(salt=CALENDAR_SALT).unsign(token)
+    except signing.BadSignature:
+        raise Http404("Unknown calendar.")
+    user = get_user_model().objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        raise Http404("Unknown calendar.")
+
+    since = timezone.now() - timedelta(days=settings.EVENT_FEED_PAST_DAYS)
+    events = (
+        Event.objects.filter(organization_id__in=approved_org_ids(user), start__gte=since)
+        .order_by('start', 'id')
+        .values('id', 'title', 'description', 'location', 'start', 'end', 'updated_at', 'organization__name')
+        .iterator(chunk_size=500)
+    )
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%SZ")
+    response = streaming_response(
+        request,
+        stream_calendar(events, f"SOAR – {user.get_full_name() or user.username}", stamp),
+        content_type='text/calendar; charset=utf-8',
+    )
+    response['Content-Disposition'] = 'inline; filename="soar.ics"'
+    return response
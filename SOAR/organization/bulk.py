@@ -0,0 +1,157 @@
+"""Bulk membership operations (approve/reject/promote/demote/remove many at once).
+
+One permission check, one transaction, a handful of set-based statements,
+and a single batched notification job, instead of one request per member.
+"""
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+from realtime.publish import publish_organization_event
+from .counters import membership_batch
+from .models import OrganizationMember, demoted_role, promoted_role
+from .roles import invalidate_membership, is_admin, is_leader, is_officer_or_leader
+from .tasks import send_notification_emails
+
+OPERATIONS = ('approve', 'reject', 'promote', 'demote', 'remove')
+MAX_BULK_MEMBERS = 1000
+
+
+class BulkOperationError(Exception):
+    """The whole request is invalid (nothing was changed)."""
+
+
+def can_review(user, organization, request=None):
+    """Approve/reject: advisers, officers, leaders and admins."""
+    return (
+        is_admin(user)
+        or organization.adviser_id == user.pk
+        or is_officer_or_leader(user, organization, request)
+    )
+
+
+def _check_permission(user, organization, operation, request):
+    if operation in ('approve', 'reject'):
+        if not can_review(user, organization, request):
+            raise PermissionError("Only officers, leaders, advisers or admins can review join requests.")
+    elif not is_leader(user, organization, request):
+        raise PermissionError(f"Only leaders or admins can {operation} members.")
+
+
+def _approval_message(member):
+    name = member.organization.name
+    return [
+        f"Accepted to {name}",
+        f"Congratulations! You have been accepted as a member of {name}.",
+        [member.student.email],
+    ]
+
+
+def _rejection_message(member):
+    name = member.organization.name
+    return [
+        f"Application to {name} Rejected",
+        f"We regret to inform you that your request to join {name} was not approved.",
+        [member.student.email],
+    ]
+
+
+def apply_bulk_operation(user, operation, member_ids, request=None):
+    """Apply ``operation`` to every member in ``member_ids``.
+
+    All members must belong to the same organization. Returns a list of
+    ``{'id', 'status', ...}`` dicts, one per requested id, in request order.
+    Raises BulkOperationError for malformed requests and PermissionError if
+    ``user`` may not perform ``operation`` in that organization.
+    """
+    if operation not in OPERATIONS:
+        raise BulkOperationError(f"Unknown operation '{operation}'. Expected one of: {', '.join(OPERATIONS)}.")
+    if not isinstance(member_ids, (list, tuple)) or not member_ids:
+        raise BulkOperationError("No member ids given.")
+    if len(member_ids) > MAX_BULK_MEMBERS:
+        raise BulkOperationError(f"At most {MAX_BULK_MEMBERS} members can be changed per request.")
+
+    requested, valid_ids = [], []
+    for pk in dict.fromkeys(str(pk) for pk in member_ids):
+        try:
+            pk = str(uuid.UUID(pk))
+            valid_ids.append(pk)
+        except ValueError:
+            pass
+        requested.append(pk)
+
+    with transaction.atomic():
+        members = {
+            str(m.pk): m
+            for m in OrganizationMember.objects.select_for_update(of=('self',))
+            .select_related('student', 'organization')
+            .filter(pk__in=valid_ids)
+        }
+        organizations = {m.organization_id for m in members.values()}
+        if len(organizations) > 1:
+            raise BulkOperationError("All members must belong to the same organization.")
+        if members:
+            _check_permission(user, next(iter(members.values())).organization, operation, request)
+
+        results = {}
+        changed, deleted, notifications = [], [], []
+        for pk in requested:
+            member = members.get(pk)
+            if member is None:
+                results[pk] = {'id': pk, 'status': 'error', 'error': 'Member not found.'}
+                continue
+            before = member._counter_state()
+            try:
+                if operation == 'approve':
+                    if member.is_approved:
+                        raise ValueError('Already approved.')
+                    member.is_approved = True
+                    notifications.append(_approval_message(member))
+                elif operation == 'reject':
+                    if member.is_approved:
+                        raise ValueError('Already approved.')
+                    notifications.append(_rejection_message(member))
+                elif operation == 'promote':
+                    member.role = promoted_role(member.role)
+                elif operation == 'demote':
+                    member.role = demoted_role(member.role)
+            except ValueError as e:
+                results[pk] = {'id': pk, 'status': 'error', 'error': str(e)}
+                continue
+
+            if operation in ('reject', 'remove'):
+                deleted.append((member, before))
+                results[pk] = {'id': pk, 'status': 'removed'}
+            else:
+                changed.append((member, before))
+                results[pk] = {'id': pk, 'status': 'success', 'role': member.role, 'is_approved': member.is_approved}
+
+        # Deleted rows are counted (and their caches invalidated) by the post_delete receiver.
+        with membership_batch() as counter_changes:
+            if changed:
+                # bulk_update() skips auto_now; stamp updated_at so ETags change.
+                now = timezone.now()
+                for member, _ in changed:
+                    member.updated_at = now
+                OrganizationMember.objects.bulk_update(
+                    [member for member, _ in changed],
+                    ['is_approved' if operation == 'approve' else 'role', 'updated_at'],
+                )
+                counter_changes.extend((before, member._counter_state()) for member, before in changed)
+            if deleted:
+                OrganizationMember.objects.filter(pk__in=[member.pk for member, _ in deleted]).delete()
+        touched = [(m.organization_id, m.student_id) for m, _ in changed + deleted]
+        transaction.on_commit(lambda: [invalidate_membership(*key) for key in touched])
+        if touched:
+            publish_organization_event(touched[0][0], 'membership', {
+                'change': 'bulk',
+                'operation': operation,
+                'member_ids': [str(m.pk) for m, _ in changed + deleted],
+            }, reviewers_only=operation == 'reject')
+        if notifications:
+            send_notification_emails.enqueue(notifications)
+
+    for member, _ in changed:
+        member._counted_state = member._counter_state()
+    return [results[pk] for pk in requested]
@@ -0,0 +1,93 @@
+"""Conditional GET (ETag / Last-Modified) for the REST read endpoints.
+
+Validators come from row versions and Max(updated_at), not from the payload.
+When the client's copy is current, the 304 costs one aggregate query and
+no serialization.
+"""
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def conditional_response(request, etag, last_modified, build):
+    """Return 304 if the request's validators match, else ``build()`` with ETag/Last-Modified set."""
+    etag = quote_etag(etag) if etag else None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = build()
+    if response.status_code in (200, 304):
+        if etag:
+            response.headers['ETag'] = etag
+        if timestamp is not None:
+            response.headers['Last-Modified'] = http_date(timestamp)
+        # Per-user data: let browsers keep it, but always revalidate.
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def queryset_validators(queryset, *extra):
+    """(etag, last_modified) for a list of rows with ``updated_at``.
+
+    Count catches deletions; Max(updated_at) catches edits and inserts;
+    ``extra`` folds in anything else the response depends on (query params).
+    """
+    model = queryset.model
+    aggregates = {'count': Count('pk'), 'last_modified': Max('updated_at')}
+    if any(field.name == 'cache_version' for field in model._meta.concrete_fields):
+        # Also changes on m2m edits, which don't touch updated_at.
+        aggregates['versions'] = Sum('cache_version')
+    stats = queryset.order_by().aggregate(**aggregates)
+    last_modified = stats['last_modified']
+    parts = [model._meta.label_lower, stats['count'], last_modified.timestamp() if last_modified else 0]
+    parts += [stats.get('versions'), *extra]
+    return digest(parts), last_modified
+
+
+def membership_validators(organizations, *extra):
+    """(etag, last_modified) for member lists of ``organizations`` (an Organization queryset).
+
+    Built from the organizations' cache_version and updated_at, which every
+    membership change (through the counters) and every username change
+    bumps, so the cost is per organization, not per member. A 304 never
+    touches OrganizationMember.
+    """
+    return queryset_validators(organizations, 'members', *extra)
+
+
+def object_validators(obj):
+    parts = [obj._meta.label_lower, obj.pk, obj.updated_at.timestamp(), getattr(obj, 'cache_version', None)]
+    return digest(parts), obj.updated_at
+
+
+def digest(parts):
+    return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+class ConditionalGetMixin:
+    """``list``/``retrieve`` answer 304 from validators before any serialization.
+
+    Override ``get_list_validators(queryset)`` / ``get_object_validators(obj)``
+    for models without ``updated_at``.
+    """
+
+    def get_list_validators(self, queryset):
+        return queryset_validators(queryset, self.request.query_params.urlencode())
+
+    def get_object_validators(self, obj):
+        return object_validators(obj)
+
+    def list(self, request, *args, **kwargs):
+        build = super().list
+        etag, last_modified = self.get_list_validators(self.filter_queryset(self.get_queryset()))
+        return conditional_response(request, etag, last_modified, lambda: build(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_object_validators(instance)
+        return conditional_response(
+            request, etag, last_modified, lambda: Response(self.get_serializer(instance).data),
+        )
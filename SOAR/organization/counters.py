@@ -0,0 +1,213 @@
+"""Denormalized membership counters on Organization.
+
+They are kept current by OrganizationMember.save(), by the delete
+receivers (instance, queryset and cascade deletes) and by the bulk paths.
+A plain ``OrganizationMember.objects.filter(...).update(...)`` bypasses all
+of them. Schedule ``manage.py reconcile_member_counters`` (e.g. nightly
+cron) to repair any drift.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+
+from .fragments import version_bump
+
+# Counter column on Organization for each approved role.
+ROLE_COUNTER_FIELDS = {
+    "member": "role_member_count",
+    "officer": "role_officer_count",
+    "leader": "role_leader_count",
+}
+
+COUNTER_FIELDS = (
+    "approved_count",
+    "pending_count",
+    "role_member_count",
+    "role_officer_count",
+    "role_leader_count",
+)
+
+
+def membership_counter_fields(is_approved, role):
+    """Return the Organization counters a membership in this state contributes to."""
+    if not is_approved:
+        return ("pending_count",)
+    role_field = ROLE_COUNTER_FIELDS.get(str(role or "").lower())
+    if role_field:
+        return ("approved_count", role_field)
+    return ("approved_count",)
+
+
+def membership_counter_deltas(before, after):
+    """Diff two (organization_id, is_approved, role) states into per-org counter deltas.
+
+    Either state may be None (row created / row deleted). Returns
+    {organization_id: {field: delta}} with zero deltas dropped.
+    """
+    deltas = {}
+    if before is not None:
+        org_id, is_approved, role = before
+        bucket = deltas.setdefault(org_id, Counter())
+        for field in membership_counter_fields(is_approved, role):
+            bucket[field] -= 1
+    if after is not None:
+        org_id, is_approved, role = after
+        bucket = deltas.setdefault(org_id, Counter())
+        for field in membership_counter_fields(is_approved, role):
+            bucket[field] += 1
+    return {
+        org_id: {field: delta for field, delta in bucket.items() if delta}
+        for org_id, bucket in deltas.items()
+        if any(bucket.values())
+    }
+
+
+def combine_counter_deltas(changes):
+    """Sum membership_counter_deltas() over many (before, after) pairs."""
+    combined = {}
+    for before, after in changes:
+        for org_id, fields in membership_counter_deltas(before, after).items():
+            combined.setdefault(org_id, Counter()).update(fields)
+    return {
+        org_id: {field: delta for field, delta in bucket.items() if delta}
+        for org_id, bucket in combined.items()
+        if any(bucket.values())
+    }
+
+
+def apply_counter_deltas(deltas):
+    """Apply deltas from membership_counter_deltas() with one UPDATE per organization."""
+    from .models import Organization
+
+    for org_id, fields in deltas.items():
+        Organization.objects.filter(pk=org_id).update(
+            # Member counts are on cached fragments; bump their version in the same UPDATE.
+            **version_bump(),
+            **{field: Greatest(F(field) + delta, Value(0)) for field, delta in fields.items()},
+        )
+
+
+_batch = ContextVar('membership_batch', default=None)
+
+
+@contextmanager
+def membership_batch():
+    """Collect membership counter changes in this block and apply them together at the end.
+
+    Inside the block the post_delete receiver only records each deleted row, so
+    deleting many memberships costs one counter UPDATE per organization instead
+    of one per row, and the rows' role caches are invalidated on commit. Yields
+    the list of (before, after) states, so callers can add their own
+    bulk_update() changes. The caller must already hold row locks on what it
+    changes, and publishes its own realtime event.
+    """
+    batch = {'changes': [], 'touched': set()}
+    token = _batch.set(batch)
+    try:
+        yield batch['changes']
+    finally:
+        _batch.reset(token)
+    apply_counter_deltas(combine_counter_deltas(batch['changes']))
+    if batch['touched']:
+        from .roles import invalidate_membership
+
+        touched = batch['touched']
+        transaction.on_commit(lambda: [invalidate_membership(*key) for key in touched])
+
+
+def in_membership_batch():
+    return _batch.get() is not None
+
+
+def record_deleted_membership(before, student_id):
+    """Count a deleted row. Returns False if not in a membership_batch() (the caller applies it)."""
+    batch = _batch.get()
+    if batch is None:
+        return False
+    batch['changes'].append((before, None))
+    batch['touched'].add((before[0], student_id))
+    return True
+
+
+def record_cascaded_membership(origin, before, student_id, count=True):
+    """Record a membership deleted by a cascade from ``origin`` (e.g. a deleted User).
+
+    The rows are kept on ``origin`` itself, so a delete that fails part way
+    leaves nothing behind, and applied by flush_cascaded_memberships() once
+    the origin's own rows are deleted. ``count=False`` (the organization
+    itself is being deleted) only invalidates the role cache.
+    """
+    pending = origin.__dict__.setdefault('_cascaded_memberships', [])
+    pending.append((before if count else None, before[0], student_id))
+
+
+def flush_cascaded_memberships(origin):
+    """Apply what record_cascaded_membership() collected for ``origin`` through a membership_batch().
+
+    Returns {organization_id: [(student_id, is_approved), ...]} for the counted organizations.
+    Cascaded rows aren't locked first, so a membership changed concurrently
+    can leave a counter off by one; reconcile_member_counters() repairs it.
+    """
+    pending = origin.__dict__.pop('_cascaded_memberships', None)
+    if not pending:
+        return {}
+    removed = {}
+    with membership_batch() as changes:
+        for before, org_id, student_id in pending:
+            _batch.get()['touched'].add((org_id, student_id))
+            if before is not None:
+                changes.append((before, None))
+                removed.setdefault(org_id, []).append((student_id, before[1]))
+    return removed
+
+
+def counter_aggregates():
+    """Aggregate expressions that recompute every counter from OrganizationMember rows."""
+    approved = Q(members__is_approved=True)
+    aggregates = {
+        "approved_count": Count("members", filter=approved),
+        "pending_count": Count("members", filter=Q(members__is_approved=False)),
+    }
+    for role, field in ROLE_COUNTER_FIELDS.items():
+        aggregates[field] = Count("members", filter=approved & Q(members__role=role))
+    return aggregates
+
+
+def reconcile_member_counters(queryset=None, batch_size=500):
+    """Recompute the denormalized counters for ``queryset`` (all orgs by default).
+
+    Works in primary-key batches so memory stays bounded on large tables.
+    Each correction is applied as a delta against the value read alongside the
+    aggregates, so an F() increment committed in between isn't overwritten.
+    Returns the number of organizations whose counters were corrected.
+    """
+    from .models import Organization
+
+    if queryset is None:
+        queryset = Organization.objects.all()
+    ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+    fixed = 0
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        rows = (
+            Organization.objects.filter(pk__in=batch_ids)
+            .only("pk", *COUNTER_FIELDS)
+            .annotate(**{f"actual_{field}": expr for field, expr in counter_aggregates().items()})
+        )
+        for org in rows:
+            deltas = {
+                field: getattr(org, f"actual_{field}") - getattr(org, field)
+                for field in COUNTER_FIELDS
+                if getattr(org, f"actual_{field}") != getattr(org, field)
+            }
+            if deltas:
+                Organization.objects.filter(pk=org.pk).update(
+                    **version_bump(),
+                    **{field: F(field) + delta for field, delta in deltas.items()},
+                )
+                fixed += 1
+    return fixed
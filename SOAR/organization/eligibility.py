@@ -0,0 +1,76 @@
+"""Who may join which organization, precomputed.
+
+OrganizationEligibility has one row per organization for "anyone may join"
+(program is NULL, public organizations) or one row per allowed program
+(restricted organizations). Checking whether a student can join, or listing
+everything they can join, is then a lookup on their ``User.program`` in one
+indexed query, not a per-organization ``allowed_programs`` check against the
+free-text course.
+
+The rows are rebuilt by ``refresh_eligibility`` when an organization is
+created public, when its ``is_public`` changes, or when its
+``allowed_programs`` change (receivers in organization.models). Deleting a
+program or organization cascades to its rows. Code that bulk-creates
+organizations or through rows must call ``refresh_eligibility`` itself, and
+``manage.py rebuild_eligibility`` repairs the whole table.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+
+def refresh_eligibility(org_ids):
+    """Rebuild the eligibility rows of the given organizations."""
+    from .models import Organization, OrganizationEligibility
+
+    org_ids = list(org_ids)
+    if not org_ids:
+        return
+    Through = Organization.allowed_programs.through
+    with transaction.atomic():
+        OrganizationEligibility.objects.filter(organization_id__in=org_ids).delete()
+        public = set(Organization.objects.filter(pk__in=org_ids, is_public=True).values_list('pk', flat=True))
+        rows = [OrganizationEligibility(organization_id=org_id, program=None) for org_id in public]
+        rows += [
+            OrganizationEligibility(organization_id=org_id, program_id=program_id)
+            for org_id, program_id in Through.objects.filter(organization_id__in=org_ids)
+            .exclude(organization_id__in=public).values_list('organization_id', 'program_id')
+        ]
+        OrganizationEligibility.objects.bulk_create(rows)
+
+
+def rebuild_eligibility(queryset=None, batch_size=500):
+    """Rebuild the rows of every organization in ``queryset`` (default: all). Returns how many."""
+    from .models import Organization
+
+    ids = list((queryset if queryset is not None else Organization.objects.all()).values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        refresh_eligibility(ids[start:start + batch_size])
+    return len(ids)
+
+
+def eligible_for(user):
+    """Eligibility rows that apply to ``user``: open to anyone, or to their program."""
+    from .models import OrganizationEligibility
+
+    anyone = Q(program__isnull=True)
+    program_id = getattr(user, 'program_id', None)
+    return OrganizationEligibility.objects.filter(anyone | Q(program_id=program_id) if program_id else anyone)
+
+
+def can_join_expression(user):
+    """``Exists()`` for annotating organizations with whether ``user`` may join them."""
+    return Exists(eligible_for(user).filter(organization=OuterRef('pk')))
+
+
+def can_join(user, organization):
+    return eligible_for(user).filter(organization=organization).exists()
+
+
+def joinable_organizations(user):
+    """Organizations ``user`` may join and has no membership or pending request in."""
+    from .models import Organization
+
+    return (
+        Organization.objects.filter(pk__in=eligible_for(user).values('organization'))
+        .exclude(members__student=user)
+    )
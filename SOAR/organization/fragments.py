@@ -0,0 +1,33 @@
+"""Per-organization version for template fragment caching.
+
+Templates cache organization blocks under the organization's id and
+``cache_version``:
+
+    {% cache 86400 org_card org.id org.cache_version %}...{% endcache %}
+
+``cache_version`` is bumped with an F() update whenever something those
+blocks render changes:
+
+- Organization.save(),
+- counter updates from membership changes (organization.counters),
+- ``allowed_programs`` changes and Program edits (organization.models),
+- the picture derivative worker (organization.images).
+
+A bump moves readers to a new key. Stale fragments are never served, and
+they age out of the cache on their own.
+"""
+from django.db.models import F
+from django.db.models.functions import Now
+
+
+def version_bump():
+    """Update kwargs that bump ``cache_version`` and ``updated_at`` (the REST validators use both)."""
+    return {'cache_version': F('cache_version') + 1, 'updated_at': Now()}
+
+
+def bump_cache_version(org_ids):
+    from .models import Organization
+
+    org_ids = [pk for pk in org_ids if pk is not None]
+    if org_ids:
+        Organization.objects.filter(pk__in=org_ids).update(**version_bump())
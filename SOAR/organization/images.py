@@ -0,0 +1,167 @@
+"""Content-hashed derivatives for uploaded profile pictures.
+
+Saving a model whose ``profile_picture`` changed enqueues
+``organization.tasks.build_image_derivatives`` after commit. The worker
+hashes the upload and renders each size in ``DERIVATIVE_SIZES`` as WebP and
+JPEG under ``derivatives/<hash>/``. It then records the paths on the
+instance's ``profile_picture_variants``. Identical bytes uploaded again
+reuse the existing ImageDerivativeSet and the first stored original, so
+nothing is re-encoded or stored twice. If that original has gone from
+storage, the new upload takes its place. A duplicate upload is deleted
+only after commit, and only if no picture field still points at it.
+
+Templates use ``{% load images %}{{ obj|picture_url:"thumb" }}``;
+serializers use ``picture_urls(obj)``.
+"""
+import hashlib
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .fragments import version_bump
+
+# name -> longest edge in pixels
+DERIVATIVE_SIZES = {
+    'thumb': 96,
+    'card': 320,
+    'full': 1024,
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+HASH_CHUNK_SIZE = 64 * 1024
+DERIVATIVE_FIELDS = ('profile_picture_hash', 'profile_picture_variants')
+
+
+def schedule_derivatives(instance):
+    """Queue derivative generation if ``instance.profile_picture`` changed since the last run."""
+    picture = instance.profile_picture
+    variants = instance.profile_picture_variants or {}
+    if not picture:
+        if variants or instance.profile_picture_hash:
+            type(instance).objects.filter(pk=instance.pk).update(profile_picture_hash='', profile_picture_variants={})
+            instance.profile_picture_hash, instance.profile_picture_variants = '', {}
+        return
+    if variants.get('source') == picture.name:
+        return
+
+    from .tasks import build_image_derivatives
+
+    label = instance._meta.label
+    pk = str(instance.pk)
+    transaction.on_commit(lambda: build_image_derivatives.enqueue(label, pk))
+
+
+def hash_file(file):
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def render_derivatives(file, digest):
+    """Render every size/format of ``file`` into storage; return the variants mapping."""
+    from PIL import Image, ImageOps
+
+    # Uploads were already capped by validate_image_upload; this guards older files.
+    Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
+    variants = {}
+    with Image.open(file) as source:
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ('RGB', 'RGBA'):
+            source = source.convert('RGBA' if 'A' in source.getbands() else 'RGB')
+        for size_name, edge in DERIVATIVE_SIZES.items():
+            image = source.copy()
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            variants[size_name] = {}
+            for ext, (pil_format, options) in FORMATS.items():
+                frame = image.convert('RGB') if pil_format == 'JPEG' else image
+                path = f"derivatives/{digest[:2]}/{digest}/{size_name}.{ext if ext != 'jpeg' else 'jpg'}"
+                if not default_storage.exists(path):
+                    buffer = BytesIO()
+                    frame.save(buffer, pil_format, **options)
+                    path = default_storage.save(path, ContentFile(buffer.getvalue()))
+                variants[size_name][ext] = path
+    return variants
+
+
+def build_derivatives(label, pk):
+    """Worker entry point: hash, dedupe, render and record derivatives for one instance."""
+    from .models import ImageDerivativeSet
+
+    model = apps.get_model(label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.profile_picture:
+        return
+    source_name = instance.profile_picture.name
+
+    with instance.profile_picture.open('rb') as file:
+        digest = hash_file(file)
+        derivative_set = ImageDerivativeSet.objects.filter(hash=digest).first()
+        if derivative_set is None:
+            variants = render_derivatives(file, digest)
+            derivative_set, _ = ImageDerivativeSet.objects.get_or_create(
+                hash=digest, defaults={'original': source_name, 'variants': variants},
+            )
+
+    canonical = derivative_set.original
+    if canonical != source_name and not (canonical and default_storage.exists(canonical)):
+        # The first copy is gone: this upload becomes the one the set points at.
+        ImageDerivativeSet.objects.filter(pk=derivative_set.pk, original=canonical).update(original=source_name)
+        canonical = source_name
+    fields = {
+        'profile_picture': canonical,
+        'profile_picture_hash': digest,
+        'profile_picture_variants': dict(derivative_set.variants, source=canonical),
+    }
+    if any(field.name == 'cache_version' for field in model._meta.concrete_fields):
+        fields.update(version_bump())
+    updated = model.objects.filter(pk=pk, profile_picture=source_name).update(**fields)
+    if updated and canonical != source_name:
+        # Same bytes were uploaded before: keep one copy.
+        transaction.on_commit(lambda: delete_unreferenced(source_name))
+
+
+def _picture_models():
+    return [
+        model for model in apps.get_models()
+        if any(field.name == 'profile_picture_hash' for field in model._meta.concrete_fields)
+    ]
+
+
+def delete_unreferenced(name):
+    """Delete ``name`` from storage unless a profile picture still points at it."""
+    for model in _picture_models():
+        if model.objects.filter(profile_picture=name).exists():
+            return
+    default_storage.delete(name)
+
+
+def picture_url(instance, size='thumb', fmt='webp'):
+    """URL of the ``size`` derivative, falling back to the original until it is ready."""
+    picture = getattr(instance, 'profile_picture', None)
+    if not picture:
+        return ''
+    variants = getattr(instance, 'profile_picture_variants', None) or {}
+    if variants.get('source') == picture.name:
+        path = variants.get(size, {}).get(fmt)
+        if path:
+            return default_storage.url(path)
+    return picture.url
+
+
+def picture_urls(instance):
+    """All derivative URLs for an API payload: {'original': ..., 'thumb': ..., ...}."""
+    if not getattr(instance, 'profile_picture', None):
+        return None
+    urls = {'original': instance.profile_picture.url}
+    for size in DERIVATIVE_SIZES:
+        urls[size] = picture_url(instance, size)
+    return urls
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from organization.eligibility import rebuild_eligibility
+from organization.models import Organization
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed join-eligibility rows from is_public and allowed_programs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--org', action='append', dest='org_ids', default=[],
+                            help="Only rebuild this organization id (repeatable).")
+
+    def handle(self, *args, **options):
+        queryset = Organization.objects.all()
+        if options['org_ids']:
+            queryset = queryset.filter(pk__in=options['org_ids'])
+        count = rebuild_eligibility(queryset, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt eligibility for {count} organization(s)."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from organization.counters import reconcile_member_counters
+from organization.models import Organization
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the denormalized membership counters on Organization in batches. "
+        "Schedule it (e.g. nightly cron): queryset update()s on OrganizationMember bypass the counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--org', action='append', dest='org_ids', default=[],
+                            help="Only reconcile this organization id (repeatable).")
+
+    def handle(self, *args, **options):
+        queryset = Organization.objects.all()
+        if options['org_ids']:
+            queryset = queryset.filter(pk__in=options['org_ids'])
+        fixed = reconcile_member_counters(queryset, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters; {fixed} organization(s) corrected."))
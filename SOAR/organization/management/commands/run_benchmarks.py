@@ -0,0 +1,190 @@
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+
+from SOAR.querybudget import QueryRecorder
+from organization.models import Organization, OrganizationMember, ROLE_LEADER, ROLE_MEMBER
+from organization.roles import invalidate_membership
+from organization.serializers import OrganizationMemberSerializer
+
+REPO_DIR = Path(settings.BASE_DIR).parent
+DEFAULT_BASELINE = REPO_DIR / '.benchmarks' / 'orm.json'
+SERIALIZER_ROWS = 200
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register ``setup(fixture) -> callable``; the callable is what gets timed."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class Fixture:
+    """The largest organization in the database, one of its leaders and a plain member."""
+
+    def __init__(self):
+        self.organization = Organization.objects.order_by('-approved_count', 'pk').first()
+        if self.organization is None or not self.organization.approved_count:
+            raise CommandError("No organization with members; run `python manage.py seed_dataset` first.")
+        members = OrganizationMember.objects.filter(organization=self.organization, is_approved=True)
+        leader = members.filter(role=ROLE_LEADER).select_related('student').first()
+        self.target = members.filter(role=ROLE_MEMBER).first()
+        if leader is None or self.target is None:
+            raise CommandError(f"{self.organization.name} needs an approved leader and member.")
+        self.leader = leader.student
+
+    def client(self):
+        # A session login, like the browser: members/<id>/demote/ is a plain Django view.
+        client = APIClient()
+        client.force_login(self.leader)
+        return client
+
+
+def _expect_ok(response):
+    if response.status_code != 200:
+        raise CommandError(f"{response.request['PATH_INFO']} returned {response.status_code}")
+    return response
+
+
+@benchmark('members_action')
+def members_action(fixture):
+    client, url = fixture.client(), f'/organization/organizations/{fixture.organization.pk}/members/'
+    return lambda: _expect_ok(client.get(url))
+
+
+@benchmark('member_serializer')
+def member_serializer(fixture):
+    members = list(
+        OrganizationMember.objects.filter(organization=fixture.organization)
+        .select_related('student').order_by('date_joined', 'id')[:SERIALIZER_ROWS]
+    )
+    return lambda: OrganizationMemberSerializer(members, many=True).data
+
+
+@benchmark('index')
+def index(fixture):
+    client = fixture.client()
+    return lambda: _expect_ok(client.get('/accounts/index/'))
+
+
+@benchmark('org_overview')
+def org_overview(fixture):
+    client, url = fixture.client(), f'/accounts/org_overview/{fixture.organization.pk}/'
+    return lambda: _expect_ok(client.get(url))
+
+
+@benchmark('promote_demote')
+def promote_demote(fixture):
+    # A round trip leaves the member as it was, so every run does the same work.
+    client, base = fixture.client(), f'/organization/members/{fixture.target.pk}'
+
+    def run():
+        _expect_ok(client.post(f'{base}/promote/'))
+        _expect_ok(client.post(f'{base}/demote/'))
+    return run
+
+
+def measure(run, repeat, warmup):
+    """Median/min wall time, queries per run and peak traced allocation for ``run``."""
+    for _ in range(warmup):
+        run()
+    # Not CaptureQueriesContext: the test client's request_started resets connection.queries.
+    queries = QueryRecorder()
+    with connection.execute_wrapper(queries):
+        run()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    # Separate pass: tracemalloc slows everything down, so it is not part of the timings.
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'ms': round(statistics.median(timings) * 1000, 3),
+        'min_ms': round(min(timings) * 1000, 3),
+        'queries': len(queries),
+        'alloc_kb': round(peak / 1024, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = ("Time the ORM/serializer hot paths against the current database (see seed_dataset), "
+            "with query counts and allocations, and compare with a stored baseline. Everything runs "
+            "in one transaction that is rolled back, so writes (promote_demote), realtime events and "
+            "queued jobs never reach the database or other processes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per benchmark (median is reported).")
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), dest='names')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline.")
+        parser.add_argument('--tolerance', type=float, default=20.0,
+                            help="Allowed regression in time and allocations over the baseline, in percent.")
+
+    def handle(self, *args, **options):
+        fixture = Fixture()
+        self.stdout.write(
+            f"Largest organization: {fixture.organization.name} "
+            f"({fixture.organization.approved_count} approved, {fixture.organization.pending_count} pending)"
+        )
+        results = {}
+        # Requests nest as savepoints, and on_commit work (events, jobs, cache invalidation) never runs.
+        with transaction.atomic():
+            for name in options['names'] or list(BENCHMARKS):
+                results[name] = measure(BENCHMARKS[name](fixture), max(1, options['repeat']), options['warmup'])
+                r = results[name]
+                self.stdout.write(
+                    f"  {name:<18} {r['ms']:9.2f} ms  (min {r['min_ms']:.2f})  "
+                    f"{r['queries']:3d} queries  {r['alloc_kb']:9.1f} KB peak"
+                )
+            cache_version = Organization.objects.values_list('cache_version', flat=True).get(pk=fixture.organization.pk)
+            transaction.set_rollback(True)
+        # The cache is not transactional: fragments cached under the versions bumped in the
+        # rolled-back transaction, and the target's cached role, must never be served.
+        Organization.objects.filter(pk=fixture.organization.pk).update(cache_version=cache_version + 1)
+        invalidate_membership(fixture.organization.pk, fixture.target.student_id)
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True))
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {baseline_path}"))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(f"No baseline at {baseline_path}; run with --save-baseline to create one.")
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        limit = 1 + options['tolerance'] / 100
+        regressions = []
+        for name, current in results.items():
+            previous = baseline.get(name)
+            if not previous:
+                continue
+            # Query counts are deterministic: any increase is a regression.
+            if current['queries'] > previous['queries']:
+                regressions.append(f"{name} queries: {previous['queries']} -> {current['queries']}")
+            for metric in ('ms', 'alloc_kb'):
+                if current[metric] > previous[metric] * limit:
+                    regressions.append(f"{name} {metric}: {previous[metric]} -> {current[metric]}")
+        if regressions:
+            raise CommandError("Benchmark regression over {:.0f}% tolerance:\n  {}".format(
+                options['tolerance'], "\n  ".join(regressions)))
+        self.stdout.write(self.style.SUCCESS("Benchmarks within baseline budget."))
@@ -0,0 +1,172 @@
+import random
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from organization.counters import membership_batch, reconcile_member_counters
+from organization.eligibility import rebuild_eligibility
+from organization.reference import bump_programs_version
+from organization.models import (
+    Organization, OrganizationMember, Program, ROLE_LEADER, ROLE_MEMBER, ROLE_OFFICER,
+)
+
+# Seeded rows are recognisable by these prefixes so --clear never touches real data.
+PROGRAM_PREFIX = 'SEED'
+ORG_PREFIX = 'Seed Org '
+USERNAME_PREFIX = 'seed'
+# Student IDs in the 99- block are never issued to real students.
+STUDENT_ID_BLOCK = 99
+BATCH_SIZE = 2000
+
+
+def seeded_querysets():
+    User = get_user_model()
+    return (
+        Organization.objects.filter(name__startswith=ORG_PREFIX),
+        User.objects.filter(username__startswith=USERNAME_PREFIX, student_id__startswith=f'{STUDENT_ID_BLOCK}-'),
+        Program.objects.filter(abbreviation__startswith=PROGRAM_PREFIX),
+    )
+
+
+def seeded_uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def zipf_weights(count, skew):
+    """Cumulative popularity weights: organization ``i`` gets 1 / (i + 1) ** skew."""
+    total, cumulative = 0.0, []
+    for rank in range(count):
+        total += 1 / (rank + 1) ** skew
+        cumulative.append(total)
+    return cumulative
+
+
+class Command(BaseCommand):
+    help = ("Generate a synthetic dataset (programs, organizations, students, memberships) "
+            "with Zipf-skewed organization sizes, for benchmarks and load tests.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--programs', type=int, default=8)
+        parser.add_argument('--orgs', type=int, default=200)
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--memberships-per-user', type=float, default=3.0,
+                            help="Average number of organizations each student joins.")
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help="Zipf exponent for organization popularity (0 = uniform).")
+        parser.add_argument('--approved', type=float, default=0.85, help="Share of memberships already approved.")
+        parser.add_argument('--private', type=float, default=0.3,
+                            help="Share of organizations restricted to a few programs.")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed; the same seed gives the same data.")
+        parser.add_argument('--clear', action='store_true', help="Delete previously seeded rows first.")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.clear()
+        orgs, users, programs = seeded_querysets()
+        if orgs.exists() or users.exists() or programs.exists():
+            raise CommandError("Seeded data already exists; rerun with --clear to replace it.")
+        if options['users'] >= 10_000_000:
+            raise CommandError("At most 9,999,999 seeded users fit in the reserved student ID block.")
+
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            programs = self.create_programs(options['programs'])
+            org_ids = self.create_organizations(rng, options['orgs'], programs, options['private'])
+            memberships = self.create_users_and_memberships(rng, options, programs, org_ids)
+            fixed = reconcile_member_counters(Organization.objects.filter(pk__in=org_ids))
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(programs)} programs, {len(org_ids)} organizations, {options['users']} students "
+            f"and {memberships} memberships (counters set on {fixed} organizations)."
+        ))
+
+    def clear(self):
+        orgs, users, programs = seeded_querysets()
+        with transaction.atomic(), membership_batch():
+            # Organizations first: their memberships go with them. The batch counts the
+            # cascaded memberships with one UPDATE per organization, not one per row.
+            deleted = [queryset.delete()[0] for queryset in (orgs, users, programs)]
+        self.stdout.write(f"Deleted {sum(deleted)} seeded rows.")
+
+    def create_programs(self, count):
+        programs = [
+            Program(abbreviation=f'{PROGRAM_PREFIX}{i:03d}', name=f'Seed Program {i:03d}')
+            for i in range(count)
+        ]
+        programs = Program.objects.bulk_create(programs)
+        # bulk_create() sends no post_save.
+        transaction.on_commit(bump_programs_version)
+        return programs
+
+    def create_organizations(self, rng, count, programs, private_share):
+        organizations = [
+            Organization(
+                id=seeded_uuid(rng),
+                name=f'{ORG_PREFIX}{i:05d}',
+                description=f'Synthetic organization #{i}.',
+                is_public=not (programs and rng.random() < private_share),
+            )
+            for i in range(count)
+        ]
+        Organization.objects.bulk_create(organizations, batch_size=BATCH_SIZE)
+        Through = Organization.allowed_programs.through
+        Through.objects.bulk_create(
+            [
+                Through(organization_id=org.pk, program_id=program.pk)
+                for org in organizations if not org.is_public
+                for program in rng.sample(programs, min(len(programs), rng.randint(1, 3)))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        org_ids = [org.pk for org in organizations]
+        rebuild_eligibility(Organization.objects.filter(pk__in=org_ids))
+        return org_ids
+
+    def create_users_and_memberships(self, rng, options, programs, org_ids):
+        User = get_user_model()
+        cumulative = zipf_weights(len(org_ids), options['skew'])
+        programs = programs or [None]
+        extra_per_user = max(options['memberships_per_user'] - 1, 0)
+        has_leader = set()
+        created = 0
+
+        for start in range(0, options['users'], BATCH_SIZE):
+            users, members = [], []
+            for i in range(start, min(start + BATCH_SIZE, options['users'])):
+                program = rng.choice(programs)
+                user = User(
+                    id=seeded_uuid(rng),
+                    username=f'{USERNAME_PREFIX}{i:07d}',
+                    email=f'seed.student{i}@cit.edu',
+                    first_name='Seed',
+                    last_name=f'Student {i}',
+                    student_id=f'{STUDENT_ID_BLOCK}-{i // 1000:04d}-{i % 1000:03d}',
+                    course=program.name if program else '',
+                    program=program,
+                    year_level=rng.randint(1, 4),
+                    password=UNUSABLE_PASSWORD_PREFIX + seeded_uuid(rng).hex,
+                )
+                users.append(user)
+                if not org_ids:
+                    continue
+                # One membership plus an exponentially distributed number of extra ones,
+                # each organization drawn by popularity.
+                joins = 1 + round(rng.expovariate(1 / extra_per_user)) if extra_per_user else 1
+                for org_id in dict.fromkeys(rng.choices(org_ids, cum_weights=cumulative, k=joins)):
+                    if org_id not in has_leader:
+                        has_leader.add(org_id)
+                        role, approved = ROLE_LEADER, True
+                    else:
+                        roll = rng.random()
+                        role = ROLE_OFFICER if roll < 0.05 else ROLE_LEADER if roll < 0.06 else ROLE_MEMBER
+                        approved = role != ROLE_MEMBER or rng.random() < options['approved']
+                    members.append(OrganizationMember(
+                        organization_id=org_id, student_id=user.pk, role=role, is_approved=approved,
+                    ))
+            User.objects.bulk_create(users)
+            OrganizationMember.objects.bulk_create(members, batch_size=BATCH_SIZE)
+            created += len(members)
+            self.stdout.write(f"  {start + len(users)} students, {created} memberships")
+        return created
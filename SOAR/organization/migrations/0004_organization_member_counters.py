@@ -0,0 +1,58 @@
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    Organization = apps.get_model('organization', 'Organization')
+    approved = Q(members__is_approved=True)
+    rows = Organization.objects.annotate(
+        actual_approved=Count('members', filter=approved),
+        actual_pending=Count('members', filter=Q(members__is_approved=False)),
+        actual_member=Count('members', filter=approved & Q(members__role__iexact='member')),
+        actual_officer=Count('members', filter=approved & Q(members__role__iexact='officer')),
+        actual_leader=Count('members', filter=approved & Q(members__role__iexact='leader')),
+    )
+    for org in rows.iterator(chunk_size=500):
+        Organization.objects.filter(pk=org.pk).update(
+            approved_count=org.actual_approved,
+            pending_count=org.actual_pending,
+            role_member_count=org.actual_member,
+            role_officer_count=org.actual_officer,
+            role_leader_count=org.actual_leader,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0003_program_remove_organization_allowed_programs_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='approved_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='role_member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='role_officer_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='role_leader_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+import organization.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0006_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='organization',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, upload_to='organization_profiles/', validators=[organization.validators.validate_image_upload]),
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations, models
+
+import organization.models
+
+# Frozen copy of ROLE_RANKS at the time of this migration.
+RANKS = {'member': 1, 'officer': 2, 'leader': 3}
+
+
+def roles_to_ranks(apps, schema_editor):
+    OrganizationMember = apps.get_model('organization', 'OrganizationMember')
+    # Anything unrecognised stays a member (the new column's default).
+    for role, rank in RANKS.items():
+        OrganizationMember.objects.filter(role__iexact=role).update(role_rank=rank)
+
+
+def ranks_to_roles(apps, schema_editor):
+    OrganizationMember = apps.get_model('organization', 'OrganizationMember')
+    for role, rank in RANKS.items():
+        OrganizationMember.objects.filter(role_rank=rank).update(role=role)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0009_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organizationmember',
+            name='role_rank',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.RunPython(roles_to_ranks, ranks_to_roles),
+        migrations.RemoveField(
+            model_name='organizationmember',
+            name='role',
+        ),
+        migrations.RenameField(
+            model_name='organizationmember',
+            old_name='role_rank',
+            new_name='role',
+        ),
+        migrations.AlterField(
+            model_name='organizationmember',
+            name='role',
+            field=organization.models.RoleField(choices=[('member', 'Member'), ('officer', 'Officer'), ('leader', 'Leader')], default='member'),
+        ),
+        migrations.AddIndex(
+            model_name='organizationmember',
+            index=models.Index(fields=['organization', 'is_approved', 'role'], name='orgmember_org_appr_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organizationmember',
+            index=models.Index(fields=['student', 'is_approved'], name='orgmember_student_appr_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0010_role_rank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organizationmember',
+            name='review_locked_by',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='organizationmember',
+            name='review_locked_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='organizationmember',
+            index=models.Index(condition=models.Q(('is_approved', False)), fields=['organization', 'date_joined', 'id'], name='orgmember_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_eligibility(apps, schema_editor):
+    Organization = apps.get_model('organization', 'Organization')
+    OrganizationEligibility = apps.get_model('organization', 'OrganizationEligibility')
+    Through = Organization.allowed_programs.through
+    public = set(Organization.objects.filter(is_public=True).values_list('pk', flat=True))
+    rows = [OrganizationEligibility(organization_id=org_id, program=None) for org_id in public]
+    rows += [
+        OrganizationEligibility(organization_id=org_id, program_id=program_id)
+        for org_id, program_id in Through.objects.exclude(organization_id__in=public)
+        .values_list('organization_id', 'program_id')
+    ]
+    OrganizationEligibility.objects.bulk_create(rows, batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0011_review_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationEligibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eligibility', to='organization.organization')),
+                ('program', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='organization.program')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['program', 'organization'], name='orgeligibility_program_idx')],
+                'constraints': [models.UniqueConstraint(fields=('organization', 'program'), name='orgeligibility_org_program_uniq')],
+            },
+        ),
+        migrations.RunPython(build_eligibility, migrations.RunPython.noop),
+    ]
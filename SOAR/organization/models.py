@@ -1,8 +1,22 @@
 import uuid
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils.functional import cached_property
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.contrib.postgres.fields import ArrayField
-from organization.validators import validate_image_file_type, validate_image_file_size
+# validate_image_file_type/_size are referenced by migration 0001.
+from organization.validators import validate_image_file_size, validate_image_file_type, validate_image_upload  # noqa: F401
+from organization.counters import (
+    COUNTER_FIELDS, apply_counter_deltas, flush_cascaded_memberships, in_membership_batch, membership_counter_deltas,
+    record_cascaded_membership, record_deleted_membership,
+)
+from organization.eligibility import refresh_eligibility
+from organization.fragments import bump_cache_version, version_bump
+from organization.images import DERIVATIVE_FIELDS, schedule_derivatives
+from organization.reference import bump_programs_version
 
 class Program(models.Model):
     abbreviation = models.CharField(max_length=10, unique=True)
@@ -11,6 +25,27 @@ class Program(models.Model):
     def __str__(self):
         return self.abbreviation
 
+    @classmethod
+    def for_course(cls, course):
+        """The program a free-text course names (case-insensitive), or None."""
+        course = (course or '').strip()
+        if not course:
+            return None
+        return cls.objects.filter(name__iexact=course).order_by('pk').first()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Compared by the post_save receiver to skip work when nothing it depends on changed.
+        instance._loaded_names = (instance.__dict__.get('abbreviation'), instance.__dict__.get('name'))
+        return instance
+
+    def delete(self, *args, **kwargs):
+        org_ids = list(self.organization_set.values_list('pk', flat=True))
+        result = super().delete(*args, **kwargs)
+        bump_cache_version(org_ids)
+        return result
+
 class Organization(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255, unique=True)
@@ -27,8 +62,11 @@ class Organization(models.Model):
         upload_to='organization_profiles/',
         null=True,
         blank=True,
-        validators=[validate_image_file_type, validate_image_file_size]
+        validators=[validate_image_upload]
     )
+    # Filled in by the derivative worker (see organization/images.py).
+    profile_picture_hash = models.CharField(max_length=64, blank=True, editable=False)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     is_public = models.BooleanField(
         default=True,
@@ -42,10 +80,72 @@ class Organization(models.Model):
         )
 
     date_created = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Denormalized membership counters (organization.counters). Kept current by
+    # OrganizationMember.save() and its post_delete receiver; queryset update()s bypass
+    # them, so `manage.py reconcile_member_counters` must be scheduled to repair drift.
+    approved_count = models.PositiveIntegerField(default=0, editable=False)
+    pending_count = models.PositiveIntegerField(default=0, editable=False)
+    role_member_count = models.PositiveIntegerField(default=0, editable=False)
+    role_officer_count = models.PositiveIntegerField(default=0, editable=False)
+    role_leader_count = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped whenever anything shown on cached organization fragments changes (organization.fragments).
+    cache_version = models.PositiveIntegerField(default=1, editable=False)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Never write back counters loaded earlier; they are only changed through F() updates.
+        # Derivative fields and cache_version belong to the image worker and F() bumps the same way.
+        adding = self._state.adding
+        if not adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in COUNTER_FIELDS + DERIVATIVE_FIELDS + ('cache_version',)
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Compared by the post_save receiver: eligibility only depends on is_public here.
+        instance._loaded_is_public = instance.__dict__.get('is_public')
+        return instance
+
+
+class OrganizationEligibility(models.Model):
+    """Precomputed "students of ``program`` may join ``organization``" (organization.eligibility).
+
+    ``program`` is NULL for public organizations: anyone may join.
+    """
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='eligibility')
+    program = models.ForeignKey(Program, on_delete=models.CASCADE, null=True, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['organization', 'program'], name='orgeligibility_org_program_uniq'),
+        ]
+        indexes = [
+            # "Everything program X (or anyone) may join."
+            models.Index(fields=['program', 'organization'], name='orgeligibility_program_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.program_id or 'anyone'} -> {self.organization_id}"
+
+
+class ImageDerivativeSet(models.Model):
+    """Rendered sizes of one uploaded image, keyed by the SHA-256 of its bytes."""
+    hash = models.CharField(max_length=64, unique=True)
+    original = models.CharField(max_length=255, help_text="Storage path of the first upload with these bytes.")
+    variants = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.hash
+
 ROLE_MEMBER = "member"
 ROLE_OFFICER = "officer"
 ROLE_LEADER = "leader"
@@ -54,72 +154,313 @@ ROLE_CHOICES = [
     (ROLE_OFFICER, "Officer"),
     (ROLE_LEADER, "Leader"),
 ]
+ROLE_ORDER = [ROLE_MEMBER, ROLE_OFFICER, ROLE_LEADER]
+# Stored ranks: comparisons like role__gte=ROLE_OFFICER are index range scans.
+ROLE_RANKS = {role: rank for rank, role in enumerate(ROLE_ORDER, start=1)}
+RANK_ROLES = {rank: role for role, rank in ROLE_RANKS.items()}
+
+
+def role_rank(role):
+    """Rank of ``role`` ("leader", "Leader" or a rank number); raises ValueError if unknown."""
+    if isinstance(role, int) and role in RANK_ROLES:
+        return role
+    rank = ROLE_RANKS.get(str(role).strip().lower())
+    if rank is None:
+        raise ValueError(f"Unknown role '{role}'.")
+    return rank
+
+
+class RoleField(models.PositiveSmallIntegerField):
+    """A role stored as its rank (member 1 < officer 2 < leader 3).
+
+    Python code, forms, serializers and templates keep seeing the lowercase
+    role names (ROLE_MEMBER, ...). Lookups take names too:
+    ``filter(role__gte=ROLE_OFFICER)`` means "officers and above".
+    """
+
+    @cached_property
+    def validators(self):
+        # Skip IntegerField's numeric range validators; values are role names here.
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else RANK_ROLES.get(value, value)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        try:
+            return RANK_ROLES[role_rank(value)]
+        except ValueError as e:
+            raise ValidationError(str(e), code='invalid')
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        return None if value is None else role_rank(value)
+
+
+def promoted_role(role):
+    """Return the role one step above ``role`` (Member → Officer → Leader)."""
+    position = ROLE_ORDER.index(str(role).lower()) if str(role).lower() in ROLE_ORDER else 0
+    if position == len(ROLE_ORDER) - 1:
+        raise ValueError("Cannot promote further; already a Leader.")
+    return ROLE_ORDER[position + 1]
+
+
+def demoted_role(role):
+    """Return the role one step below ``role`` (Leader → Officer → Member)."""
+    position = ROLE_ORDER.index(str(role).lower()) if str(role).lower() in ROLE_ORDER else 0
+    if position == 0:
+        raise ValueError("Cannot demote further; already a Member.")
+    return ROLE_ORDER[position - 1]
 
 class OrganizationMember(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="members")
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="organizations_joined")
-    role = models.CharField(max_length=50, choices=ROLE_CHOICES, default=ROLE_MEMBER)
+    role = RoleField(choices=ROLE_CHOICES, default=ROLE_MEMBER)
     date_joined = models.DateTimeField(auto_now_add=True)
     is_approved = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Review-queue lease on a pending request (see organization/review.py).
+    review_locked_by = models.CharField(max_length=100, blank=True, editable=False)
+    review_locked_until = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = ('organization', 'student')
+        indexes = [
+            # Keyset pagination order for member listings.
+            models.Index(fields=['organization', 'date_joined', 'id'], name='orgmember_org_joined_idx'),
+            models.Index(fields=['date_joined', 'id'], name='orgmember_joined_idx'),
+            # Max(updated_at) per organization for conditional GETs.
+            models.Index(fields=['organization', 'updated_at'], name='orgmember_org_updated_idx'),
+            # "Officers and above in org X" / "approved orgs of user Y".
+            models.Index(fields=['organization', 'is_approved', 'role'], name='orgmember_org_appr_role_idx'),
+            models.Index(fields=['student', 'is_approved'], name='orgmember_student_appr_idx'),
+            # Review queue: only pending rows, oldest first.
+            models.Index(
+                fields=['organization', 'date_joined', 'id'],
+                condition=models.Q(is_approved=False),
+                name='orgmember_pending_idx',
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.student.username} - {self.organization.name} ({self.role})"
+        # Only use related rows that are already loaded; str() must never query.
+        cls = type(self)
+        student = self.student.username if cls.student.is_cached(self) else self.student_id
+        organization = self.organization.name if cls.organization.is_cached(self) else self.organization_id
+        return f"{student} - {organization} ({self.role})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The loaded state, which the post_delete receiver counts inside membership_batch().
+        instance._counted_state = instance._counter_state()
+        return instance
+
+    def _counter_state(self):
+        state = self.__dict__
+        if not all(f in state for f in ('organization_id', 'is_approved', 'role')):
+            return None
+        return (state['organization_id'], state['is_approved'], state['role'])
+
+    def _locked_counter_state(self):
+        """The committed (organization, is_approved, role), row-locked until the transaction ends.
+
+        Two concurrent saves of the same row serialize here, so the second one
+        diffs against what the first wrote, not against a stale in-memory copy.
+        """
+        if self._state.adding:
+            return None
+        row = type(self).objects.select_for_update().filter(pk=self.pk).values_list(
+            'organization_id', 'is_approved', 'role'
+        ).first()
+        return tuple(row) if row else None
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            before = self._locked_counter_state()
+            super().save(*args, **kwargs)
+            after = self._counter_state()
+            deltas = membership_counter_deltas(before, after)
+            if deltas:
+                apply_counter_deltas(deltas)
+            else:
+                # No counter moved, but member lists (validated on cache_version) may still differ.
+                bump_cache_version([self.organization_id])
+            self._on_membership_change(before)
+        self._counted_state = after
+
+    def _on_membership_change(self, before, deleted=False):
+        from organization.roles import invalidate_membership
+        from realtime.publish import publish_organization_event
+
+        org_ids = {self.organization_id}
+        if before:
+            org_ids.add(before[0])
+        student_id = self.student_id
+        for org_id in org_ids:
+            transaction.on_commit(lambda org_id=org_id: invalidate_membership(org_id, student_id))
+
+        payload = {
+            'member_id': str(self.pk),
+            'student_id': str(student_id),
+            'is_approved': self.is_approved,
+            'role': self.role,
+            'change': 'removed' if deleted else ('joined' if before is None else 'updated'),
+        }
+        # A join request (created, changed or withdrawn while pending) is for reviewers only.
+        pending = not (before and before[1]) and (deleted or not self.is_approved)
+        publish_organization_event(self.organization_id, 'membership', payload, reviewers_only=pending)
+
+    def promote(self, promoter=None, request=None):
+        from organization.roles import is_leader
 
-    def promote(self, promoter=None):
         if not promoter:
             raise PermissionError("No promoter specified.")
 
-        # Allow admins (superuser or staff)
-        if promoter.is_superuser or promoter.is_staff:
-            allowed = True
-        else:
-            promoter_record = OrganizationMember.objects.filter(
-                organization=self.organization,
-                student=promoter
-            ).first()
-            allowed = promoter_record and promoter_record.role == "Leader"
-
-        if not allowed:
+        if not is_leader(promoter, self.organization_id, request):
             raise PermissionError("Only leaders or admins can promote members.")
 
-        # Promotion logic
-        if self.role == "Member":
-            self.role = "Officer"
-        elif self.role == "Officer":
-            self.role = "Leader"
-        else:
-            raise ValueError("Cannot promote further; already a Leader.")
-
+        self.role = promoted_role(self.role)
         self.save()
 
-    def demote(self, demoter=None):
+    def demote(self, demoter=None, request=None):
+        from organization.roles import is_leader
+
         if not demoter:
             raise PermissionError("No demoter specified.")
 
-        # Allow admins (superuser or staff)
-        if demoter.is_superuser or demoter.is_staff:
-            allowed = True
-        else:
-            demoter_record = OrganizationMember.objects.filter(
-                organization=self.organization,
-                student=demoter
-            ).first()
-            allowed = demoter_record and demoter_record.role == "Leader"
-
-        if not allowed:
+        if not is_leader(demoter, self.organization_id, request):
             raise PermissionError("Only leaders or admins can demote members.")
 
-        # Demotion logic
-        if self.role == "Leader":
-            self.role = "Officer"
-        elif self.role == "Officer":
-            self.role = "Member"
+        self.role = demoted_role(self.role)
+        self.save()
+
+
+@receiver(post_save, sender=Organization)
+def _organization_saved(sender, instance, created, update_fields=None, **kwargs):
+    if not created:
+        bump_cache_version([instance.pk])
+    # Eligibility follows is_public and allowed_programs; the latter has its own receiver.
+    if created:
+        public_changed = instance.is_public
+    else:
+        public_changed = (
+            (update_fields is None or 'is_public' in update_fields)
+            and getattr(instance, '_loaded_is_public', None) != instance.is_public
+        )
+    if public_changed:
+        refresh_eligibility([instance.pk])
+    instance._loaded_is_public = instance.is_public
+    schedule_derivatives(instance)
+
+
+@receiver(m2m_changed, sender=Organization.allowed_programs.through)
+def _allowed_programs_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear', 'post_clear'):
+        return
+    if action == 'pre_clear':
+        if reverse:
+            # program.organization_set.clear(): remember the orgs before the rows go.
+            instance._cleared_org_ids = list(instance.organization_set.values_list('pk', flat=True))
         else:
-            raise ValueError("Cannot demote further; already a Member.")
+            # Views clear() the programs of every public organization they save; usually there are none.
+            instance._cleared_org_ids = [instance.pk] if instance.allowed_programs.exists() else []
+        return
+    if action == 'post_clear':
+        org_ids = getattr(instance, '_cleared_org_ids', [])
+    elif not reverse:
+        org_ids = [instance.pk]
+    else:
+        org_ids = pk_set or []
+    bump_cache_version(org_ids)
+    refresh_eligibility(org_ids)
 
-        self.save()
 
+@receiver(post_save, sender=Program)
+def _program_saved(sender, instance, created, **kwargs):
+    from accounts.models import link_course_programs
+
+    names = (instance.abbreviation, instance.name)
+    loaded = getattr(instance, '_loaded_names', (None, None))
+    if not created and loaded == names:
+        return
+    if not created:
+        bump_cache_version(instance.organization_set.values_list('pk', flat=True))
+    if created or loaded[1] != instance.name:
+        # Students whose course names this program and who aren't linked yet.
+        link_course_programs(get_user_model().objects.filter(program__isnull=True, course__iexact=instance.name))
+    instance._loaded_names = names
+
+
+@receiver(post_save, sender=Program)
+@receiver(post_delete, sender=Program)
+def _program_changed(sender, **kwargs):
+    # Workers reload their cached programs on next read (organization.reference).
+    transaction.on_commit(bump_programs_version)
+
+
+# Deletes go through receivers rather than delete() so queryset deletes and cascades
+# (e.g. deleting a User) are counted too.
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def _student_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Member lists show the username, and their validators are the organization's cache_version.
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    Organization.objects.filter(members__student=instance).update(**version_bump())
+
+
+def _cascade_model(origin):
+    """The model a cascade delete started from, or None when memberships are deleted directly."""
+    if origin is None:
+        return None
+    model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    return None if model is OrganizationMember else model
+
+
+@receiver(pre_delete, sender=OrganizationMember)
+def _lock_deleted_membership(sender, instance, origin=None, **kwargs):
+    if in_membership_batch():
+        return  # The batch's caller already holds the row locks.
+    if _cascade_model(origin) is not None:
+        return  # Counted together once the origin is deleted; see flush_cascaded_memberships().
+    row = OrganizationMember.objects.select_for_update().filter(pk=instance.pk).values_list(
+        'organization_id', 'is_approved', 'role'
+    ).first()
+    # None: another transaction deleted it first and already counted it.
+    instance._counted_state = tuple(row) if row else None
+
+
+@receiver(post_delete, sender=OrganizationMember)
+def _membership_deleted(sender, instance, origin=None, **kwargs):
+    before = instance.__dict__.get('_counted_state', instance._counter_state())
+    instance._counted_state = None
+    if before is None or record_deleted_membership(before, instance.student_id):
+        return
+    cascade = _cascade_model(origin)
+    if cascade is not None:
+        # The organization itself going away needs no counter upkeep or event.
+        record_cascaded_membership(origin, before, instance.student_id, count=cascade is not Organization)
+        return
+    apply_counter_deltas(membership_counter_deltas(before, None))
+    instance._on_membership_change(before, deleted=True)
+
+
+@receiver(post_delete)
+def _cascade_finished(sender, origin=None, **kwargs):
+    # Dependents' post_delete signals all fire before the origin's own, so this
+    # runs once the cascade has deleted every membership it is going to.
+    if _cascade_model(origin) is not sender:
+        return
+    from realtime.publish import publish_organization_event
+
+    for org_id, removed in flush_cascaded_memberships(origin).items():
+        for approved in (True, False):
+            student_ids = [str(student_id) for student_id, is_approved in removed if is_approved == approved]
+            if student_ids:
+                publish_organization_event(org_id, 'membership', {
+                    'change': 'removed',
+                    'student_ids': student_ids,
+                }, reviewers_only=not approved)
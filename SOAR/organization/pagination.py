@@ -0,0 +1,124 @@
+import base64
+import json
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class MemberCursorPagination(BasePagination):
+    """Keyset pagination over (date_joined, id).
+
+    Every page is a single index range scan, so page 500 costs the same as
+    page 1. The total is only computed when asked for: ``?count=exact`` runs
+    a COUNT, otherwise the view may set ``count_estimate`` to a value it
+    already has for free (e.g. the organization's membership counters).
+    """
+    page_size = getattr(settings, 'MEMBER_PAGE_SIZE', 25)
+    max_page_size = getattr(settings, 'MEMBER_MAX_PAGE_SIZE', 200)
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('date_joined', 'id')
+    invalid_cursor_message = 'Invalid cursor'
+    count_estimate = None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            joined, pk, reverse = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            joined = parse_datetime(joined)
+            pk = uuid.UUID(pk)
+        except (TypeError, ValueError, AttributeError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if joined is None:
+            raise NotFound(self.invalid_cursor_message)
+        return joined, pk, bool(reverse)
+
+    def encode_cursor(self, obj, reverse):
+        payload = json.dumps([obj.date_joined.isoformat(), str(obj.pk), reverse])
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        self.base_url = request.build_absolute_uri()
+        self.size = self.get_page_size(request)
+        self.unpaged_queryset = queryset
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor[2])
+        if cursor:
+            joined, pk, _ = cursor
+            if reverse:
+                queryset = queryset.filter(Q(date_joined__lt=joined) | Q(date_joined=joined, pk__lt=pk))
+            else:
+                queryset = queryset.filter(Q(date_joined__gt=joined) | Q(date_joined=joined, pk__gt=pk))
+        order = [f'-{field}' for field in self.ordering] if reverse else list(self.ordering)
+        rows = list(queryset.order_by(*order)[:self.size + 1])
+
+        has_more = len(rows) > self.size
+        rows = rows[:self.size]
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_more
+        self.page = rows
+        return rows
+
+    def get_count(self):
+        mode = self.request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return self.unpaged_queryset.count()
+        return self.count_estimate
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.get_count()),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -1,5 +1,5 @@
 from rest_framework.permissions import BasePermission
-from .models import OrganizationMember, ROLE_OFFICER, ROLE_LEADER
+from .roles import is_admin, is_officer_or_leader
 
 class IsOrgOfficerOrAdviser(BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -12,8 +12,15 @@ class IsOrgOfficerOrAdviser(BasePermission):
             return False
         if org.adviser_id == user.id:
             return True
-        try:
-            membership = OrganizationMember.objects.get(organization=org, student=user)
-            return membership.role in [ROLE_OFFICER, ROLE_LEADER]
-        except OrganizationMember.DoesNotExist:
-            return False
+        return is_officer_or_leader(user, org, request)
+
+
+class CanManageOrganization(BasePermission):
+    """Organization writes: admins create and delete; admins and the adviser edit."""
+    def has_permission(self, request, view):
+        if view.action in ('create', 'destroy'):
+            return is_admin(request.user)
+        return True
+
+    def has_object_permission(self, request, view, obj):
+        return is_admin(request.user) or obj.adviser_id == request.user.id
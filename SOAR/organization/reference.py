@@ -0,0 +1,72 @@
+"""Process-local cache of reference data (programs).
+
+The Program table is tiny and rarely changes, yet most organization pages
+and the registration form need all of it. ``programs()`` keeps a copy in
+each process and reloads it only when the version stored in the shared
+cache under ``reference:programs:version`` changes. Program saves and
+deletes bump that version on commit (organization.models), so every
+worker reloads on its next read. That read costs one cache GET.
+
+Workers only see each other's bumps when CACHES points at a shared backend
+(Redis). With the default local-memory cache each process only sees its
+own writes, so there the copy is also reloaded once it is older than
+REFERENCE_LOCAL_TTL seconds: other workers' edits show up within that
+window. With DummyCache every read goes to the database.
+
+The returned Program instances are shared: treat them as read-only.
+Anything that writes should query the database instead.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+VERSION_KEY = 'reference:programs:version'
+
+# (version, programs ordered by pk, {pk: program}, monotonic load time); replaced whole so
+# readers never see a half-update.
+_loaded = (None, (), {}, 0.0)
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Cold or evicted key: every worker agrees on whichever token lands first.
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _load():
+    global _loaded
+    from .models import Program
+
+    # Version before rows: a bump that races the load just causes another reload.
+    version = _current_version()
+    now = time.monotonic()
+    expired = _process_local() and now - _loaded[3] > settings.REFERENCE_LOCAL_TTL
+    if version is None or version != _loaded[0] or expired:
+        rows = tuple(Program.objects.order_by('pk'))
+        _loaded = (version, rows, {program.pk: program for program in rows}, now)
+    return _loaded
+
+
+def _process_local():
+    # Other processes' bumps never reach a local-memory cache.
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def programs():
+    """Every Program, ordered by pk."""
+    return _load()[1]
+
+
+def programs_by_id():
+    return _load()[2]
+
+
+def bump_programs_version():
+    """Make every process reload programs on its next read."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
@@ -0,0 +1,125 @@
+"""Join-request review queue.
+
+Several officers can work through an organization's pending requests at
+once without stepping on each other. ``claim_reviews`` leases the oldest
+unleased requests to one reviewer. It reads them with SELECT ... FOR UPDATE
+SKIP LOCKED over orgmember_pending_idx, so concurrent claims get disjoint
+batches without waiting on each other. ``decide_reviews`` only acts on
+requests the reviewer still holds. A lease left unfinished expires after
+REVIEW_LEASE_SECONDS and the requests go back to the queue.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .bulk import BulkOperationError, apply_bulk_operation
+from .models import OrganizationMember
+
+
+def _reviewer(user):
+    return str(user.pk)
+
+
+def _claimable(now):
+    return Q(is_approved=False) & (Q(review_locked_until__isnull=True) | Q(review_locked_until__lt=now))
+
+
+def _split_ids(ids):
+    """(canonical valid ids, the rest as given), deduplicated, in request order."""
+    valid, invalid = [], []
+    for pk in dict.fromkeys(str(pk) for pk in ids):
+        try:
+            valid.append(str(uuid.UUID(pk)))
+        except ValueError:
+            invalid.append(pk)
+    return valid, invalid
+
+
+def _held_by(user, now):
+    return Q(is_approved=False, review_locked_by=_reviewer(user), review_locked_until__gte=now)
+
+
+def leased_reviews(user, organization):
+    """The pending requests ``user`` currently holds in ``organization``, oldest first."""
+    return (
+        OrganizationMember.objects.filter(_held_by(user, timezone.now()), organization=organization)
+        .select_related('student')
+        .order_by('date_joined', 'id')
+    )
+
+
+def claim_reviews(user, organization, batch_size=20):
+    """Lease up to ``batch_size`` pending requests to ``user`` and return everything they hold.
+
+    Requests the reviewer already holds count toward the batch and have their
+    lease renewed, so calling this again (e.g. after a page reload) is safe.
+    """
+    now = timezone.now()
+    until = now + timedelta(seconds=settings.REVIEW_LEASE_SECONDS)
+    batch_size = max(1, min(batch_size, settings.REVIEW_MAX_BATCH))
+    with transaction.atomic():
+        held = OrganizationMember.objects.filter(_held_by(user, now), organization=organization)
+        renewed = held.update(review_locked_until=until)
+        wanted = batch_size - renewed
+        if wanted > 0:
+            ids = list(
+                OrganizationMember.objects.select_for_update(skip_locked=True)
+                .filter(_claimable(now), organization=organization)
+                .order_by('date_joined', 'id')
+                .values_list('id', flat=True)[:wanted]
+            )
+            # Re-check the claim condition so backends without row locks (SQLite) cannot double-claim.
+            OrganizationMember.objects.filter(_claimable(now), id__in=ids).update(
+                review_locked_by=_reviewer(user), review_locked_until=until,
+            )
+    return list(leased_reviews(user, organization)), until
+
+
+def release_reviews(user, organization, member_ids=None):
+    """Give back ``user``'s leases (all of them, or just ``member_ids``). Returns how many.
+
+    Raises BulkOperationError if any of ``member_ids`` isn't a member id.
+    """
+    leases = OrganizationMember.objects.filter(
+        organization=organization, is_approved=False, review_locked_by=_reviewer(user),
+    )
+    if member_ids is not None:
+        member_ids, invalid = _split_ids(member_ids)
+        if invalid:
+            raise BulkOperationError(f"Not a member id: {', '.join(invalid)}.")
+        leases = leases.filter(id__in=member_ids)
+    return leases.update(review_locked_by='', review_locked_until=None)
+
+
+def decide_reviews(user, organization, approve=(), reject=(), request=None):
+    """Approve/reject requests ``user`` holds a live lease on.
+
+    Returns per-id results in the shape of apply_bulk_operation(). Ids the
+    reviewer doesn't hold (never claimed, lease expired and taken by someone
+    else, or already decided) and malformed ids come back as errors and are
+    left untouched.
+    """
+    (approve, bad_approve), (reject, bad_reject) = _split_ids(approve), _split_ids(reject)
+    results = [{'id': pk, 'status': 'error', 'error': 'Member not found.'} for pk in bad_approve + bad_reject]
+    with transaction.atomic():
+        held = {
+            str(pk) for pk in OrganizationMember.objects.select_for_update()
+            .filter(_held_by(user, timezone.now()), organization=organization, id__in=approve + reject)
+            .values_list('id', flat=True)
+        }
+        for operation, ids in (('approve', approve), ('reject', reject)):
+            mine = [pk for pk in ids if pk in held]
+            results += [
+                {'id': pk, 'status': 'error', 'error': 'Not claimed by you, or the lease expired.'}
+                for pk in ids if pk not in held
+            ]
+            if mine:
+                results += apply_bulk_operation(user, operation, mine, request=request)
+        OrganizationMember.objects.filter(id__in=approve, is_approved=True).exclude(review_locked_by='').update(
+            review_locked_by='', review_locked_until=None,
+        )
+    return results
@@ -0,0 +1,156 @@
+"""Membership / role resolution with two cache layers.
+
+Lookups are memoized on the request object for the lifetime of a request,
+and shared across requests (and workers, when CACHES points at a shared
+backend) under ``orgrole:<org>:<user>:<version>`` / ``orgroles:<user>:<version>``
+keys. ``<version>`` is a per-user token stored under ``orgroles:version:<user>``.
+Invalidating replaces the token instead of deleting keys, so a reader that
+read the database before a write committed can only repopulate the old,
+no-longer-read keys.
+
+Membership saves and deletes (including queryset deletes and cascades, see
+organization.models) invalidate on commit, as do the bulk paths. A plain
+queryset ``update()`` of ``role`` or ``is_approved`` does not; it goes stale
+for at most CACHE_TIMEOUT seconds unless the caller calls
+invalidate_membership() itself.
+"""
+import uuid
+from typing import NamedTuple
+
+from django.core.cache import cache
+
+from .models import OrganizationMember, ROLE_LEADER, ROLE_OFFICER
+
+CACHE_TIMEOUT = 300
+_MISS = object()
+
+
+class Membership(NamedTuple):
+    id: str
+    role: str
+    is_approved: bool
+
+
+def _pk(obj):
+    return str(getattr(obj, 'pk', obj))
+
+
+def _version_key(user_id):
+    return f"orgroles:version:{user_id}"
+
+
+def _version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Cold or evicted: concurrent readers agree on whichever token lands first.
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def _pair_key(org_id, user_id):
+    return f"orgrole:{org_id}:{user_id}:{_version(user_id)}"
+
+
+def _user_key(user_id):
+    return f"orgroles:{user_id}:{_version(user_id)}"
+
+
+def _as_membership(member_id, role, is_approved):
+    return Membership(str(member_id), (role or '').lower(), is_approved)
+
+
+def _request_memo(request):
+    if request is None:
+        return None
+    memo = getattr(request, '_org_memberships', None)
+    if memo is None:
+        memo = request._org_memberships = {}
+    return memo
+
+
+def get_user_memberships(user, request=None):
+    """Return ``{org_id: Membership}`` for every organization ``user`` belongs to or requested."""
+    if not getattr(user, 'is_authenticated', False):
+        return {}
+    memo = _request_memo(request)
+    if memo is not None and '__all__' in memo:
+        return memo['__all__']
+
+    key = _user_key(user.pk)
+    memberships = cache.get(key, _MISS)
+    if memberships is _MISS:
+        rows = OrganizationMember.objects.filter(student_id=user.pk).values_list(
+            'organization_id', 'id', 'role', 'is_approved'
+        )
+        memberships = {str(org_id): _as_membership(pk, role, ok) for org_id, pk, role, ok in rows}
+        cache.set(key, memberships, CACHE_TIMEOUT)
+
+    if memo is not None:
+        memo['__all__'] = memberships
+        memo.update(memberships)
+    return memberships
+
+
+def approved_org_ids(user, request=None):
+    """Ids (as strings) of the organizations where ``user`` is an approved member."""
+    return [org_id for org_id, m in get_user_memberships(user, request).items() if m.is_approved]
+
+
+def officer_org_ids(user, request=None):
+    """Ids (as strings) of the organizations where ``user`` is an officer or leader."""
+    return [
+        org_id for org_id, m in get_user_memberships(user, request).items()
+        if m.role in (ROLE_OFFICER, ROLE_LEADER)
+    ]
+
+
+def get_membership(user, organization, request=None):
+    """Return the Membership of ``user`` in ``organization`` (object or id), or None."""
+    if not getattr(user, 'is_authenticated', False):
+        return None
+    org_id = _pk(organization)
+    memo = _request_memo(request)
+    if memo is not None:
+        if org_id in memo:
+            return memo[org_id]
+        if '__all__' in memo:
+            return None
+
+    key = _pair_key(org_id, user.pk)
+    membership = cache.get(key, _MISS)
+    if membership is _MISS:
+        row = OrganizationMember.objects.filter(organization_id=org_id, student_id=user.pk).values_list(
+            'id', 'role', 'is_approved'
+        ).first()
+        membership = _as_membership(*row) if row else None
+        cache.set(key, membership, CACHE_TIMEOUT)
+
+    if memo is not None:
+        memo[org_id] = membership
+    return membership
+
+
+def get_role(user, organization, request=None):
+    """Return the lowercase role of ``user`` in ``organization``, or None."""
+    membership = get_membership(user, organization, request)
+    return membership.role if membership else None
+
+
+def is_admin(user):
+    return bool(user.is_superuser or user.is_staff)
+
+
+def is_leader(user, organization, request=None):
+    """Admins and organization leaders."""
+    return is_admin(user) or get_role(user, organization, request) == ROLE_LEADER
+
+
+def is_officer_or_leader(user, organization, request=None):
+    return get_role(user, organization, request) in (ROLE_OFFICER, ROLE_LEADER)
+
+
+def invalidate_membership(org_id, user_id):
+    """Move ``user_id``'s lookups (in every organization) to fresh keys."""
+    cache.set(_version_key(user_id), uuid.uuid4().hex, None)
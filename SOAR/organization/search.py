@@ -0,0 +1,117 @@
+"""Ranked, typo-tolerant member search.
+
+PostgreSQL uses pg_trgm word similarity backed by GIN trigram indexes on
+accounts_user. SQLite uses the FTS5 ``accounts_user_fts`` shadow table
+(trigram tokenizer) kept in sync by triggers. Both are created by
+accounts migration 0006; if neither is available we fall back to the old
+icontains filter so search keeps working. The indexed query runs in a
+savepoint, so when it fails on PostgreSQL the fallback doesn't run in an
+aborted transaction.
+"""
+import re
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+from .models import OrganizationMember
+
+SEARCH_FIELDS = ('username', 'first_name', 'last_name')
+MIN_TRIGRAM_LENGTH = 3
+
+_fts_available = {}
+
+
+def _terms(query):
+    return [t for t in re.split(r'\W+', query.lower()) if t]
+
+
+def _prefix_search(members, terms):
+    condition = Q()
+    for term in terms:
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'student__{field}__istartswith': term})
+    return members.filter(condition).order_by('date_joined', 'id')
+
+
+def _icontains_search(members, query):
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'student__{field}__icontains': query})
+    return members.filter(condition).order_by('date_joined', 'id')
+
+
+def _postgres_search(members, query, limit):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        # `%>` operator; served by the gin_trgm_ops indexes.
+        condition |= Q(**{f'student__{field}__trigram_word_similar': query})
+    rank = Greatest(*[TrigramWordSimilarity(query, f'student__{field}') for field in SEARCH_FIELDS])
+    return list(
+        members.filter(condition).annotate(rank=rank).order_by('-rank', 'date_joined', 'id')[:limit]
+    )
+
+
+def _fts_query(terms):
+    grams = []
+    for term in terms:
+        grams.extend(term[i:i + MIN_TRIGRAM_LENGTH] for i in range(len(term) - MIN_TRIGRAM_LENGTH + 1))
+    # OR the trigrams so a typo only costs the grams it touches; bm25 ranks by overlap.
+    return ' OR '.join('"%s"' % gram.replace('"', '""') for gram in dict.fromkeys(grams))
+
+
+def _sqlite_fts_available(connection):
+    if connection.alias not in _fts_available:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'accounts_user_fts'"
+            )
+            _fts_available[connection.alias] = cursor.fetchone() is not None
+    return _fts_available[connection.alias]
+
+
+def _sqlite_search(members, organization, terms, limit, connection):
+    member_table = OrganizationMember._meta.db_table
+    org_id = OrganizationMember._meta.get_field('organization').get_db_prep_value(
+        organization.pk, connection
+    )
+    sql = (
+        f"SELECT m.id FROM accounts_user_fts "
+        f"JOIN accounts_user u ON u.rowid = accounts_user_fts.rowid "
+        f"JOIN {member_table} m ON m.student_id = u.id AND m.organization_id = %s "
+        f"WHERE accounts_user_fts MATCH %s "
+        f"ORDER BY bm25(accounts_user_fts) LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [org_id, _fts_query(terms), limit])
+        ranked_ids = [OrganizationMember._meta.pk.to_python(row[0]) for row in cursor.fetchall()]
+    by_id = {m.pk: m for m in members.filter(pk__in=ranked_ids)}
+    return [by_id[pk] for pk in ranked_ids if pk in by_id]
+
+
+def search_members(organization, members, query, limit):
+    """Return up to ``limit`` members of ``organization`` matching ``query``, best match first.
+
+    ``members`` is the base queryset (already scoped to the organization and
+    carrying any select_related the caller needs).
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    if all(len(term) < MIN_TRIGRAM_LENGTH for term in terms):
+        # Too short for trigrams: prefix match is cheap and what a typeahead wants.
+        return list(_prefix_search(members, terms)[:limit])
+
+    connection = connections[members.db]
+    try:
+        with transaction.atomic(using=members.db):
+            if connection.vendor == 'postgresql':
+                return _postgres_search(members, query, limit)
+            if connection.vendor == 'sqlite' and _sqlite_fts_available(connection):
+                return _sqlite_search(members, organization, terms, limit, connection)
+    except DatabaseError:
+        # Missing extension / tokenizer; degrade rather than fail the request.
+        pass
+    return list(_icontains_search(members, query)[:limit])
@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from .images import picture_urls
 from .models import Organization, OrganizationMember, Program
+from .reference import programs_by_id
+from .uploads import ImageUploadField
+from .validators import validate_image_upload
 
 class ProgramSerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,10 +11,28 @@ class ProgramSerializer(serializers.ModelSerializer):
         fields = ["id", "abbreviation", "name"]
 
 
+class CachedProgramField(serializers.PrimaryKeyRelatedField):
+    """Looks program ids up in the reference cache instead of one query per id."""
+
+    def to_internal_value(self, data):
+        try:
+            program = programs_by_id().get(int(data))
+        except (TypeError, ValueError):
+            program = None
+        # A miss may be a program created moments ago; let the database decide.
+        return program if program is not None else super().to_internal_value(data)
+
+
 class OrganizationSerializer(serializers.ModelSerializer):
-    allowed_programs = serializers.PrimaryKeyRelatedField(
+    allowed_programs = CachedProgramField(
         many=True, queryset=Program.objects.all(), required=False
     )
+    # Checked from the file header only; DRF's default ImageField decodes the whole image.
+    profile_picture = serializers.ImageField(
+        _DjangoImageField=ImageUploadField, required=False, allow_null=True,
+        validators=[validate_image_upload],
+    )
+    profile_picture_urls = serializers.SerializerMethodField()
     class Meta:
         model = Organization
         fields = [
@@ -18,12 +40,16 @@ class OrganizationSerializer(serializers.ModelSerializer):
             'name',
             'description',
             'profile_picture',
+            'profile_picture_urls',
             'adviser',
             'is_public',
             'allowed_programs',
             'date_created'
         ]
 
+    def get_profile_picture_urls(self, obj):
+        return picture_urls(obj)
+
     def validate_name(self, value):
         if not value.strip():
             raise serializers.ValidationError("Organization name is required")
@@ -41,3 +67,14 @@ class OrganizationMemberSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrganizationMember
         fields = ['id', 'organization', 'student', 'student_username', 'role', 'date_joined', 'is_approved']
+
+
+class PendingRequestSerializer(OrganizationMemberSerializer):
+    """A join request as shown in the review queue."""
+    student_name = serializers.CharField(source='student.get_full_name', read_only=True)
+    student_email = serializers.CharField(source='student.email', read_only=True)
+    student_course = serializers.CharField(source='student.course', read_only=True)
+    class Meta(OrganizationMemberSerializer.Meta):
+        fields = OrganizationMemberSerializer.Meta.fields + [
+            'student_name', 'student_email', 'student_course', 'review_locked_until',
+        ]
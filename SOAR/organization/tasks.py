@@ -0,0 +1,28 @@
+from django.core.mail import send_mail, send_mass_mail
+
+from taskqueue.queue import task
+
+from .images import build_derivatives
+
+
+@task
+def send_notification_email(subject, message, recipient_list):
+    # Not fail_silently: an SMTP error should surface so the queue retries it.
+    send_mail(
+        subject=subject,
+        message=message,
+        from_email=None,
+        recipient_list=recipient_list,
+    )
+
+
+@task
+def send_notification_emails(messages):
+    """Send many ``[subject, message, recipient_list]`` notifications over one connection."""
+    send_mass_mail([(subject, message, None, recipients) for subject, message, recipients in messages])
+
+
+@task
+def build_image_derivatives(model_label, pk):
+    """Hash a profile picture and render its thumb/card/full sizes (see organization.images)."""
+    build_derivatives(model_label, pk)
@@ -0,0 +1,11 @@
+from django import template
+
+from organization import images
+
+register = template.Library()
+
+
+@register.filter
+def picture_url(instance, size='thumb'):
+    """``{{ user|picture_url:"thumb" }}``: derivative URL, or the original while it is being built."""
+    return images.picture_url(instance, size)
@@ -1,3 +1,855 @@
-from django.test import TestCase
+import base64
+import csv
+import importlib
+import io
+import json
+import tempfile
+import time
+import uuid
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, models
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from django.test.utils import isolate_apps
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from SOAR.querybudget import QueryBudgetExceeded, QueryRecorder
+from taskqueue.models import Task
+from taskqueue.queue import claim, run
+
+from . import reference, roles, search
+from .eligibility import can_join, can_join_expression
+from .images import build_derivatives
+from .models import ImageDerivativeSet, Organization, OrganizationMember, Program, ROLE_MEMBER, ROLE_OFFICER
+from .roles import get_membership
+from .tasks import send_notification_emails
+from .uploads import OversizedUpload, SizeLimitedUploadHandler
+
+User = get_user_model()
+
+
+def make_user(name, **extra):
+    number = User.objects.count()
+    return User.objects.create(
+        username=name,
+        email=f'{name}@cit.edu',
+        student_id=f'00-{number // 1000:04d}-{number % 1000:03d}',
+        **extra,
+    )
+
+
+class OrganizationTestCase(TestCase):
+    """An organization with an officer, an approved member and a pending request."""
+
+    def setUp(self):
+        self.adviser = make_user('adviser')
+        self.org = Organization.objects.create(name='Chess Club', description='Chess.', adviser=self.adviser)
+        self.officer = make_user('officer')
+        self.member = make_user('member')
+        self.applicant = make_user('applicant')
+        self.outsider = make_user('outsider')
+        self.officer_membership = OrganizationMember.objects.create(
+            organization=self.org, student=self.officer, role=ROLE_OFFICER, is_approved=True,
+        )
+        self.membership = OrganizationMember.objects.create(
+            organization=self.org, student=self.member, role=ROLE_MEMBER, is_approved=True,
+        )
+        self.pending = OrganizationMember.objects.create(
+            organization=self.org, student=self.applicant, role=ROLE_MEMBER, is_approved=False,
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_login(user)
+        return client
+
+    def url(self, suffix=''):
+        return f'/organization/organizations/{self.org.pk}/{suffix}'
+
+
+class OrganizationPermissionTests(OrganizationTestCase):
+    def test_students_cannot_edit_or_delete_organizations(self):
+        client = self.client_for(self.officer)
+        self.assertEqual(client.patch(self.url(), {'description': 'Hijacked.'}, format='json').status_code, 403)
+        self.assertEqual(client.delete(self.url()).status_code, 403)
+        self.assertEqual(client.post('/organization/organizations/', {'name': 'New', 'description': 'x'},
+                                     format='json').status_code, 403)
+        self.org.refresh_from_db()
+        self.assertEqual(self.org.description, 'Chess.')
+
+    def test_adviser_can_edit_but_not_delete(self):
+        client = self.client_for(self.adviser)
+        self.assertEqual(client.patch(self.url(), {'description': 'Updated.'}, format='json').status_code, 200)
+        self.assertEqual(client.delete(self.url()).status_code, 403)
+
+    def test_admin_can_delete(self):
+        admin = make_user('admin', is_staff=True)
+        self.assertEqual(self.client_for(admin).delete(self.url()).status_code, 204)
+
+    def test_members_listing_visibility(self):
+        ids = lambda response: {row['id'] for row in response.json()['results']}  # noqa: E731
+        reviewer = self.client_for(self.officer).get(self.url('members/'))
+        self.assertEqual(ids(reviewer), {str(m.pk) for m in (self.officer_membership, self.membership, self.pending)})
+
+        member = self.client_for(self.member).get(self.url('members/'))
+        self.assertEqual(ids(member), {str(self.officer_membership.pk), str(self.membership.pk)})
+
+        self.assertEqual(self.client_for(self.applicant).get(self.url('members/')).status_code, 403)
+        self.assertEqual(self.client_for(self.outsider).get(self.url('members/')).status_code, 403)
+
+
+class ExportTests(OrganizationTestCase):
+    def export(self, user=None, **params):
+        return self.client_for(user or self.officer).get(self.url('export/'), params)
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_lists_every_member_with_a_header(self):
+        response = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(self.content(response))))
+        self.assertEqual([row['username'] for row in rows], ['officer', 'member', 'applicant'])
+        self.assertEqual(rows[0]['role'], 'officer')
+        self.assertEqual(rows[2]['is_approved'], 'False')
+
+    def test_content_disposition_names_the_organization(self):
+        response = self.export(output='jsonl')
+        filename = f'chess-club-members-{timezone.localdate():%Y%m%d}.jsonl'
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{filename}"')
+        self.assertEqual(response['Cache-Control'], 'no-store')
+
+    def test_jsonl_with_role_and_approved_filters(self):
+        response = self.export(output='jsonl', role='member', approved='true')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([(row['username'], row['role'], row['is_approved']) for row in rows],
+                         [('member', 'member', True)])
+        pending = self.content(self.export(output='jsonl', approved='false'))
+        self.assertEqual([json.loads(line)['username'] for line in pending.splitlines()], ['applicant'])
+        staff = self.content(self.export(output='jsonl', role='Officer,leader'))
+        self.assertEqual([json.loads(line)['username'] for line in staff.splitlines()], ['officer'])
+
+    def test_bad_parameters_are_rejected(self):
+        for params in ({'output': 'xlsx'}, {'role': 'president'}, {'approved': 'maybe'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.export(**params).status_code, 400)
+
+    def test_only_reviewers_can_export(self):
+        self.assertEqual(self.export(self.member).status_code, 403)
+        self.assertEqual(self.export(self.adviser).status_code, 200)
+
+    def test_spreadsheet_formulas_are_escaped(self):
+        User.objects.filter(pk=self.member.pk).update(first_name='=HYPERLINK("x")')
+        rows = list(csv.DictReader(io.StringIO(self.content(self.export()))))
+        self.assertEqual(rows[1]['first_name'], '\'=HYPERLINK("x")')
+
+
+class MemberViewSetScopeTests(OrganizationTestCase):
+    def member_url(self, member, suffix=''):
+        return f'/organization/members/{member.pk}/{suffix}'
+
+    def listed(self, user):
+        return {row['id'] for row in self.client_for(user).get('/organization/members/').json()['results']}
+
+    def test_list_is_scoped_to_own_rows_and_reviewed_organizations(self):
+        everyone = {str(m.pk) for m in (self.officer_membership, self.membership, self.pending)}
+        self.assertEqual(self.listed(self.officer), everyone)
+        self.assertEqual(self.listed(self.adviser), everyone)
+        self.assertEqual(self.listed(self.member), {str(self.membership.pk)})
+        self.assertEqual(self.listed(self.outsider), set())
+        self.assertEqual(self.client_for(self.outsider).get(self.member_url(self.pending)).status_code, 404)
+
+    def test_only_reviewers_approve_or_reject(self):
+        self.assertEqual(self.client_for(self.member).post(self.member_url(self.pending, 'approve/')).status_code, 404)
+        self.assertEqual(self.client_for(self.applicant).post(self.member_url(self.pending, 'approve/')).status_code, 403)
+        self.assertEqual(self.client_for(self.applicant).post(self.member_url(self.pending, 'reject/')).status_code, 403)
+        self.pending.refresh_from_db()
+        self.assertFalse(self.pending.is_approved)
+
+        self.assertEqual(self.client_for(self.officer).post(self.member_url(self.pending, 'approve/')).status_code, 200)
+        self.pending.refresh_from_db()
+        self.assertTrue(self.pending.is_approved)
+
+    def test_students_can_only_request_to_join_for_themselves(self):
+        client = self.client_for(self.outsider)
+        data = {'organization': str(self.org.pk), 'role': 'leader', 'is_approved': True}
+        someone = make_user('someone')
+        response = client.post('/organization/members/', {**data, 'student': str(someone.pk)}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+        response = client.post('/organization/members/', {**data, 'student': str(self.outsider.pk)}, format='json')
+        self.assertEqual(response.status_code, 201)
+        created = OrganizationMember.objects.get(pk=response.json()['id'])
+        self.assertEqual((created.role, created.is_approved), (ROLE_MEMBER, False))
+
+    def test_updates_need_a_reviewer_and_role_changes_a_leader(self):
+        own = self.client_for(self.applicant).patch(self.member_url(self.pending), {'is_approved': True}, format='json')
+        self.assertEqual(own.status_code, 403)
+        officer = self.client_for(self.officer)
+        self.assertEqual(officer.patch(self.member_url(self.membership), {'role': 'leader'}, format='json').status_code, 403)
+        self.assertEqual(officer.patch(self.member_url(self.pending), {'is_approved': True}, format='json').status_code, 200)
+        self.membership.refresh_from_db()
+        self.assertEqual(self.membership.role, ROLE_MEMBER)
+
+    def test_members_may_leave_but_not_remove_others(self):
+        self.assertEqual(self.client_for(self.officer).delete(self.member_url(self.membership)).status_code, 403)
+        self.assertEqual(self.client_for(self.member).delete(self.member_url(self.membership)).status_code, 200)
+        self.assertFalse(OrganizationMember.objects.filter(pk=self.membership.pk).exists())
+
+
+class MemberCursorPaginationTests(OrganizationTestCase):
+    def cursor(self, payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def test_pages_follow_next_links(self):
+        client = self.client_for(self.officer)
+        first = client.get(self.url('members/'), {'page_size': 2}).json()
+        self.assertEqual(len(first['results']), 2)
+        second = client.get(first['next']).json()
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next'])
+
+    def test_malformed_cursor_is_not_found(self):
+        client = self.client_for(self.officer)
+        joined = self.pending.date_joined.isoformat()
+        for cursor in ('not-base64!', self.cursor([joined, 'not-a-uuid', False]),
+                       self.cursor([joined, 7, False]), self.cursor(['yesterday', str(self.pending.pk), False])):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(client.get(self.url('members/'), {'cursor': cursor}).status_code, 404)
+
+
+
+# Declared here, not read from settings, so a change to settings.QUERY_BUDGETS can't loosen them.
+PAGE_BUDGETS = {'organization_editprofile': 5, 'membermanagement': 5}
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True, QUERY_BUDGETS=PAGE_BUDGETS)
+class QueryBudgetTests(OrganizationTestCase):
+    """The instrumentation middleware fails these requests if they go over budget."""
+
+    def add_members(self, count):
+        for i in range(count):
+            OrganizationMember.objects.create(organization=self.org, student=make_user(f'extra{i}'),
+                                              is_approved=i % 2 == 0)
+
+    def test_pages_stay_within_budget_as_members_grow(self):
+        client = self.client_for(self.officer)
+        for extra in (0, 20):
+            self.add_members(extra)
+            for url in ('/organization/profile/edit/', '/organization/members/manage/'):
+                with self.subTest(url=url, members=OrganizationMember.objects.count()):
+                    self.assertEqual(client.get(url).status_code, 200)
+
+    def test_going_over_budget_fails(self):
+        client = self.client_for(self.officer)
+        with override_settings(QUERY_BUDGETS={'membermanagement': 4}):
+            with self.assertRaises(QueryBudgetExceeded):
+                client.get('/organization/members/manage/')
+
+
+class MemberCounterTests(OrganizationTestCase):
+    def counters(self):
+        self.org.refresh_from_db()
+        return (self.org.approved_count, self.org.pending_count, self.org.role_member_count,
+                self.org.role_officer_count)
+
+    def test_counters_follow_saves(self):
+        self.assertEqual(self.counters(), (2, 1, 1, 1))
+        self.pending.is_approved = True
+        self.pending.save()
+        self.assertEqual(self.counters(), (3, 0, 2, 1))
+
+    def test_stale_double_approve_does_not_drift(self):
+        # Two requests load the same pending row and both approve it.
+        first = OrganizationMember.objects.get(pk=self.pending.pk)
+        second = OrganizationMember.objects.get(pk=self.pending.pk)
+        for copy in (first, second):
+            copy.is_approved = True
+            copy.save()
+        self.assertEqual(self.counters(), (3, 0, 2, 1))
+
+    def test_deletes_are_counted(self):
+        self.pending.delete()
+        self.assertEqual(self.counters(), (2, 0, 1, 1))
+        OrganizationMember.objects.filter(pk=self.membership.pk).delete()
+        self.assertEqual(self.counters(), (1, 0, 0, 1))
+
+    def test_stale_double_delete_does_not_drift(self):
+        stale = OrganizationMember.objects.get(pk=self.membership.pk)
+        self.membership.delete()
+        stale.delete()
+        self.assertEqual(self.counters(), (1, 1, 0, 1))
+
+    def test_cascaded_deletes_are_counted(self):
+        self.officer.delete()
+        self.applicant.delete()
+        self.assertEqual(self.counters(), (1, 0, 1, 0))
+
+    def counter_updates(self, recorder):
+        return [sql for sql in recorder.queries
+                if sql.startswith('UPDATE') and 'organization_organization' in sql and 'approved_count' in sql]
+
+    def membership_reads(self, recorder):
+        return [sql for sql in recorder.queries
+                if sql.startswith('SELECT') and 'FROM "organization_organizationmember"' in sql]
+
+    def test_user_cascade_updates_each_organization_once(self):
+        others = [Organization.objects.create(name=f'Club {n}', description='.') for n in range(3)]
+        for org in others:
+            OrganizationMember.objects.create(organization=org, student=self.member, is_approved=True)
+        recorder = QueryRecorder()
+        with mock.patch('realtime.publish.publish_organization_event') as publish, \
+                connection.execute_wrapper(recorder):
+            self.member.delete()
+        self.assertEqual(len(self.counter_updates(recorder)), 4)
+        # Only the collector's own read of the memberships; no per-row lock.
+        self.assertEqual(len(self.membership_reads(recorder)), 1)
+        self.assertEqual(publish.call_count, 4)
+        self.assertEqual(self.counters(), (1, 1, 0, 1))
+        for org in others:
+            org.refresh_from_db()
+            self.assertEqual((org.approved_count, org.role_member_count), (0, 0))
+
+    def test_organization_delete_skips_counter_upkeep(self):
+        for n in range(10):
+            OrganizationMember.objects.create(organization=self.org, student=make_user(f'extra{n}'))
+        recorder = QueryRecorder()
+        with mock.patch('realtime.publish.publish_organization_event') as publish, \
+                connection.execute_wrapper(recorder):
+            self.org.delete()
+        self.assertEqual(self.counter_updates(recorder), [])
+        self.assertEqual(len(self.membership_reads(recorder)), 1)
+        publish.assert_not_called()
+        self.assertFalse(OrganizationMember.objects.exists())
+
+    def test_reconcile_keeps_concurrent_increments(self):
+        from .counters import reconcile_member_counters
+
+        Organization.objects.filter(pk=self.org.pk).update(approved_count=7)
+        concurrent = []
+
+        def join_first(execute, sql, params, many, context):
+            # Another request counts a new approved member between the read and the write.
+            if sql.startswith('UPDATE') and not concurrent:
+                concurrent.append(sql)
+                Organization.objects.filter(pk=self.org.pk).update(approved_count=F('approved_count') + 1)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(join_first):
+            self.assertEqual(reconcile_member_counters(), 1)
+        self.assertEqual(self.counters(), (3, 1, 1, 1))
+
+    def test_bulk_reject_and_remove(self):
+        from .bulk import apply_bulk_operation
+
+        results = apply_bulk_operation(self.officer, 'reject', [str(self.pending.pk)])
+        self.assertEqual(results[0]['status'], 'removed')
+        self.assertEqual(self.counters(), (2, 0, 1, 1))
+        apply_bulk_operation(make_user('admin', is_staff=True), 'remove', [str(self.membership.pk)])
+        self.assertEqual(self.counters(), (1, 0, 0, 1))
+
+
+@override_settings(TASK_QUEUE_EAGER=False)
+class BulkOperationTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.second_pending = OrganizationMember.objects.create(
+            organization=self.org, student=make_user('applicant2'), role=ROLE_MEMBER, is_approved=False,
+        )
+
+    def bulk(self, user, operation, members):
+        ids = [str(getattr(member, 'pk', member)) for member in members]
+        return self.client_for(user).post('/organization/members/bulk/',
+                                          {'operation': operation, 'member_ids': ids}, format='json')
+
+    def counters(self):
+        self.org.refresh_from_db()
+        return self.org.approved_count, self.org.pending_count
+
+    def test_permission_is_checked_before_anything_changes(self):
+        self.assertEqual(self.bulk(self.member, 'approve', [self.pending]).status_code, 403)
+        self.assertEqual(self.bulk(self.officer, 'promote', [self.membership]).status_code, 403)
+        self.pending.refresh_from_db()
+        self.membership.refresh_from_db()
+        self.assertFalse(self.pending.is_approved)
+        self.assertEqual(self.membership.role, ROLE_MEMBER)
+        self.assertFalse(Task.objects.exists())
+
+    def test_mixed_batch_reports_each_member(self):
+        missing = uuid.uuid4()
+        response = self.bulk(self.officer, 'approve', [self.pending, self.membership, missing, 'not-an-id'])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['succeeded'], body['failed']), (1, 3))
+        self.assertEqual([(r['status'], r.get('error')) for r in body['results']], [
+            ('success', None), ('error', 'Already approved.'),
+            ('error', 'Member not found.'), ('error', 'Member not found.'),
+        ])
+        self.assertEqual(self.counters(), (3, 1))
+
+        response = self.bulk(self.officer, 'reject', [self.second_pending, self.pending])
+        self.assertEqual([r['status'] for r in response.json()['results']], ['removed', 'error'])
+        self.assertFalse(OrganizationMember.objects.filter(pk=self.second_pending.pk).exists())
+        self.assertEqual(self.counters(), (3, 0))
+
+    def test_already_processed_ids_are_errors(self):
+        self.bulk(self.officer, 'reject', [self.pending])
+        results = self.bulk(self.officer, 'approve', [self.pending]).json()['results']
+        self.assertEqual(results, [{'id': str(self.pending.pk), 'status': 'error', 'error': 'Member not found.'}])
+
+    def test_members_of_different_organizations_are_refused(self):
+        other = Organization.objects.create(name='Go Club', description='.')
+        stranger = OrganizationMember.objects.create(organization=other, student=self.outsider)
+        self.assertEqual(self.bulk(self.officer, 'approve', [self.pending, stranger]).status_code, 400)
+
+    def test_notifications_go_out_as_one_mass_mail_job(self):
+        requests = [self.pending, self.second_pending, OrganizationMember.objects.create(
+            organization=self.org, student=make_user('applicant3'),
+        )]
+        self.bulk(self.officer, 'approve', requests)
+        [job] = Task.objects.all()
+        self.assertEqual(job.name, send_notification_emails.task_name)
+        [claimed] = claim('worker')
+        self.assertTrue(run(claimed))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         sorted(member.student.email for member in requests))
+
+
+class MemberListValidatorTests(OrganizationTestCase):
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_student_changes_invalidate_member_lists(self):
+        client = self.client_for(self.officer)
+        for url in (self.url('members/'), '/organization/members/', f'/organization/members/{self.membership.pk}/'):
+            with self.subTest(url=url):
+                first = client.get(url)
+                self.assertEqual(first.status_code, 200)
+                self.assertEqual(self.revalidate(client, url, first).status_code, 304)
+
+                self.member.username = f'renamed-{len(url)}'
+                self.member.save()
+                second = self.revalidate(client, url, first)
+                self.assertEqual(second.status_code, 200)
+                self.assertIn(self.member.username, second.content.decode())
+
+    def test_membership_changes_invalidate_member_lists(self):
+        client = self.client_for(self.officer)
+        urls = (self.url('members/'), '/organization/members/')
+        first = [client.get(url) for url in urls]
+        self.pending.is_approved = True
+        self.pending.save()
+        for url, response in zip(urls, first):
+            with self.subTest(url=url):
+                self.assertEqual(self.revalidate(client, url, response).status_code, 200)
+
+    def test_not_modified_does_not_scan_memberships(self):
+        client = self.client_for(self.officer)
+        for url in (self.url('members/'), '/organization/members/'):
+            with self.subTest(url=url):
+                first = client.get(url)
+                recorder = QueryRecorder()
+                with connection.execute_wrapper(recorder):
+                    self.assertEqual(self.revalidate(client, url, first).status_code, 304)
+                self.assertFalse([sql for sql in recorder.queries if 'organizationmember' in sql.lower()])
+
+
+class ReviewQueueTests(OrganizationTestCase):
+    def post(self, suffix, data):
+        return self.client_for(self.officer).post(self.url(f'review-queue/{suffix}/'), data, format='json')
+
+    def test_claim_and_decide(self):
+        claimed = self.post('claim', {}).json()['results']
+        self.assertEqual([row['id'] for row in claimed], [str(self.pending.pk)])
+        response = self.post('decide', {'approve': [str(self.pending.pk)]})
+        self.assertEqual(response.json()['succeeded'], 1)
+        self.pending.refresh_from_db()
+        self.assertTrue(self.pending.is_approved)
+
+    def test_malformed_ids_are_per_id_errors(self):
+        self.post('claim', {})
+        response = self.post('decide', {'approve': ['not-a-uuid', str(self.pending.pk)], 'reject': [7]})
+        self.assertEqual(response.status_code, 200)
+        results = {row['id']: row['status'] for row in response.json()['results']}
+        self.assertEqual(results, {'not-a-uuid': 'error', '7': 'error', str(self.pending.pk): 'success'})
+
+    def test_release_rejects_malformed_ids(self):
+        self.post('claim', {})
+        self.assertEqual(self.post('release', {'member_ids': ['not-a-uuid']}).status_code, 400)
+        response = self.post('release', {'member_ids': [str(self.pending.pk)]})
+        self.assertEqual(response.json()['released'], 1)
+
+
+class MembershipCacheTests(OrganizationTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def test_saves_and_cascades_invalidate(self):
+        self.assertFalse(get_membership(self.applicant, self.org).is_approved)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending.is_approved = True
+            self.pending.save()
+        self.assertTrue(get_membership(self.applicant, self.org).is_approved)
+
+        self.assertIsNotNone(get_membership(self.member, self.org))
+        with self.captureOnCommitCallbacks(execute=True):
+            OrganizationMember.objects.filter(pk=self.membership.pk).delete()
+        self.assertIsNone(get_membership(self.member, self.org))
+
+    def test_slow_reader_cannot_repopulate_after_invalidation(self):
+        # A reader picks its key and reads the database before the write commits...
+        stale_key = roles._pair_key(self.org.pk, self.applicant.pk)
+        stale = get_membership(self.applicant, self.org)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending.is_approved = True
+            self.pending.save()
+        # ...and stores its stale row after the on-commit invalidation.
+        cache.set(stale_key, stale, roles.CACHE_TIMEOUT)
+        self.assertTrue(get_membership(self.applicant, self.org).is_approved)
+
+
+class FragmentCacheTests(OrganizationTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def render(self):
+        org = Organization.objects.get(pk=self.org.pk)
+        return org.cache_version, render_to_string('organization/org_card.html', {'org': org})
+
+    def test_membership_changes_invalidate_the_card(self):
+        version, card = self.render()
+        self.assertIn('2 members', card)
+
+        self.pending.is_approved = True
+        self.pending.save()
+        new_version, card = self.render()
+        self.assertGreater(new_version, version)
+        self.assertIn('3 members', card)
+
+        self.membership.delete()
+        version, card = self.render()
+        self.assertGreater(version, new_version)
+        self.assertIn('2 members', card)
+
+    def test_organization_changes_invalidate_the_card(self):
+        version, card = self.render()
+        # Changes that skip the bump keep serving the cached fragment.
+        Organization.objects.filter(pk=self.org.pk).update(description='Stale.')
+        self.assertEqual(self.render(), (version, card))
+
+        self.org.refresh_from_db()
+        self.org.description = 'Chess and checkers.'
+        self.org.save()
+        new_version, card = self.render()
+        self.assertGreater(new_version, version)
+        self.assertIn('Chess and checkers.', card)
+
+
+class MemberSearchTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict(search._fts_available, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for first, last in (('Alexander', 'Reyes'), ('Alexandra', 'Cruz'), ('Bea', 'Santos')):
+            student = make_user(first.lower(), first_name=first, last_name=last)
+            OrganizationMember.objects.create(organization=self.org, student=student, is_approved=True)
+
+    def search(self, query):
+        members = OrganizationMember.objects.filter(organization=self.org).select_related('student')
+        return [m.student.first_name for m in search.search_members(self.org, members, query, limit=10)]
+
+    def install_fts(self):
+        # SQLite test databases are built from the models, without accounts migration 0006.
+        migration = importlib.import_module('accounts.migrations.0006_user_search_indexes')
+        with connection.cursor() as cursor:
+            for statement in migration.SQLITE_FORWARD:
+                cursor.execute(statement)
+
+    def test_short_terms_match_prefixes(self):
+        self.assertEqual(self.search('be'), ['Bea'])
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite FTS5 index')
+    def test_sqlite_index_ranks_typos(self):
+        self.install_fts()
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            results = self.search('alexnder')
+        self.assertEqual(results, ['Alexander', 'Alexandra'])
+        self.assertTrue([sql for sql in recorder.queries if 'accounts_user_fts' in sql])
+
+    def test_without_an_index_falls_back_to_substring_match(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest('PostgreSQL always has the trigram index')
+        self.assertEqual(self.search('xand'), ['Alexander', 'Alexandra'])
+        self.assertEqual(self.search('alexnder'), [])
+
+    def test_failed_index_query_falls_back_in_a_usable_transaction(self):
+        def broken(*args):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT * FROM organization_search_missing')
+
+        with mock.patch.object(search, '_postgres_search', broken), \
+                mock.patch.object(search, '_sqlite_search', broken), \
+                mock.patch.object(search, '_sqlite_fts_available', return_value=True):
+            self.assertEqual(self.search('xand'), ['Alexander', 'Alexandra'])
+        # On PostgreSQL this fails if the error aborted the test's transaction.
+        self.assertEqual(OrganizationMember.objects.filter(organization=self.org).count(), 6)
+
+
+class RoleFieldTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.leader_membership = OrganizationMember.objects.create(
+            organization=self.org, student=make_user('leader'), role='Leader', is_approved=True,
+        )
+
+    def test_names_map_to_ranks(self):
+        field = OrganizationMember._meta.get_field('role')
+        self.assertEqual([field.get_prep_value(role) for role in ('member', 'Officer', 'LEADER', 3)], [1, 2, 3, 3])
+        self.assertEqual([field.to_python(value) for value in ('Leader', 2, ' member ', None)],
+                         ['leader', 'officer', 'member', None])
+        self.assertEqual(field.from_db_value(2, None, connection), 'officer')
+
+    def test_unknown_roles_are_validation_errors(self):
+        field = OrganizationMember._meta.get_field('role')
+        for value in ('president', 0, 4):
+            with self.subTest(value=value), self.assertRaises(ValidationError):
+                field.to_python(value)
+        self.membership.role = 'president'
+        with self.assertRaises(ValidationError) as raised:
+            self.membership.full_clean()
+        self.assertIn('role', raised.exception.message_dict)
+
+    def test_round_trip_stores_the_rank(self):
+        self.leader_membership.refresh_from_db()
+        self.assertEqual(self.leader_membership.role, 'leader')
+        stored = OrganizationMember.objects.filter(pk=self.leader_membership.pk).values_list(
+            Cast('role', IntegerField()), flat=True,
+        ).get()
+        self.assertEqual(stored, 3)
+
+    def test_lookups_compare_ranks(self):
+        members = OrganizationMember.objects.filter(organization=self.org)
+        names = lambda queryset: sorted(m.student.username for m in queryset)  # noqa: E731
+        self.assertEqual(names(members.filter(role__gte=ROLE_OFFICER)), ['leader', 'officer'])
+        self.assertEqual(names(members.filter(role__lt='Officer')), ['applicant', 'member'])
+        self.assertEqual(names(members.filter(role__in=['leader', 'Member'])), ['applicant', 'leader', 'member'])
+        self.assertEqual(members.order_by('-role').first().pk, self.leader_membership.pk)
+
+    @isolate_apps('organization')
+    def test_migration_maps_legacy_names_case_insensitively(self):
+        migration = importlib.import_module('organization.migrations.0010_role_rank')
+
+        class LegacyMember(models.Model):
+            role = models.CharField(max_length=20)
+            role_rank = models.PositiveSmallIntegerField(default=1)
+
+            class Meta:
+                app_label = 'organization'
+                db_table = 'organization_legacymember_test'
+
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE organization_legacymember_test '
+                           '(id integer PRIMARY KEY, role varchar(20), role_rank smallint DEFAULT 1)')
+        legacy_apps = mock.Mock(get_model=mock.Mock(return_value=LegacyMember))
+        for role in ('Leader', 'OFFICER', 'member', 'President'):
+            LegacyMember.objects.create(role=role)
+
+        migration.roles_to_ranks(legacy_apps, None)
+        ranks = dict(LegacyMember.objects.values_list('role', 'role_rank'))
+        self.assertEqual(ranks, {'Leader': 3, 'OFFICER': 2, 'member': 1, 'President': 1})
+
+        migration.ranks_to_roles(legacy_apps, None)
+        self.assertEqual(sorted(LegacyMember.objects.values_list('role', flat=True)),
+                         ['leader', 'member', 'member', 'officer'])
+
+
+class ImageUploadTests(OrganizationTestCase):
+    def test_stored_picture_is_not_revalidated(self):
+        # The file was removed from storage; editing the organization must still validate.
+        Organization.objects.filter(pk=self.org.pk).update(profile_picture='organization_profiles/missing.png')
+        self.org.refresh_from_db()
+        self.org.description = 'Chess and checkers.'
+        self.org.full_clean()
+
+    def test_new_upload_is_checked(self):
+        self.org.profile_picture = SimpleUploadedFile('logo.png', b'not an image', content_type='image/png')
+        with self.assertRaises(ValidationError) as raised:
+            self.org.full_clean()
+        self.assertIn('profile_picture', raised.exception.message_dict)
+
+    def handler_for(self, field_name):
+        handler = SizeLimitedUploadHandler()
+        handler.new_file(field_name, 'upload.bin', 'application/octet-stream', None)
+        return handler
+
+    @override_settings(IMAGE_MAX_UPLOAD_SIZE=4, UPLOAD_SIZE_LIMITS={'roster': 8})
+    def test_size_limit_applies_to_image_fields_only(self):
+        image = self.handler_for('profile_picture')
+        self.assertIsNone(image.receive_data_chunk(b'12345', 0))
+        self.assertIsInstance(image.file_complete(5), OversizedUpload)
+
+        roster = self.handler_for('roster')
+        self.assertEqual(roster.receive_data_chunk(b'12345', 0), b'12345')
+        self.assertIsNone(roster.receive_data_chunk(b'6789', 5))
+
+        other = self.handler_for('attachment')
+        self.assertEqual(other.receive_data_chunk(b'12345', 0), b'12345')
+        self.assertIsNone(other.file_complete(5))
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.png = io.BytesIO()
+        Image.new('RGB', (8, 8), 'red').save(self.png, 'PNG')
+
+    def upload(self, name):
+        org = Organization.objects.create(name=name, description='.')
+        org.profile_picture.save(f'{name}.png', ContentFile(self.png.getvalue()))
+        return org
+
+    def build(self, org, execute=True):
+        with self.captureOnCommitCallbacks(execute=execute):
+            build_derivatives(Organization._meta.label, org.pk)
+        org.refresh_from_db()
+        return org.profile_picture.name
+
+    def test_duplicate_upload_reuses_the_first_copy(self):
+        first = self.build(self.upload('first'))
+        second = self.upload('second')
+        upload = second.profile_picture.name
+        self.assertEqual(self.build(second), first)
+        self.assertFalse(default_storage.exists(upload))
+        self.assertEqual(second.profile_picture_variants['source'], first)
+
+    def test_duplicate_is_deleted_only_after_commit(self):
+        self.build(self.upload('first'))
+        second = self.upload('second')
+        upload = second.profile_picture.name
+        self.build(second, execute=False)
+        self.assertTrue(default_storage.exists(upload))
+
+    def test_missing_original_is_replaced_by_the_new_upload(self):
+        first = self.build(self.upload('first'))
+        default_storage.delete(first)
+        second = self.upload('second')
+        upload = second.profile_picture.name
+        self.assertEqual(self.build(second), upload)
+        self.assertTrue(default_storage.exists(upload))
+        self.assertEqual(ImageDerivativeSet.objects.get().original, upload)
+
+    def test_upload_still_referenced_elsewhere_is_kept(self):
+        self.build(self.upload('first'))
+        second = self.upload('second')
+        upload = second.profile_picture.name
+        third = Organization.objects.create(name='third', description='.', profile_picture=upload)
+        self.build(second)
+        self.assertTrue(default_storage.exists(upload))
+        third.refresh_from_db()
+        self.assertEqual(third.profile_picture.name, upload)
+
+
+class EligibilityTests(TestCase):
+    def setUp(self):
+        self.bscs = Program.objects.create(abbreviation='BSCS', name='BS in Computer Science')
+        self.bsit = Program.objects.create(abbreviation='BSIT', name='BS in Information Technology')
+        self.public = Organization.objects.create(name='Chess Club', description='.')
+        self.restricted = Organization.objects.create(name='ACM', description='.', is_public=False)
+        self.restricted.allowed_programs.set([self.bscs])
+        self.cs_student = make_user('cs', course='BS in Computer Science')
+        self.undeclared = make_user('undeclared')
+
+    def joinable(self, user):
+        annotated = Organization.objects.annotate(joinable=can_join_expression(user)).order_by('name')
+        return [org.name for org in annotated if org.joinable]
+
+    def test_can_join_follows_program(self):
+        self.cs_student.refresh_from_db()
+        self.assertEqual(self.cs_student.program, self.bscs)
+        self.assertTrue(can_join(self.cs_student, self.restricted))
+        self.assertTrue(can_join(self.cs_student, self.public))
+        self.assertFalse(can_join(self.undeclared, self.restricted))
+        self.assertEqual(self.joinable(self.cs_student), ['ACM', 'Chess Club'])
+        self.assertEqual(self.joinable(self.undeclared), ['Chess Club'])
+
+    def test_rebuilt_when_is_public_or_programs_change(self):
+        self.restricted.is_public = True
+        self.restricted.save()
+        self.assertTrue(can_join(self.undeclared, self.restricted))
+        self.restricted.is_public = False
+        self.restricted.save()
+        self.restricted.allowed_programs.set([self.bsit])
+        self.assertFalse(can_join(self.cs_student, self.restricted))
+
+    def eligibility_queries(self, change):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            change()
+        return [sql for sql in recorder.queries if 'organizationeligibility' in sql]
+
+    def test_unrelated_saves_leave_eligibility_alone(self):
+        def edit():
+            org = Organization.objects.get(pk=self.restricted.pk)
+            org.description = 'Programming contests.'
+            org.save()
+            org.allowed_programs.set([self.bscs])
+
+        self.assertEqual(self.eligibility_queries(edit), [])
+        # What the profile views do for a public organization on every save.
+        self.assertEqual(self.eligibility_queries(self.public.allowed_programs.clear), [])
+
+    def test_program_rename_relinks_students(self):
+        student = make_user('ds', course='BS in Data Science')
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            Program.objects.get(pk=self.bsit.pk).save()
+        self.assertFalse([sql for sql in recorder.queries if 'accounts_user' in sql])
+
+        self.bsit.name = 'BS in Data Science'
+        self.bsit.save()
+        student.refresh_from_db()
+        self.assertEqual(student.program, self.bsit)
+
+
+class ReferenceCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.program = Program.objects.create(abbreviation='BSCS', name='BS in Computer Science')
+
+    def test_process_copy_expires_without_a_shared_cache(self):
+        self.assertEqual([p.name for p in reference.programs()], ['BS in Computer Science'])
+        # Another worker's edit: its version bump never reaches this process's local-memory cache.
+        Program.objects.filter(pk=self.program.pk).update(name='Computer Science')
+        self.assertEqual([p.name for p in reference.programs()], ['BS in Computer Science'])
+        later = time.monotonic() + settings.REFERENCE_LOCAL_TTL + 1
+        with mock.patch('organization.reference.time.monotonic', return_value=later):
+            self.assertEqual([p.name for p in reference.programs()], ['Computer Science'])
+
+    def test_version_bump_reloads(self):
+        reference.programs()
+        Program.objects.filter(pk=self.program.pk).update(name='Computer Science')
+        reference.bump_programs_version()
+        self.assertEqual([p.name for p in reference.programs()], ['Computer Science'])
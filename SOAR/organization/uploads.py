@@ -0,0 +1,62 @@
+"""Bounded-memory upload ingestion.
+
+``SizeLimitedUploadHandler`` runs before Django's memory/temporary-file
+handlers (see FILE_UPLOAD_HANDLERS). Chunks pass through until a file in
+one of IMAGE_UPLOAD_FIELDS goes over IMAGE_MAX_UPLOAD_SIZE, or a file in
+one of UPLOAD_SIZE_LIMITS goes over its limit; other fields aren't capped.
+After that the rest of the file is counted and dropped, and the form
+receives an empty ``OversizedUpload`` whose ``size`` makes
+``validate_image_file_size`` reject it. Files above
+FILE_UPLOAD_MAX_MEMORY_SIZE stream to a temporary file, so no upload is
+ever held in memory whole.
+
+``ImageUploadField`` replaces Django's forms.ImageField, which decodes the
+image with Pillow. Uploads are checked from their headers only by
+``organization.validators.validate_image_upload``.
+"""
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class OversizedUpload(UploadedFile):
+    """Placeholder for a file that was dropped for exceeding the size limit."""
+
+    def __init__(self, name, content_type, size, charset=None):
+        super().__init__(BytesIO(), name, content_type, size, charset)
+
+
+class SizeLimitedUploadHandler(FileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.oversized = False
+        if self.field_name in settings.IMAGE_UPLOAD_FIELDS:
+            self.limit = settings.IMAGE_MAX_UPLOAD_SIZE
+        else:
+            self.limit = getattr(settings, 'UPLOAD_SIZE_LIMITS', {}).get(self.field_name)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.limit is not None and self.received > self.limit:
+            self.oversized = True
+        # Returning None stops later handlers from storing the chunk.
+        return None if self.oversized else raw_data
+
+    def file_complete(self, file_size):
+        if not self.oversized:
+            return None  # let the memory/temporary-file handler finish it
+        return OversizedUpload(self.file_name, self.content_type, self.received, self.charset)
+
+
+class ImageUploadField(forms.FileField):
+    """A FileField for JPG/PNG uploads that never opens the image with Pillow."""
+
+    def widget_attrs(self, widget):
+        attrs = super().widget_attrs(widget)
+        if isinstance(widget, forms.FileInput) and "accept" not in widget.attrs:
+            attrs.setdefault("accept", "image/png,image/jpeg")
+        return attrs
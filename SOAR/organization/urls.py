@@ -4,6 +4,7 @@ from . import views
 
 # API routes
 router = DefaultRouter()
+router.register(r'organizations', views.OrganizationViewSet, basename='organization')
 router.register(r'members', views.OrganizationMemberViewSet, basename='organization-member')
 router.register(r'programs', views.ProgramViewSet, basename='program')
 
@@ -1,19 +1,111 @@
+import struct
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from PIL import Image
+from django.template.defaultfilters import filesizeformat
 
-def validate_image_file_type(value):
-    valid_formats = ("JPEG", "PNG")
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Start-of-frame markers carry the dimensions (C4, C8 and CC are not frames).
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+JPEG_MAX_SEGMENTS = 64
+
+
+def _read_png_header(file):
+    header = file.read(16)
+    if len(header) != 16 or header[4:8] != b"IHDR":
+        return None
+    width, height = struct.unpack(">II", header[8:16])
+    return "PNG", width, height
+
+
+def _read_jpeg_header(file):
+    # Walk the marker segments, seeking over their payloads, until a frame header.
+    for _ in range(JPEG_MAX_SEGMENTS):
+        byte = file.read(1)
+        if byte != b"\xff":
+            return None
+        marker = file.read(1)
+        while marker == b"\xff":  # fill bytes
+            marker = file.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue  # standalone markers have no length
+        if marker in (0xD9, 0xDA):
+            return None  # end of image / scan data before any frame header
+        length = file.read(2)
+        if len(length) != 2:
+            return None
+        length = struct.unpack(">H", length)[0]
+        if marker in JPEG_SOF_MARKERS:
+            frame = file.read(5)
+            if len(frame) != 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return "JPEG", width, height
+        if length < 2:
+            return None
+        file.seek(length - 2, 1)
+    return None
+
+
+def read_image_header(file):
+    """Return (format, width, height) from the PNG/JPEG header of ``file``, or None.
+
+    Only the signature and header segments are read, so this costs the same for
+    a 1 KB thumbnail and a 10 MB decompression bomb.
+    """
+    file.seek(0)
     try:
-        img = Image.open(value)
-        img_format = img.format.upper()
-        if img_format not in valid_formats:
-            raise ValidationError("Please upload a JPG or PNG image.")
-    except Exception:
-        raise ValidationError("Invalid image file.")
+        signature = file.read(8)
+        if signature == PNG_SIGNATURE:
+            return _read_png_header(file)
+        if signature[:2] == b"\xff\xd8":
+            file.seek(2)
+            return _read_jpeg_header(file)
+        return None
     finally:
-        value.seek(0)
+        file.seek(0)
+
+
+def _is_stored(value):
+    # A FieldFile that wasn't re-uploaded: it passed validation when it was
+    # saved, and its file may no longer be in storage.
+    return getattr(value, "_committed", False)
+
 
 def validate_image_file_size(value):
-    max_size = 10 * 1024 * 1024  # 10 MB
+    if _is_stored(value):
+        return
+    max_size = settings.IMAGE_MAX_UPLOAD_SIZE
     if value.size > max_size:
-        raise ValidationError("Image must be under 10 MB.")
+        raise ValidationError(f"Image must be under {filesizeformat(max_size)}.")
+
+
+def validate_image_file_type(value):
+    if _is_stored(value):
+        return
+    try:
+        header = read_image_header(value)
+    except OSError:
+        raise ValidationError("The image could not be read; please upload it again.")
+    if header is None:
+        raise ValidationError("Please upload a JPG or PNG image.")
+    _, width, height = header
+    if not width or not height:
+        raise ValidationError("Invalid image file.")
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            f"Image is too large ({width}x{height}); please upload one under "
+            f"{settings.IMAGE_MAX_PIXELS // 1_000_000} megapixels."
+        )
+
+
+def validate_image_upload(value):
+    """Size first (no I/O), then format and dimensions from the header; never decodes pixels.
+
+    Files already in storage are not checked again.
+    """
+    validate_image_file_size(value)
+    validate_image_file_type(value)
@@ -1,22 +1,37 @@
+from django.db.models import Q
 from django.shortcuts import render, get_object_or_404, redirect
 from rest_framework import viewsets, status
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.text import slugify
+from SOAR.streaming import streaming_response
 import json
-from .models import Organization, OrganizationMember, Program
-from .serializers import OrganizationSerializer, OrganizationMemberSerializer, ProgramSerializer
-from .permissions import IsOrgOfficerOrAdviser
-from django.core.mail import send_mail
+from .models import ROLE_MEMBER, Organization, OrganizationMember, Program, demoted_role
+from .serializers import OrganizationSerializer, OrganizationMemberSerializer, PendingRequestSerializer, ProgramSerializer
+from .permissions import CanManageOrganization, IsOrgOfficerOrAdviser
+from .pagination import MemberCursorPagination
+from .search import search_members
+from .roles import get_membership, get_role, is_admin, is_leader, officer_org_ids
+from .tasks import send_notification_email
+from .bulk import BulkOperationError, apply_bulk_operation, can_review
+from .eligibility import joinable_organizations
+from .reference import programs as cached_programs
+from .review import claim_reviews, decide_reviews, leased_reviews, release_reviews
+from .export import EXPORT_FORMATS, STREAMERS, export_queryset, iter_rows, parse_export_filters
+from .conditional import (
+    ConditionalGetMixin, conditional_response, digest, membership_validators, object_validators,
+)
 
 
 def organization_detail(request, org_id):
     organization = get_object_or_404(Organization, id=org_id)
-    programs = Program.objects.all()
+    programs = cached_programs()
     return render(request, 'organization_profile.html', {
         'organization': organization,
         'programs': programs,
@@ -26,42 +41,229 @@ def organization_detail(request, org_id):
 # ==============================
 # ORGANIZATION VIEWSET
 # ==============================
-class OrganizationViewSet(viewsets.ModelViewSet):
+class OrganizationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Organization.objects.all()
     serializer_class = OrganizationSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_permissions(self):
+        if self.action in ('create', 'update', 'partial_update', 'destroy'):
+            return [IsAuthenticated(), CanManageOrganization()]
+        return super().get_permissions()
+
     @action(detail=True, methods=['get'], url_path='members')
     def members(self, request, pk=None):
+        """Reviewers see pending requests too; approved members only see the approved roster."""
         org = self.get_object()
-        query = request.query_params.get('q', '').strip()
         members = org.members.select_related('student')
+        approved_only = not can_review(request.user, org, request)
+        if approved_only:
+            membership = get_membership(request.user, org, request)
+            if membership is None or not membership.is_approved:
+                return Response({'error': 'Only members of this organization can see its members.'},
+                                status=status.HTTP_403_FORBIDDEN)
+            members = members.filter(is_approved=True)
+        # From the organization already loaded: no per-member work before a 304.
+        etag, last_modified = object_validators(org)
+        etag = digest([etag, 'members', request.query_params.urlencode(), approved_only])
+        return conditional_response(
+            request, etag, last_modified, lambda: self._members_page(request, org, members, approved_only),
+        )
+
+    def _members_page(self, request, org, members, approved_only):
+        query = request.query_params.get('q', '').strip()
+        paginator = MemberCursorPagination()
         if query:
-            members = members.filter(
-                Q(student__username__icontains=query) |
-                Q(student__first_name__icontains=query) |
-                Q(student__last_name__icontains=query)
-            )
-        serializer = OrganizationMemberSerializer(members, many=True)
-        return Response(serializer.data)
+            # Ranked typeahead: a single page of best matches.
+            results = search_members(org, members, query, limit=paginator.get_page_size(request))
+            serializer = OrganizationMemberSerializer(results, many=True)
+            return Response({'count': len(results), 'next': None, 'previous': None, 'results': serializer.data})
+
+        # Unfiltered listing: the denormalized counters give the total for free.
+        paginator.count_estimate = org.approved_count + (0 if approved_only else org.pending_count)
+        page = paginator.paginate_queryset(members, request, view=self)
+        serializer = OrganizationMemberSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='joinable')
+    def joinable(self, request):
+        """Organizations the current user may join and isn't already in (or waiting on)."""
+        organizations = joinable_organizations(request.user).prefetch_related('allowed_programs').order_by('name')
+        return Response(OrganizationSerializer(organizations, many=True, context={'request': request}).data)
+
+    @action(detail=True, methods=['get'], url_path='export')
+    def export(self, request, pk=None):
+        """Stream the member list as CSV (default) or JSON Lines: ``?output=jsonl&role=officer,leader&approved=true``."""
+        org = self.get_object()
+        if not can_review(request.user, org, request):
+            return Response({'error': 'Only officers, leaders, advisers or admins can export members.'},
+                            status=status.HTTP_403_FORBIDDEN)
+        # Not ?format=: DRF reserves that for choosing a renderer.
+        output = request.query_params.get('output', 'csv').lower()
+        if output not in EXPORT_FORMATS:
+            return Response({'error': f"output must be one of: {', '.join(EXPORT_FORMATS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            roles, approved = parse_export_filters(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = iter_rows(export_queryset(org, roles, approved))
+        response = streaming_response(request, STREAMERS[output](rows), content_type=EXPORT_FORMATS[output])
+        filename = f"{slugify(org.name) or 'organization'}-members-{timezone.localdate():%Y%m%d}.{output}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def _reviewable(self, request):
+        org = self.get_object()
+        if not can_review(request.user, org, request):
+            raise PermissionError("Only officers, leaders, advisers or admins can review join requests.")
+        return org
+
+    @action(detail=True, methods=['get'], url_path='review-queue')
+    def review_queue(self, request, pk=None):
+        """Pending-request total and the requests this reviewer currently holds."""
+        try:
+            org = self._reviewable(request)
+        except PermissionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        return Response({
+            'pending': org.pending_count,
+            'results': PendingRequestSerializer(leased_reviews(request.user, org), many=True).data,
+        })
+
+    @action(detail=True, methods=['post'], url_path='review-queue/claim')
+    def review_claim(self, request, pk=None):
+        """Lease the next batch of pending requests. Body: {"batch_size": 20}"""
+        try:
+            org = self._reviewable(request)
+            batch_size = int(request.data.get('batch_size', 20))
+        except PermissionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except (TypeError, ValueError):
+            return Response({'error': 'batch_size must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+        members, lease_expires = claim_reviews(request.user, org, batch_size)
+        return Response({
+            'lease_expires': lease_expires,
+            'results': PendingRequestSerializer(members, many=True).data,
+        })
+
+    @action(detail=True, methods=['post'], url_path='review-queue/release')
+    def review_release(self, request, pk=None):
+        """Hand leased requests back to the queue. Body: {"member_ids": [...]} (omit for all)."""
+        try:
+            org = self._reviewable(request)
+        except PermissionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        member_ids = request.data.get('member_ids')
+        if member_ids is not None and not isinstance(member_ids, list):
+            return Response({'error': 'member_ids must be a list.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            released = release_reviews(request.user, org, member_ids)
+        except BulkOperationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'status': 'success', 'released': released})
+
+    @action(detail=True, methods=['post'], url_path='review-queue/decide')
+    def review_decide(self, request, pk=None):
+        """Approve/reject leased requests. Body: {"approve": [...], "reject": [...]}"""
+        approve, reject = request.data.get('approve', []), request.data.get('reject', [])
+        if not isinstance(approve, list) or not isinstance(reject, list) or not (approve or reject):
+            return Response({'error': 'Give "approve" and/or "reject" lists of member ids.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            org = self._reviewable(request)
+            results = decide_reviews(request.user, org, approve, reject, request=request)
+        except PermissionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except BulkOperationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        succeeded = sum(1 for r in results if r['status'] != 'error')
+        return Response({
+            'status': 'success',
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results,
+        })
 
 
 # ==============================
 # PROGRAM VIEWSET
 # ==============================
-class ProgramViewSet(viewsets.ModelViewSet):
+class ProgramViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Program.objects.all()
     serializer_class = ProgramSerializer
     permission_classes = [IsAuthenticated]
 
+    # Programs have no updated_at; the table is tiny, so hash the rows themselves.
+    def get_list_validators(self, queryset):
+        rows = [(program.pk, program.abbreviation, program.name) for program in cached_programs()]
+        return digest([rows, self.request.query_params.urlencode()]), None
+
+    def list(self, request, *args, **kwargs):
+        # Served from the reference cache (organization.reference): no database query.
+        etag, last_modified = self.get_list_validators(None)
+        return conditional_response(
+            request, etag, last_modified,
+            lambda: Response(self.get_serializer(cached_programs(), many=True).data),
+        )
+
+    def get_object_validators(self, obj):
+        return digest([obj.pk, obj.abbreviation, obj.name]), None
+
 
 # ==============================
 # ORGANIZATION MEMBER VIEWSET
 # ==============================
-class OrganizationMemberViewSet(viewsets.ModelViewSet):
+class OrganizationMemberViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = OrganizationMember.objects.select_related('student', 'organization').all()
     serializer_class = OrganizationMemberSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MemberCursorPagination
+
+    def get_queryset(self):
+        """The user's own memberships and requests, plus every row of the organizations they review."""
+        queryset = super().get_queryset()
+        user = self.request.user
+        if is_admin(user):
+            return queryset
+        return queryset.filter(
+            Q(student=user)
+            | Q(organization_id__in=officer_org_ids(user, self.request))
+            | Q(organization__adviser=user)
+        )
+
+    def perform_create(self, serializer):
+        organization = serializer.validated_data['organization']
+        if can_review(self.request.user, organization, self.request):
+            serializer.save()
+            return
+        # Anyone else may only ask to join, for themselves, as a member.
+        if serializer.validated_data['student'] != self.request.user:
+            raise PermissionDenied("You can only request membership for yourself.")
+        serializer.save(is_approved=False, role=ROLE_MEMBER)
+
+    def perform_update(self, serializer):
+        member = serializer.instance
+        organization = serializer.validated_data.get('organization', member.organization)
+        # Role changes follow promote/demote (leaders and admins); the rest needs a reviewer.
+        role_changed = 'role' in serializer.validated_data and serializer.validated_data['role'] != member.role
+        check = is_leader if role_changed else can_review
+        if not (check(self.request.user, member.organization, self.request)
+                and check(self.request.user, organization, self.request)):
+            raise PermissionDenied("You can't change this membership.")
+        serializer.save()
+
+    def get_list_validators(self, queryset):
+        # The rows in scope depend on who's asking (see get_queryset).
+        organizations = Organization.objects.all()
+        return membership_validators(organizations, self.request.user.pk, self.request.query_params.urlencode())
+
+    def get_object_validators(self, obj):
+        etag, last_modified = object_validators(obj)
+        student_modified = obj.student.updated_at
+        return digest([etag, student_modified.timestamp()]), max(last_modified, student_modified)
 
     # ✅ Promote Member
     @action(detail=True, methods=['post'])
@@ -72,17 +274,9 @@ class OrganizationMemberViewSet(viewsets.ModelViewSet):
         member = self.get_object()
         promoter = request.user
 
-        # Restrict to only admins and leaders
-        if not (promoter.is_superuser or promoter.is_staff):
-            promoter_record = OrganizationMember.objects.filter(
-                organization=member.organization,
-                student=promoter
-            ).first()
-            if not promoter_record or promoter_record.role != "Leader":
-                return Response({'error': 'Only leaders or admins can promote members.'}, status=status.HTTP_403_FORBIDDEN)
-
+        # Permission (admins and leaders only) is enforced by OrganizationMember.promote.
         try:
-            member.promote(promoter=promoter)
+            member.promote(promoter=promoter, request=request)
             return Response({
                 'status': 'success',
                 'message': f'{member.student.username} has been promoted to {member.role}.',
@@ -105,17 +299,9 @@ class OrganizationMemberViewSet(viewsets.ModelViewSet):
         member = self.get_object()
         demoter = request.user
 
-        # Restrict to only admins and leaders
-        if not (demoter.is_superuser or demoter.is_staff):
-            demoter_record = OrganizationMember.objects.filter(
-                organization=member.organization,
-                student=demoter
-            ).first()
-            if not demoter_record or demoter_record.role != "Leader":
-                return Response({'error': 'Only leaders or admins can demote members.'}, status=status.HTTP_403_FORBIDDEN)
-
+        # Permission (admins and leaders only) is enforced by OrganizationMember.demote.
         try:
-            member.demote(demoter=demoter)
+            member.demote(demoter=demoter, request=request)
             return Response({
                 'status': 'success',
                 'message': f'{member.student.username} has been demoted to {member.role}.',
@@ -129,20 +315,46 @@ class OrganizationMemberViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': f'Unexpected error: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """Apply one operation to many members of the same organization.
+
+        Body: {"operation": "approve|reject|promote|demote|remove", "member_ids": [...]}
+        """
+        try:
+            results = apply_bulk_operation(
+                request.user,
+                request.data.get('operation'),
+                request.data.get('member_ids'),
+                request=request,
+            )
+        except PermissionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except BulkOperationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        succeeded = sum(1 for r in results if r['status'] != 'error')
+        return Response({
+            'status': 'success',
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """Approve a join request and notify the user by email."""
         member = self.get_object()
+        if not can_review(request.user, member.organization, request):
+            return Response({'error': 'Only officers, leaders, advisers or admins can review join requests.'},
+                            status=status.HTTP_403_FORBIDDEN)
         if member.is_approved:
             return Response({'error': 'Already approved.'}, status=status.HTTP_400_BAD_REQUEST)
         member.is_approved = True
         member.save()
-        send_mail(
+        send_notification_email.enqueue(
             subject=f"Accepted to {member.organization.name}",
             message=f"Congratulations! You have been accepted as a member of {member.organization.name}.",
-            from_email=None,
             recipient_list=[member.student.email],
-            fail_silently=True,
         )
         return Response({'status': 'success', 'message': 'Member approved and notified.'})
 
@@ -150,20 +362,25 @@ class OrganizationMemberViewSet(viewsets.ModelViewSet):
     def reject(self, request, pk=None):
         """Reject a join request and notify the user by email."""
         member = self.get_object()
+        if not can_review(request.user, member.organization, request):
+            return Response({'error': 'Only officers, leaders, advisers or admins can review join requests.'},
+                            status=status.HTTP_403_FORBIDDEN)
         if member.is_approved:
             return Response({'error': 'Already approved.'}, status=status.HTTP_400_BAD_REQUEST)
-        send_mail(
+        send_notification_email.enqueue(
             subject=f"Application to {member.organization.name} Rejected",
             message=f"We regret to inform you that your request to join {member.organization.name} was not approved.",
-            from_email=None,
             recipient_list=[member.student.email],
-            fail_silently=True,
         )
         member.delete()
         return Response({'status': 'success', 'message': 'Member rejected and notified.'})
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
+        # Members may leave; removing someone else is a leader's call.
+        if instance.student_id != request.user.pk and not is_leader(request.user, instance.organization, request):
+            return Response({'error': 'Only leaders or admins can remove members.'},
+                            status=status.HTTP_403_FORBIDDEN)
         instance.delete()
         return Response({'status': 'removed'})
 
@@ -180,13 +397,7 @@ def organization_page(request):
 @login_required
 def orgpage(request, org_id):
     organization = get_object_or_404(Organization, id=org_id)
-    user_role = None
-    if request.user.is_authenticated:
-        try:
-            org_member = OrganizationMember.objects.get(student=request.user, organization=organization)
-            user_role = org_member.role
-        except OrganizationMember.DoesNotExist:
-            user_role = None
+    user_role = get_role(request.user, organization, request)
     return render(request, 'organization/orgpage.html', {
         'organization': organization,
         'user_role': user_role,
@@ -196,7 +407,7 @@ def orgpage(request, org_id):
 @login_required
 def organization_profile(request):
     organization = Organization.objects.first() if Organization.objects.exists() else None
-    programs = Program.objects.all()
+    programs = cached_programs()
 
     if request.method == 'POST' and organization:
         name = (request.POST.get('org_name') or organization.name).strip()
@@ -228,7 +439,7 @@ def organization_profile(request):
 @login_required
 def organization_edit_profile(request):
     organization = Organization.objects.first()
-    programs = Program.objects.all()
+    programs = cached_programs()
 
     if request.method == 'POST' and organization:
         name = (request.POST.get('org_name') or organization.name).strip()
@@ -251,9 +462,13 @@ def organization_edit_profile(request):
         messages.success(request, "Organization profile updated successfully.")
         return redirect('organization_profile')
 
+    members = []
+    if organization:
+        members = organization.members.select_related('student').order_by('date_joined', 'id')
     return render(request, 'organization/organization_editprofile.html', {
         'organization': organization,
         'programs': programs,
+        'members': members,
     })
 
 
@@ -263,12 +478,8 @@ def membermanagement(request):
     organization = Organization.objects.first()
     members = OrganizationMember.objects.select_related('student').filter(organization=organization)
     
-    # determine user role (depends on how your roles are stored)
-    user_role = None
-    try:
-        org_member = OrganizationMember.objects.get(student=request.user, organization=organization)
-        user_role = org_member.role
-    except OrganizationMember.DoesNotExist:
+    user_role = get_role(request.user, organization, request) if organization else None
+    if user_role is None:
         user_role = "GUEST"
 
     return render(request, 'organization/membermanagement.html', {
@@ -314,21 +525,13 @@ def demote_member(request, member_id):
         demoter = request.user  # the one performing the action
 
         # Check permissions: only admins and leaders
-        if not (demoter.is_superuser or demoter.is_staff):
-            demoter_record = OrganizationMember.objects.filter(
-                organization=member.organization,
-                student=demoter
-            ).first()
-            if not demoter_record or demoter_record.role != "Leader":
-                return JsonResponse({"error": "Only leaders or admins can demote members."}, status=403)
-
-        # Demotion logic
-        if member.role == "Leader":
-            member.role = "Officer"
-        elif member.role == "Officer":
-            member.role = "Member"
-        else:
-            return JsonResponse({"error": "Cannot demote further; already a Member."}, status=400)
+        if not is_leader(demoter, member.organization_id, request):
+            return JsonResponse({"error": "Only leaders or admins can demote members."}, status=403)
+
+        try:
+            member.role = demoted_role(member.role)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
 
         member.save()
         return JsonResponse({
@@ -0,0 +1,201 @@
+"""Pub/sub used to push events to Server-Sent Events streams.
+
+``publish()`` is synchronous and safe to call from any thread (views, the
+task worker). Subscribers are asyncio consumers inside the ASGI process.
+The broker class comes from settings.REALTIME_BROKER:
+
+- ``realtime.broker.InProcessBroker`` (default): delivers only within the
+  current process. Fine for a single ASGI worker or local development.
+- ``realtime.broker.RedisBroker``: Redis PUBLISH/SUBSCRIBE on REDIS_URL, so
+  events reach streams held by any worker or host.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Sent to a subscriber that fell too far behind; the page should re-fetch.
+RESYNC = {'event': 'resync', 'data': {}}
+# Returned by Subscription.get() once the broker can't deliver any more; the stream ends.
+CLOSED = {'event': 'closed', 'data': {}}
+
+
+class Subscription:
+    """An asyncio queue of messages for one stream."""
+
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = tuple(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+        self.ended = False
+        self._closed = False
+
+    def deliver(self, message):
+        # Runs on the subscriber's event loop.
+        if self.overflowed or self.ended:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue = asyncio.Queue(maxsize=1)
+            self.queue.put_nowait(RESYNC)
+
+    def end(self):
+        """Stop delivery; get() returns CLOSED from now on (runs on the subscriber's loop)."""
+        self.ended = True
+        try:
+            self.queue.put_nowait(CLOSED)  # wake a waiting get()
+        except asyncio.QueueFull:
+            pass  # nobody is waiting on a full queue
+
+    async def get(self, timeout):
+        """Next message, None after ``timeout`` seconds, or CLOSED once the subscription ended."""
+        if self.ended and self.queue.empty():
+            return CLOSED
+        try:
+            message = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if message is RESYNC:
+            self.overflowed = False
+        return message
+
+    async def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        await self.broker.unsubscribe(self)
+
+    def close_threadsafe(self):
+        """close() from any thread, e.g. a response's resource closer."""
+        try:
+            self.loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self.close()))
+        except RuntimeError:
+            pass  # loop already closed
+
+
+class InProcessBroker:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, event, data):
+        message = {'event': event, 'data': data}
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                pass  # loop already closed; unsubscribe will follow
+
+    async def subscribe(self, channels):
+        subscription = Subscription(self, channels, self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+
+class RedisBroker:
+    """Redis-backed broker; one pub/sub connection per open stream.
+
+    If the connection drops, the reader reconnects with backoff and sends
+    RESYNC (events published meanwhile were missed). After
+    ``reconnect_attempts`` failures in a row it ends the subscription, which
+    closes the stream and lets the browser reconnect.
+    """
+
+    prefix = 'realtime:'
+    reconnect_attempts = 5
+
+    def __init__(self, queue_size=100, url=None):
+        import redis
+
+        self.queue_size = queue_size
+        self.url = url or settings.REDIS_URL
+        self._client = redis.Redis.from_url(self.url)
+
+    def publish(self, channel, event, data):
+        self._client.publish(self.prefix + channel, json.dumps({'event': event, 'data': data}, default=str))
+
+    async def _pubsub(self, channels):
+        import redis.asyncio
+
+        pubsub = redis.asyncio.Redis.from_url(self.url).pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(*(self.prefix + c for c in channels))
+        return pubsub
+
+    async def subscribe(self, channels):
+        subscription = Subscription(self, channels, self.queue_size)
+        subscription.pubsub = await self._pubsub(subscription.channels)
+        subscription.reader = asyncio.ensure_future(self._read(subscription))
+        return subscription
+
+    async def _read(self, subscription):
+        failures = 0
+        while True:
+            try:
+                async for raw in subscription.pubsub.listen():
+                    failures = 0
+                    subscription.deliver(json.loads(raw['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Realtime subscription to %s lost its connection.", subscription.channels,
+                               exc_info=True)
+            # listen() also returns, without an error, when the connection is closed.
+            failures += 1
+            if failures > self.reconnect_attempts:
+                subscription.end()
+                return
+            await asyncio.sleep(min(0.5 * 2 ** failures, 10))
+            try:
+                await subscription.pubsub.aclose()
+            except Exception:
+                pass
+            try:
+                subscription.pubsub = await self._pubsub(subscription.channels)
+            except Exception:
+                logger.warning("Could not resubscribe to %s.", subscription.channels, exc_info=True)
+                continue
+            subscription.deliver(RESYNC)
+
+    async def unsubscribe(self, subscription):
+        subscription.reader.cancel()
+        await subscription.pubsub.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.REALTIME_BROKER)(queue_size=settings.REALTIME_QUEUE_SIZE)
+    return _broker
@@ -0,0 +1,30 @@
+"""Publish domain events to realtime streams once the surrounding transaction commits."""
+import logging
+
+from django.db import transaction
+
+from .broker import get_broker
+
+logger = logging.getLogger(__name__)
+
+
+def organization_channel(org_id):
+    return f"org:{org_id}"
+
+
+def reviewers_channel(org_id):
+    """Events only the organization's reviewers may see, e.g. pending join requests."""
+    return f"org:{org_id}:reviewers"
+
+
+def publish_organization_event(org_id, event, data, reviewers_only=False):
+    channel = reviewers_channel(org_id) if reviewers_only else organization_channel(org_id)
+    transaction.on_commit(lambda: _publish(channel, event, data))
+
+
+def _publish(channel, event, data):
+    try:
+        get_broker().publish(channel, event, data)
+    except Exception:
+        # A missed push only delays the page; never fail the write that caused it.
+        logger.exception("Could not publish %s to %s.", event, channel)
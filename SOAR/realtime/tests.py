@@ -0,0 +1,110 @@
+import asyncio
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from organization.models import Organization, OrganizationMember, ROLE_MEMBER, ROLE_OFFICER
+from .broker import CLOSED, RESYNC, InProcessBroker, RedisBroker
+from .publish import organization_channel, reviewers_channel
+from .views import _channels, _stream
+
+User = get_user_model()
+
+
+class ChannelTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='Chess Club', description='Chess.')
+        self.users = {}
+        for number, (name, role, approved) in enumerate([
+            ('officer', ROLE_OFFICER, True), ('member', ROLE_MEMBER, True), ('applicant', ROLE_MEMBER, False),
+        ]):
+            user = User.objects.create(username=name, email=f'{name}@cit.edu', student_id=f'00-0000-00{number}')
+            OrganizationMember.objects.create(organization=self.org, student=user, role=role, is_approved=approved)
+            self.users[name] = user
+
+    def test_only_reviewers_follow_join_requests(self):
+        members, reviewers = organization_channel(self.org.pk), reviewers_channel(self.org.pk)
+        self.assertEqual(_channels(self.users['officer'], self.org), [members, reviewers])
+        self.assertEqual(_channels(self.users['member'], self.org), [members])
+        self.assertEqual(_channels(self.users['applicant'], self.org), [])
+
+    def test_pending_requests_publish_to_reviewers(self):
+        student = User.objects.create(username='new', email='new@cit.edu', student_id='00-0000-009')
+        broker = mock.Mock()
+        with mock.patch('realtime.publish.get_broker', return_value=broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                request = OrganizationMember.objects.create(organization=self.org, student=student)
+            with self.captureOnCommitCallbacks(execute=True):
+                request.is_approved = True
+                request.save()
+        channels = [call.args[0] for call in broker.publish.call_args_list]
+        self.assertEqual(channels, [reviewers_channel(self.org.pk), organization_channel(self.org.pk)])
+
+
+class SubscriptionTests(SimpleTestCase):
+    def test_ended_subscription_closes_the_stream(self):
+        async def run():
+            broker = InProcessBroker()
+            subscription = await broker.subscribe(['org:1'])
+            stream = _stream(subscription)
+            self.assertEqual(await anext(stream), 'retry: 3000\n\n')
+            subscription.end()
+            self.assertEqual([chunk async for chunk in stream], [])
+            return broker.subscriber_count()
+
+        self.assertEqual(asyncio.run(run()), 0)
+
+    def test_close_threadsafe_unsubscribes_an_unread_stream(self):
+        async def run():
+            broker = InProcessBroker()
+            subscription = await broker.subscribe(['org:1'])
+            await asyncio.to_thread(subscription.close_threadsafe)
+            await asyncio.sleep(0)
+            await subscription.close()  # a second close is harmless
+            return broker.subscriber_count()
+
+        self.assertEqual(asyncio.run(run()), 0)
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = messages
+        self.closed = False
+
+    async def listen(self):
+        for message in self.messages:
+            yield {'data': message}
+        raise ConnectionError('connection lost')
+
+    async def aclose(self):
+        self.closed = True
+
+
+class RedisReconnectTests(SimpleTestCase):
+    def read(self, connections):
+        async def run():
+            broker = RedisBroker(url='redis://localhost:6379/0')
+            broker.reconnect_attempts = 1
+            pubsubs = iter(connections)
+            # No backoff delay in tests (asyncio.sleep becomes an AsyncMock).
+            with mock.patch.object(broker, '_pubsub', side_effect=lambda channels: next(pubsubs)), \
+                    mock.patch('realtime.broker.asyncio.sleep'):
+                subscription = await broker.subscribe(['org:1'])
+                messages = []
+                while (message := await subscription.get(timeout=1)) not in (None, CLOSED):
+                    messages.append(message)
+                await subscription.close()
+            return messages, message
+
+        return asyncio.run(run())
+
+    def test_reconnects_then_ends_the_stream(self):
+        first = FakePubSub(['{"event": "membership", "data": {}}'])
+        second = FakePubSub([])
+        with self.assertLogs('realtime.broker', 'WARNING'):
+            messages, last = self.read([first, second])
+        self.assertEqual(messages, [{'event': 'membership', 'data': {}}, RESYNC])
+        self.assertIs(last, CLOSED)
+        self.assertTrue(first.closed)
+        self.assertTrue(second.closed)
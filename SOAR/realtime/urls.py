@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('organizations/<uuid:org_id>/events/', views.organization_events, name='realtime_organization_events'),
+]
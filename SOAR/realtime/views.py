@@ -0,0 +1,68 @@
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponseForbidden, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+
+from organization.bulk import can_review
+from organization.models import Organization
+from organization.roles import get_membership
+from .broker import CLOSED, get_broker
+from .publish import organization_channel, reviewers_channel
+
+
+def _channels(user, organization):
+    """The channels ``user`` may follow: approved members get the organization's, reviewers also theirs."""
+    if can_review(user, organization):
+        return [organization_channel(organization.pk), reviewers_channel(organization.pk)]
+    membership = get_membership(user, organization)
+    if membership and membership.is_approved:
+        return [organization_channel(organization.pk)]
+    return []
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _stream(subscription):
+    deadline = time.monotonic() + settings.REALTIME_MAX_STREAM_SECONDS
+    try:
+        # Browsers reconnect on their own; tell them how soon.
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            message = await subscription.get(timeout=settings.REALTIME_HEARTBEAT_SECONDS)
+            if message is CLOSED:
+                break
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                yield format_event(message['event'], message['data'])
+    finally:
+        await subscription.close()
+
+
+async def organization_events(request, org_id):
+    """Server-Sent Events for one organization: membership changes and announcements.
+
+    Serve under ASGI (e.g. ``uvicorn SOAR.asgi:application``): each open
+    stream is a suspended coroutine, not a worker thread.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponseForbidden("Login required.")
+    organization = await aget_object_or_404(Organization, id=org_id)
+    channels = await sync_to_async(_channels)(user, organization)
+    if not channels:
+        return HttpResponseForbidden("Not a member of this organization.")
+
+    subscription = await get_broker().subscribe(channels)
+    response = StreamingHttpResponse(_stream(subscription), content_type='text/event-stream')
+    # The generator's finally only runs once iteration starts; a response that is
+    # closed before then (client gone, middleware error) still unsubscribes.
+    response._resource_closers.append(subscription.close_threadsafe)
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: don't buffer the stream
+    return response
@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+WORKER_OPTIONS = ('batch_size', 'poll_interval', 'lease', 'once')
+
+
+def work(worker_id, options, stop):
+    """Worker loop; also the target of child processes, which may be spawned rather than forked."""
+    if not apps.ready:
+        django.setup()  # a spawned child starts from a fresh interpreter
+    from taskqueue import queue
+
+    connections.close_all()  # never share the parent's sockets after fork
+    idle = options['poll_interval']
+    while not stop.is_set():
+        close_old_connections()
+        jobs = queue.claim(worker_id, batch_size=options['batch_size'], lease_seconds=options['lease'])
+        for job in jobs:
+            queue.run(job, lease_seconds=options['lease'])
+        if not jobs:
+            if options['once']:
+                break
+            stop.wait(idle)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run background task workers for the database-backed queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help="Number of worker processes.")
+        parser.add_argument('--batch-size', type=int, default=10, help="Jobs claimed per poll.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when idle.")
+        parser.add_argument('--lease', type=int, default=300,
+                            help="Seconds a claimed job stays locked without a heartbeat (renewed every "
+                                 "third of this while it runs) before another worker may retry it.")
+        parser.add_argument('--once', action='store_true', help="Drain ready jobs and exit.")
+
+    def handle(self, *args, **options):
+        # Only what the loop needs: children get it pickled under the spawn start method.
+        options = {key: options[key] for key in WORKER_OPTIONS}
+        host = f"{socket.gethostname()}:{os.getpid()}"
+        processes = max(1, options['processes'])
+        stop = multiprocessing.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write("Stopping workers after their current job...")
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        if processes == 1:
+            self.stdout.write(f"Worker {host} started.")
+            work(host, options, stop)
+            return
+
+        connections.close_all()
+        children = [
+            multiprocessing.Process(target=work, args=(f"{host}/{n}", options, stop), daemon=True)
+            for n in range(processes)
+        ]
+        for child in children:
+            child.start()
+        self.stdout.write(f"Started {processes} workers on {host}.")
+        try:
+            while any(child.is_alive() for child in children):
+                time.sleep(0.5)
+        finally:
+            stop.set()
+            for child in children:
+                child.join()
@@ -0,0 +1,35 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_FAILED = "failed"
+STATUS_CHOICES = [
+    (STATUS_QUEUED, "Queued"),
+    (STATUS_RUNNING, "Running"),
+    (STATUS_FAILED, "Failed"),
+]
+
+
+class Task(models.Model):
+    name = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Workers only ever scan ready rows; keep that index tiny.
+            models.Index(fields=['run_at'], condition=Q(status=STATUS_QUEUED), name='taskqueue_ready_idx'),
+            models.Index(fields=['locked_until'], condition=Q(status=STATUS_RUNNING), name='taskqueue_lease_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
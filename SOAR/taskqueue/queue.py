@@ -0,0 +1,192 @@
+"""Durable job queue stored in the application database.
+
+Declare a handler with ``@task`` in an app's ``tasks.py`` and call
+``handler.enqueue(*args, **kwargs)``; ``manage.py runworker`` claims ready
+rows with ``SELECT ... FOR UPDATE SKIP LOCKED`` and retries failures with
+exponential backoff. Arguments must be JSON serializable.
+
+A claimed job is leased for ``lease_seconds``. While it runs, a heartbeat
+thread renews the lease every third of that, so a long job isn't handed
+to a second worker; only a job whose worker died or hung loses its lease.
+"""
+import logging
+import random
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task, STATUS_FAILED, STATUS_QUEUED, STATUS_RUNNING
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_LEASE_SECONDS = 300
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 60 * 60
+
+_registry = {}
+
+
+def task(func=None, *, name=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Register ``func`` as a queue handler and give it an ``enqueue`` helper."""
+    def register(fn):
+        task_name = name or f"{fn.__module__}.{fn.__qualname__}"
+        _registry[task_name] = fn
+        fn.task_name = task_name
+        fn.enqueue = lambda *args, **kwargs: enqueue(task_name, *args, max_attempts=max_attempts, **kwargs)
+        return fn
+
+    return register(func) if func is not None else register
+
+
+def enqueue(name, *args, run_at=None, max_attempts=DEFAULT_MAX_ATTEMPTS, **kwargs):
+    """Store a job. It commits (or rolls back) with the surrounding transaction."""
+    if name not in _registry:
+        raise KeyError(f"Unknown task: {name}")
+    if getattr(settings, 'TASK_QUEUE_EAGER', False):
+        # Local development without a worker: run after commit, in-process.
+        transaction.on_commit(lambda: _run_eager(name, args, kwargs))
+        return None
+    return Task.objects.create(
+        name=name,
+        payload={'args': list(args), 'kwargs': kwargs},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def _run_eager(name, args, kwargs):
+    # No retries in-process: let the failure reach the request (or test) that committed.
+    try:
+        _registry[name](*args, **kwargs)
+    except Exception:
+        logger.exception("Eager task %s failed.", name)
+        raise
+
+
+def backoff_delay(attempts):
+    """Exponential backoff with jitter for the ``attempts``-th failure."""
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay + random.uniform(0, delay / 10))
+
+
+def _lease_expired(now):
+    # Rows whose worker died (or overran its lease) while running them.
+    return Q(status=STATUS_RUNNING, locked_until__lt=now)
+
+
+def _claimable(now):
+    # Ready rows, plus abandoned rows that still have attempts left.
+    return Q(status=STATUS_QUEUED, run_at__lte=now) | (_lease_expired(now) & Q(attempts__lt=F('max_attempts')))
+
+
+def fail_abandoned(now=None):
+    """Mark abandoned jobs that used their last attempt as failed. Returns how many.
+
+    Without this a job that always kills or stalls its worker would stay
+    RUNNING with an expired lease forever.
+    """
+    failed = Task.objects.filter(_lease_expired(now or timezone.now()), attempts__gte=F('max_attempts')).update(
+        status=STATUS_FAILED,
+        locked_until=None,
+        last_error="Lease expired on the last attempt (the worker died or timed out).",
+    )
+    if failed:
+        logger.error("%s task(s) failed permanently after their lease expired on the last attempt.", failed)
+    return failed
+
+
+def claim(worker_id, batch_size=10, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Lock up to ``batch_size`` ready jobs for this worker and return them."""
+    now = timezone.now()
+    token = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+    fail_abandoned(now)
+    with transaction.atomic():
+        ids = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(_claimable(now))
+            .order_by('run_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        # Re-check the claim condition so backends without row locks (SQLite) cannot double-claim.
+        Task.objects.filter(_claimable(now), id__in=ids).update(
+            status=STATUS_RUNNING,
+            locked_by=token,
+            locked_until=now + timedelta(seconds=lease_seconds),
+            attempts=F('attempts') + 1,
+        )
+    return list(Task.objects.filter(locked_by=token, status=STATUS_RUNNING).order_by('run_at'))
+
+
+def renew_lease(job, lease_seconds):
+    """Push ``job``'s lease ``lease_seconds`` into the future. False if this worker no longer holds it."""
+    return bool(Task.objects.filter(pk=job.pk, locked_by=job.locked_by, status=STATUS_RUNNING).update(
+        locked_until=timezone.now() + timedelta(seconds=lease_seconds),
+    ))
+
+
+class Heartbeat(threading.Thread):
+    """Renews a running job's lease until stopped."""
+
+    def __init__(self, job, lease_seconds):
+        super().__init__(name=f"heartbeat-{job.pk}", daemon=True)
+        self.job = job
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.lease_seconds / 3):
+                if not renew_lease(self.job, self.lease_seconds):
+                    logger.warning("Task %s #%s lost its lease.", self.job.name, self.job.pk)
+                    return
+        except Exception:
+            logger.exception("Could not renew the lease of task %s #%s.", self.job.name, self.job.pk)
+        finally:
+            connection.close()  # this thread's own connection
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run(job, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Execute one claimed job and record the outcome, renewing its lease meanwhile."""
+    handler = _registry.get(job.name)
+    error = None
+    heartbeat = Heartbeat(job, lease_seconds)
+    heartbeat.start()
+    try:
+        if handler is None:
+            raise KeyError(f"No handler registered for {job.name}")
+        handler(*job.payload.get('args', []), **job.payload.get('kwargs', {}))
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        heartbeat.stop()
+    if error is None:
+        Task.objects.filter(pk=job.pk, locked_by=job.locked_by).delete()
+        return True
+    if job.attempts >= job.max_attempts:
+        logger.error("Task %s #%s failed permanently:\n%s", job.name, job.pk, error)
+        Task.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+            status=STATUS_FAILED, locked_until=None, last_error=error,
+        )
+    else:
+        logger.warning("Task %s #%s failed (attempt %s), retrying.", job.name, job.pk, job.attempts)
+        Task.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+            status=STATUS_QUEUED,
+            locked_by='',
+            locked_until=None,
+            run_at=timezone.now() + backoff_delay(job.attempts),
+            last_error=error,
+        )
+    return False
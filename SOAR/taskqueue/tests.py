@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .models import STATUS_FAILED, STATUS_QUEUED, STATUS_RUNNING, Task
+from .queue import claim, renew_lease, run, task
+
+calls = []
+
+
+@task(name='taskqueue.tests.record', max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@task(name='taskqueue.tests.slow')
+def slow(seconds):
+    time.sleep(seconds)
+
+
+@override_settings(TASK_QUEUE_EAGER=False)
+class ClaimTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def abandon(self, job):
+        # The worker holding ``job`` died: its lease is in the past.
+        Task.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+    def test_claim_and_run(self):
+        record.enqueue(1)
+        [job] = claim('worker')
+        self.assertEqual(job.status, STATUS_RUNNING)
+        self.assertEqual(claim('other'), [])
+        self.assertTrue(run(job))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_abandoned_job_is_reclaimed_until_attempts_run_out(self):
+        job = record.enqueue(1)
+        for attempt in (1, 2):
+            [claimed] = claim(f'worker{attempt}')
+            self.assertEqual(claimed.attempts, attempt)
+            self.abandon(claimed)
+        self.assertEqual(claim('worker3'), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('Lease expired', job.last_error)
+
+    def test_live_lease_is_not_reclaimed(self):
+        record.enqueue(1)
+        claim('worker')
+        self.assertEqual(claim('other'), [])
+        self.assertEqual(Task.objects.get().status, STATUS_RUNNING)
+
+    def test_failed_run_is_retried_later(self):
+        job = record.enqueue()
+        [claimed] = claim('worker')
+        self.assertFalse(run(claimed))  # record() needs an argument.
+        job.refresh_from_db()
+        self.assertEqual(job.status, STATUS_QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+
+    def test_renew_lease_extends_only_the_holders_lease(self):
+        record.enqueue(1)
+        [job] = claim('worker', lease_seconds=1)
+        self.assertTrue(renew_lease(job, 600))
+        job_row = Task.objects.get()
+        self.assertGreater(job_row.locked_until, timezone.now() + timedelta(seconds=500))
+        job.locked_by = 'someone-else'
+        self.assertFalse(renew_lease(job, 600))
+
+    def test_long_job_keeps_renewing_its_lease(self):
+        slow.enqueue(0.2)
+        [job] = claim('worker')
+        with mock.patch('taskqueue.queue.renew_lease', return_value=True) as renew:
+            self.assertTrue(run(job, lease_seconds=0.15))
+        self.assertGreaterEqual(renew.call_count, 2)
+        renew.assert_called_with(job, 0.15)
+
+
+class EagerTests(TestCase):
+    @override_settings(TASK_QUEUE_EAGER=True)
+    def test_eager_failures_are_raised(self):
+        with self.assertLogs('taskqueue.queue', 'ERROR'), self.assertRaises(TypeError):
+            with self.captureOnCommitCallbacks(execute=True):
+                record.enqueue()  # record() needs an argument.
+
+
+class RunWorkerTests(SimpleTestCase):
+    def test_worker_module_imports_before_django_setup(self):
+        # What a child started with the spawn method does before work() runs django.setup().
+        code = (
+            "from django.apps import apps\n"
+            "from taskqueue.management.commands.runworker import work\n"
+            "assert not apps.ready\n"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'SOAR.settings'))
+        result = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)